@@ -4,7 +4,7 @@ RailOptiX Backend - Intelligent Railway Traffic Optimizer
 Flask API with real-time optimization engine for Indian Railways
 """
 
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, send_file
 from flask_socketio import SocketIO, emit
 from flask_cors import CORS
 import json
@@ -13,10 +13,16 @@ import threading
 from datetime import datetime, timedelta
 import random
 import uuid
+import os
 
 from optimization_engine import TrainOptimizer
 from data_manager import DataManager
 from conflict_detector import ConflictDetector
+from network_simulator import LookaheadSimulator
+from delay_propagation import DelayPropagationModel
+from tick_profiler import TickProfiler
+from message_bus import create_message_bus
+from zone_cluster import ZoneCluster, ClusterDataView, ClusterConflictView, ClusterOptimizer
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'railoptix_secret_2024'
@@ -24,13 +30,52 @@ app.config['SECRET_KEY'] = 'railoptix_secret_2024'
 # Enable CORS for all origins (for development)
 CORS(app, resources={r"/*": {"origins": "*"}})
 
-# Initialize SocketIO with CORS support
-socketio = SocketIO(app, cors_allowed_origins="*", async_mode='threading')
+# Multi-worker mode: RAILOPTIX_WORKERS > 1 shards the network by zone across
+# workers and routes Socket.IO emits through RAILOPTIX_MESSAGE_QUEUE
+# (redis://... for worker processes, 'inprocess' for worker threads)
+NUM_WORKERS = int(os.environ.get('RAILOPTIX_WORKERS', '1'))
+MESSAGE_QUEUE = os.environ.get('RAILOPTIX_MESSAGE_QUEUE', 'inprocess')
 
-# Initialize core components
-data_manager = DataManager()
-optimizer = TrainOptimizer()
-conflict_detector = ConflictDetector()
+# Optional network compiled with timetable_store.py; memory-mapped at startup
+NETWORK_FILE = os.environ.get('RAILOPTIX_NETWORK_FILE')
+
+# On-demand profiler for the update loop (hooks are only installed while armed)
+tick_profiler = TickProfiler(output_dir=os.environ.get('RAILOPTIX_PROFILE_DIR', 'profiles'))
+
+if NUM_WORKERS > 1:
+    message_bus = create_message_bus(MESSAGE_QUEUE)
+    
+    # Initialize SocketIO with CORS support and the shared message queue
+    socketio = SocketIO(app, cors_allowed_origins="*", async_mode='threading',
+                        **message_bus.socketio_options())
+    
+    # Core components are views over the zone workers' shards
+    zone_cluster = ZoneCluster(message_bus, NUM_WORKERS, MESSAGE_QUEUE,
+                               network_scale=os.environ.get('RAILOPTIX_NETWORK_SCALE'),
+                               network_file=NETWORK_FILE)
+    data_manager = ClusterDataView(zone_cluster)
+    optimizer = ClusterOptimizer(zone_cluster)
+    conflict_detector = ClusterConflictView(zone_cluster)
+else:
+    # Initialize SocketIO with CORS support
+    socketio = SocketIO(app, cors_allowed_origins="*", async_mode='threading')
+    
+    # Initialize core components
+    zone_cluster = None
+    data_manager = DataManager()
+    if NETWORK_FILE:
+        data_manager.load_compiled(NETWORK_FILE)
+    delay_predictor = DelayPropagationModel(data_manager)
+    optimizer = TrainOptimizer(block_reservations=data_manager.block_reservations,
+                               simulator=LookaheadSimulator(data_manager),
+                               delay_predictor=delay_predictor)
+    conflict_detector = ConflictDetector(platform_allocator=data_manager.platform_allocator,
+                                         block_reservations=data_manager.block_reservations,
+                                         delay_predictor=delay_predictor)
+    
+    tick_profiler.register_hook('DataManager.update_train_positions', data_manager, 'update_train_positions')
+    tick_profiler.register_hook('ConflictDetector.detect_conflicts', conflict_detector, 'detect_conflicts')
+    tick_profiler.register_hook('TrainOptimizer.get_recommendations', optimizer, 'get_recommendations')
 
 # Global state
 current_trains = {}
@@ -41,6 +86,23 @@ kpi_metrics = {
     'replan_time': 4,
     'suggestion_acceptance': 78
 }
+kpi_lock = threading.Lock()
+# Serialises conflict detection and suggestion bookkeeping between the update loop and requests
+detection_lock = threading.Lock()
+
+def record_accepted_suggestions(count: int) -> dict:
+    """Credit accepted suggestions to the KPIs and return a consistent copy"""
+    with kpi_lock:
+        kpi_metrics['suggestion_acceptance'] = min(95, kpi_metrics['suggestion_acceptance'] + count)
+        kpi_metrics['avg_delay_reduced'] = kpi_metrics['avg_delay_reduced'] - 2 * count
+        return dict(kpi_metrics)
+
+def kpi_snapshot() -> dict:
+    with kpi_lock:
+        return dict(kpi_metrics)
+
+def conflict_train_ids(conflict: dict) -> set:
+    return {conflict.get(key, {}).get('id') for key in ('train1', 'train2')} - {None}
 
 @app.route('/')
 def index():
@@ -65,8 +127,9 @@ def get_trains():
 @app.route('/api/conflicts', methods=['GET'])
 def get_conflicts():
     """Get all active conflicts and suggestions"""
-    conflicts = conflict_detector.get_active_conflicts()
-    suggestions = optimizer.get_recommendations(conflicts)
+    with detection_lock:
+        conflicts = conflict_detector.get_active_conflicts()
+        suggestions = optimizer.get_recommendations(conflicts)
     
     return jsonify({
         "status": "success",
@@ -83,30 +146,86 @@ def accept_suggestion():
     conflict_id = data.get('conflict_id')
     
     # Implement the suggestion
-    result = optimizer.implement_suggestion(suggestion_id, conflict_id)
+    with detection_lock:
+        result = optimizer.implement_suggestion(suggestion_id, conflict_id)
     
     if result['success']:
         # Update KPIs
-        global kpi_metrics
-        kpi_metrics['suggestion_acceptance'] = min(95, kpi_metrics['suggestion_acceptance'] + 1)
-        kpi_metrics['avg_delay_reduced'] = kpi_metrics['avg_delay_reduced'] - 2
+        kpis = record_accepted_suggestions(1)
         
         # Broadcast update to all clients
         socketio.emit('suggestion_implemented', {
             'suggestion_id': suggestion_id,
             'conflict_id': conflict_id,
             'result': result,
-            'kpis': kpi_metrics
+            'kpis': kpis
         })
     
     return jsonify(result)
 
+@app.route('/api/accept-suggestions', methods=['POST'])
+def accept_suggestions():
+    """Accept a batch of suggestions: validate together, apply, re-detect once, broadcast once"""
+    data = request.get_json() or {}
+    entries = data.get('suggestions', [])
+    if not isinstance(entries, list) or not entries:
+        return jsonify({
+            "status": "error",
+            "message": "Body must contain a non-empty 'suggestions' list",
+            "timestamp": datetime.now().isoformat()
+        }), 400
+    
+    with detection_lock:
+        active = {conflict['id']: conflict for conflict in conflict_detector.get_active_conflicts()}
+        batch = optimizer.implement_suggestions(entries, set(active))
+        
+        resolved = [result['conflict_id'] for result in batch['implemented']]
+        affected_trains = set(batch['affected_trains'])
+        for conflict_id in resolved:
+            affected_trains |= conflict_train_ids(active.get(conflict_id, {}))
+        
+        if zone_cluster is None:
+            # Re-detect once for the batch, and only around the trains it touched
+            new_conflicts, suggestions = [], []
+            if batch['implemented']:
+                for conflict_id in resolved:
+                    conflict_detector.resolve_conflict(conflict_id, 'suggestion_implemented')
+                new_conflicts = conflict_detector.detect_conflicts(affected_trains)
+                if new_conflicts:
+                    suggestions = optimizer.get_recommendations(new_conflicts)
+        else:
+            # Each zone re-detected around its own accepted suggestions
+            new_conflicts, suggestions = batch.pop('conflicts'), batch.pop('suggestions')
+    
+    if batch['implemented']:
+        kpis = record_accepted_suggestions(len(batch['implemented']))
+        
+        socketio.emit('suggestions_implemented', {
+            'suggestion_ids': [result['suggestion_id'] for result in batch['implemented']],
+            'conflict_ids': resolved,
+            'results': batch['implemented'],
+            'affected_trains': sorted(affected_trains),
+            'affected_conflicts': [conflict['id'] for conflict in new_conflicts
+                                   if conflict_train_ids(conflict) & affected_trains],
+            'conflicts': new_conflicts,
+            'suggestions': suggestions,
+            'kpis': kpis,
+            'timestamp': datetime.now().isoformat()
+        })
+    
+    return jsonify({
+        "status": "success" if batch['success'] else "error",
+        **batch,
+        "affected_trains": sorted(affected_trains),
+        "new_conflicts": len(new_conflicts)
+    })
+
 @app.route('/api/kpis', methods=['GET'])
 def get_kpis():
     """Get current KPI metrics"""
     return jsonify({
         "status": "success",
-        "kpis": kpi_metrics,
+        "kpis": kpi_snapshot(),
         "timestamp": datetime.now().isoformat()
     })
 
@@ -125,6 +244,104 @@ def run_simulation():
         "timestamp": datetime.now().isoformat()
     })
 
+@app.route('/api/cluster', methods=['GET'])
+def get_cluster_status():
+    """Get zone worker status in multi-worker mode"""
+    return jsonify({
+        "status": "success",
+        "cluster": zone_cluster.get_status() if zone_cluster else {'zones': 1, 'mode': 'single_process'},
+        "timestamp": datetime.now().isoformat()
+    })
+
+def _admin_authorized() -> bool:
+    """Check the admin token; admin endpoints stay closed until RAILOPTIX_ADMIN_TOKEN is set"""
+    admin_token = os.environ.get('RAILOPTIX_ADMIN_TOKEN')
+    return bool(admin_token) and request.headers.get('X-Admin-Token') == admin_token
+
+@app.route('/api/admin/profiler', methods=['GET'])
+def get_profiler_status():
+    """Get the current profiler capture state and the latest report summary"""
+    if not _admin_authorized():
+        return jsonify({"status": "error", "error": "Unauthorized"}), 403
+    
+    return jsonify({
+        "status": "success",
+        "profiler": tick_profiler.get_status(),
+        "timestamp": datetime.now().isoformat()
+    })
+
+@app.route('/api/admin/profiler/arm', methods=['POST'])
+def arm_profiler():
+    """Arm the profiler for the next N update ticks or N requests on an endpoint"""
+    if not _admin_authorized():
+        return jsonify({"status": "error", "error": "Unauthorized"}), 403
+    
+    data = request.get_json() or {}
+    try:
+        count = int(data.get('count', 1))
+    except (TypeError, ValueError):
+        return jsonify({
+            "status": "error",
+            "error": "Count must be an integer",
+            "timestamp": datetime.now().isoformat()
+        }), 400
+    
+    result = tick_profiler.arm(
+        mode=data.get('mode', 'ticks'),
+        count=count,
+        app=app,
+        path=data.get('endpoint'),
+        method=data.get('method', 'GET').upper()
+    )
+    
+    return jsonify({
+        "status": "success" if result['success'] else "error",
+        **result,
+        "timestamp": datetime.now().isoformat()
+    }), 200 if result['success'] else 400
+
+@app.route('/api/admin/profiler/disarm', methods=['POST'])
+def disarm_profiler():
+    """Stop the running capture early and return what was collected"""
+    if not _admin_authorized():
+        return jsonify({"status": "error", "error": "Unauthorized"}), 403
+    
+    report = tick_profiler.disarm()
+    
+    return jsonify({
+        "status": "success",
+        "report": report,
+        "timestamp": datetime.now().isoformat()
+    })
+
+@app.route('/api/admin/profiler/report', methods=['GET'])
+def get_profiler_report():
+    """Get the top-functions table and section timings of the last capture"""
+    if not _admin_authorized():
+        return jsonify({"status": "error", "error": "Unauthorized"}), 403
+    
+    if tick_profiler.last_report is None:
+        return jsonify({"status": "error", "error": "No completed capture"}), 404
+    
+    return jsonify({
+        "status": "success",
+        "report": tick_profiler.last_report,
+        "timestamp": datetime.now().isoformat()
+    })
+
+@app.route('/api/admin/profiler/flamegraph', methods=['GET'])
+def get_profiler_flamegraph():
+    """Download the collapsed-stack file of the last capture (flamegraph.pl / speedscope)"""
+    if not _admin_authorized():
+        return jsonify({"status": "error", "error": "Unauthorized"}), 403
+    
+    if tick_profiler.last_report is None:
+        return jsonify({"status": "error", "error": "No completed capture"}), 404
+    
+    return send_file(tick_profiler.last_report['flamegraph_file'],
+                     mimetype='text/plain',
+                     as_attachment=True)
+
 # SocketIO Events
 @socketio.on('connect')
 def handle_connect():
@@ -149,24 +366,27 @@ def handle_update_request():
     emit('data_update', {
         'trains': trains,
         'conflicts': conflicts,
-        'kpis': kpi_metrics,
+        'kpis': kpi_snapshot(),
         'timestamp': datetime.now().isoformat()
     })
 
 def simulate_real_time_updates():
     """Background thread to simulate real-time train movements and conflicts"""
+    tick_profiler.bind_tick_thread()
+    
     while True:
         try:
-            # Update train positions
-            data_manager.update_train_positions()
-            
-            # Check for new conflicts
-            new_conflicts = conflict_detector.detect_conflicts()
+            with detection_lock:
+                # Update train positions
+                data_manager.update_train_positions()
+                
+                # Check for new conflicts
+                new_conflicts = conflict_detector.detect_conflicts()
+                
+                # Generate suggestions for new conflicts
+                suggestions = optimizer.get_recommendations(new_conflicts) if new_conflicts else []
             
-            # Generate suggestions for new conflicts
             if new_conflicts:
-                suggestions = optimizer.get_recommendations(new_conflicts)
-                
                 # Broadcast to all connected clients
                 socketio.emit('conflict_detected', {
                     'conflicts': new_conflicts,
@@ -176,12 +396,16 @@ def simulate_real_time_updates():
             
             # Update KPIs periodically
             if random.random() < 0.1:  # 10% chance
-                kpi_metrics['replan_time'] = random.randint(2, 8)
+                with kpi_lock:
+                    kpi_metrics['replan_time'] = random.randint(2, 8)
+                    kpis = dict(kpi_metrics)
                 socketio.emit('kpi_update', {
-                    'kpis': kpi_metrics,
+                    'kpis': kpis,
                     'timestamp': datetime.now().isoformat()
                 })
             
+            tick_profiler.tick_completed()
+            
             time.sleep(5)  # Update every 5 seconds
             
         except Exception as e:
@@ -189,20 +413,22 @@ def simulate_real_time_updates():
             time.sleep(10)
 
 if __name__ == '__main__':
-    # Start background thread for real-time updates
-    update_thread = threading.Thread(target=simulate_real_time_updates, daemon=True)
-    update_thread.start()
+    if zone_cluster is not None:
+        # Zone workers run their own update loops
+        zone_cluster.start()
+    else:
+        # Start background thread for real-time updates
+        update_thread = threading.Thread(target=simulate_real_time_updates, daemon=True)
+        update_thread.start()
     
     print("🚆 RailOptiX Backend Starting...")
     print("📡 Real-time optimization engine ready")
     print("🔗 WebSocket server listening...")
     
     # Run the application
-    import os
-
-socketio.run(app,
-             host="0.0.0.0",
-             port=int(os.environ.get("PORT", 5000)),
-             debug=False,
-             use_reloader=False,
-             allow_unsafe_werkzeug=True)
+    socketio.run(app,
+                 host="0.0.0.0",
+                 port=int(os.environ.get("PORT", 5000)),
+                 debug=False,
+                 use_reloader=False,
+                 allow_unsafe_werkzeug=True)
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+RailOptiX Benchmark Suite
+Times each core backend path against seeded synthetic networks
+
+Usage:
+    python benchmark_suite.py --scale division --output bench.json
+    python benchmark_suite.py --scale national --repeat 3 --compare bench.json
+"""
+
+import argparse
+import json
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+from typing import List, Dict, Any, Callable
+
+from data_manager import DataManager
+from conflict_detector import ConflictDetector
+from optimization_engine import TrainOptimizer
+from network_simulator import LookaheadSimulator
+from delay_propagation import DelayPropagationModel
+from network_generator import SyntheticNetworkGenerator, SCALE_PRESETS
+
+BENCHMARK_FORMAT_VERSION = 1
+
+
+def _time_call(func: Callable, repeat: int, warmup: int = 1) -> Dict[str, Any]:
+    """Run a callable several times and summarize wall-clock timings in milliseconds"""
+    for _ in range(warmup):
+        func()
+
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+
+    samples.sort()
+    p95_index = min(len(samples) - 1, int(round(0.95 * (len(samples) - 1))))
+    return {
+        'runs': len(samples),
+        'min_ms': round(samples[0], 4),
+        'median_ms': round(statistics.median(samples), 4),
+        'mean_ms': round(statistics.fmean(samples), 4),
+        'p95_ms': round(samples[p95_index], 4),
+        'max_ms': round(samples[-1], 4)
+    }
+
+
+def _git_revision() -> str:
+    """Best-effort git revision of the code under test"""
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'],
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def build_components(network: Dict[str, Any], conflict_count: int, seed: int):
+    """Load a generated network into fresh backend components"""
+    data_manager = DataManager()
+    data_manager.load_network(network['stations'], network['trains'], network['sections'])
+
+    delay_predictor = DelayPropagationModel(data_manager)
+    conflict_detector = ConflictDetector(platform_allocator=data_manager.platform_allocator,
+                                         block_reservations=data_manager.block_reservations,
+                                         delay_predictor=delay_predictor)
+    generator = SyntheticNetworkGenerator(seed)
+    conflicts = generator.generate_conflicts(network['trains'], conflict_count, network['stations'])
+    conflict_detector.active_conflicts = {conflict['id']: conflict for conflict in conflicts}
+
+    optimizer = TrainOptimizer(block_reservations=data_manager.block_reservations,
+                               simulator=LookaheadSimulator(data_manager),
+                               delay_predictor=delay_predictor)
+    return data_manager, conflict_detector, optimizer
+
+
+def run_benchmarks(scale: str = 'division', seed: int = 42, repeat: int = 5,
+                   stations: int = None, trains: int = None, proximity_queries: int = 100,
+                   conflict_count: int = None) -> Dict[str, Any]:
+    """Generate a network and time every core path separately"""
+    random.seed(seed)
+    results = {}
+
+    generator = SyntheticNetworkGenerator(seed)
+    start = time.perf_counter()
+    network = generator.generate(scale, stations=stations, trains=trains)
+    generation_ms = (time.perf_counter() - start) * 1000
+
+    num_trains = len(network['trains'])
+    conflict_count = conflict_count or max(2, min(num_trains // 20, 5000))
+    data_manager, conflict_detector, optimizer = build_components(network, conflict_count, seed)
+
+    query_rng = random.Random(seed + 1)
+    query_points = [query_rng.choice(network['stations']) for _ in range(proximity_queries)]
+    conflicts = conflict_detector.get_active_conflicts()
+
+    def proximity_batch():
+        for station in query_points:
+            data_manager.get_trains_near_location(station['lat'], station['lng'], radius=0.1)
+
+    def conflict_detection():
+        conflict_detector.detect_conflicts()
+        conflict_detector.get_active_conflicts()
+
+    def recommendation():
+        optimizer.get_recommendations(conflicts)
+        optimizer.active_suggestions.clear()
+
+    def serialization():
+        # Same payload the dashboard receives on 'data_update'
+        json.dumps({
+            'trains': data_manager.get_active_trains(),
+            'conflicts': conflict_detector.get_active_conflicts(),
+            'kpis': {},
+            'timestamp': datetime.now().isoformat()
+        })
+
+    benchmarks = [
+        ('position_update', data_manager.update_train_positions),
+        ('proximity_queries', proximity_batch),
+        ('conflict_detection', conflict_detection),
+        ('delay_prediction', lambda: optimizer.delay_predictor.predict()),
+        ('recommendation', recommendation),
+        ('simulation', lambda: optimizer.run_simulation({'name': 'benchmark', 'seed': seed})),
+        ('payload_serialization', serialization)
+    ]
+
+    for name, func in benchmarks:
+        print(f"⏱  {name} ({scale}, {num_trains} trains)...", file=sys.stderr)
+        results[name] = _time_call(func, repeat)
+
+    results['proximity_queries']['queries_per_run'] = proximity_queries
+    results['recommendation']['conflicts_per_run'] = len(conflicts)
+
+    return {
+        'format_version': BENCHMARK_FORMAT_VERSION,
+        'backend_revision': _git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'timestamp': datetime.now().isoformat(),
+        'scale': scale,
+        'seed': seed,
+        'repeat': repeat,
+        'network': {
+            'stations': len(network['stations']),
+            'sections': len(network['sections']),
+            'trains': num_trains,
+            'conflicts': len(conflicts),
+            'generation_ms': round(generation_ms, 2)
+        },
+        'results': results
+    }
+
+
+def compare_results(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float = 1.10) -> Dict[str, Any]:
+    """Compare median timings against a previous run and flag regressions"""
+    comparison = {}
+
+    for name, stats in current['results'].items():
+        previous = baseline.get('results', {}).get(name)
+        if not previous or not previous.get('median_ms'):
+            continue
+        ratio = stats['median_ms'] / previous['median_ms']
+        comparison[name] = {
+            'baseline_median_ms': previous['median_ms'],
+            'current_median_ms': stats['median_ms'],
+            'ratio': round(ratio, 3),
+            'regression': ratio > threshold
+        }
+
+    return {
+        'baseline_revision': baseline.get('backend_revision'),
+        'threshold': threshold,
+        'same_workload': (baseline.get('scale'), baseline.get('seed'), baseline.get('network', {}).get('trains')) ==
+                         (current['scale'], current['seed'], current['network']['trains']),
+        'paths': comparison
+    }
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description='RailOptiX backend scaling benchmarks')
+    parser.add_argument('--scale', choices=sorted(SCALE_PRESETS), default='division')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--stations', type=int, help='Override the preset station count')
+    parser.add_argument('--trains', type=int, help='Override the preset train count')
+    parser.add_argument('--proximity-queries', type=int, default=100)
+    parser.add_argument('--conflicts', type=int, help='Number of synthetic conflicts to solve')
+    parser.add_argument('--output', help='Write JSON results to this file (default: stdout)')
+    parser.add_argument('--compare', help='Previous JSON results to compare against')
+    parser.add_argument('--threshold', type=float, default=1.10, help='Median ratio that counts as a regression')
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks(args.scale, args.seed, args.repeat, args.stations, args.trains,
+                            args.proximity_queries, args.conflicts)
+
+    if args.compare:
+        with open(args.compare) as f:
+            report['comparison'] = compare_results(report, json.load(f), args.threshold)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+    regressions = [name for name, entry in report.get('comparison', {}).get('paths', {}).items() if entry['regression']]
+    if regressions:
+        print(f"⚠️  Regressions: {', '.join(regressions)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
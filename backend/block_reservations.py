@@ -0,0 +1,386 @@
+"""
+RailOptiX Block Reservations
+Block occupancy timeline: a fixed time-slot bitmap per block over a rolling horizon
+"""
+
+import math
+from datetime import datetime, timedelta
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+
+from network_generator import _distance_km
+
+FREE = -1
+
+# Track sections are split into signalling blocks of at most this length
+BLOCK_LENGTH_KM = 10.0
+# Minutes before a train standing at a station can enter the next block
+DEPARTURE_MINUTES = 2
+
+
+def derive_sections(stations: Dict[str, Dict], trains: List[Dict]) -> List[Dict]:
+    """Build sections from train routes for networks without explicit track data"""
+    sections = {}
+    for train in trains:
+        route = train.get('route') or [train.get('from_station'), train.get('current_station'), train.get('to_station')]
+        route = [station for index, station in enumerate(route) if station and (index == 0 or station != route[index - 1])]
+        for a, b in zip(route, route[1:]):
+            if a in stations and b in stations and (b, a) not in sections:
+                sections.setdefault((a, b), {
+                    'id': f"{a}-{b}",
+                    'from_station': a,
+                    'to_station': b,
+                    'length_km': round(_distance_km(stations[a], stations[b]), 2),
+                    'tracks': 2
+                })
+    return list(sections.values())
+
+
+def next_stops(train: Dict) -> List[str]:
+    """Remaining stops of a train, starting with its current station"""
+    route = train.get('route') or [train.get('current_station'), train.get('to_station')]
+    current = train.get('current_station')
+    remaining = route[route.index(current):] if current in route else [current, train.get('to_station')]
+    return [station for index, station in enumerate(remaining)
+            if station and (index == 0 or station != remaining[index - 1])]
+
+
+def running_minutes(length_km, speed) -> float:
+    return length_km / max(10, speed or 60) * 60
+
+
+class BlockReservationTable:
+    """Answers "is block B free between t1 and t2" with vectorized NumPy operations
+
+    `owner[row, slot]` holds the index of the train occupying a block during a
+    time slot (or FREE). Prefix sums of the occupancy bitmap are refreshed
+    lazily per row, so a batch of free-window queries costs O(1) per query.
+    """
+
+    def __init__(self, sections: List[Dict], slot_seconds: int = 30, horizon_minutes: int = 240,
+                 start_time: datetime = None, block_length_km: float = BLOCK_LENGTH_KM):
+        self.slot_seconds = slot_seconds
+        self.num_slots = horizon_minutes * 60 // slot_seconds
+        start_time = start_time or datetime.now()
+        self.base_time = start_time - timedelta(seconds=start_time.timestamp() % slot_seconds)
+
+        self.block_ids = []
+        self.block_lengths = []
+        self._routes = {}  # (from_station, to_station) -> [row, ...] in travel order
+        for section in sections:
+            self._add_section(section, block_length_km)
+
+        self.owner = np.full((len(self.block_ids), self.num_slots), FREE, dtype=np.int32)
+        self._prefix = np.zeros((len(self.block_ids), self.num_slots + 1), dtype=np.int32)
+        self._dirty = np.ones(len(self.block_ids), dtype=bool)
+        self.block_lengths = np.array(self.block_lengths, dtype=np.float64)
+
+        self.train_ids = []
+        self._train_index = {}
+        self.train_info = {}
+        self.pending = {}  # train_id -> rejected request with the train blocking it
+        # train index -> rows it has reserved, so release only scans those rows
+        # (None in simulation copies, which never release)
+        self._owned_rows = {}
+
+    def _add_section(self, section: Dict, block_length_km: float):
+        a, b = section['from_station'], section['to_station']
+        length = float(section.get('length_km') or block_length_km)
+        count = max(1, math.ceil(length / block_length_km))
+
+        forward = []
+        for index in range(count):
+            forward.append(len(self.block_ids))
+            self.block_ids.append(f"{section['id']}#{index + 1}")
+            self.block_lengths.append(length / count)
+        self._routes[a, b] = forward
+
+        if (section.get('tracks') or 1) >= 2:
+            # Separate up and down lines
+            backward = []
+            for index in range(count):
+                backward.append(len(self.block_ids))
+                self.block_ids.append(f"{section['id']}#{count - index}R")
+                self.block_lengths.append(length / count)
+            self._routes[b, a] = backward
+        else:
+            # Single line: both directions share the same blocks
+            self._routes[b, a] = list(reversed(forward))
+
+    # --- time helpers -------------------------------------------------------
+
+    def to_slot(self, when: datetime) -> int:
+        return int((when - self.base_time).total_seconds() // self.slot_seconds)
+
+    def slot_time(self, slot: int) -> datetime:
+        return self.base_time + timedelta(seconds=int(slot) * self.slot_seconds)
+
+    def minutes_to_slots(self, minutes) -> np.ndarray:
+        return np.maximum(1, np.ceil(np.asarray(minutes, dtype=np.float64) * 60 / self.slot_seconds)).astype(np.int64)
+
+    def advance(self, now: datetime) -> int:
+        """Roll the horizon forward so slot 0 is the current time"""
+        shift = self.to_slot(now)
+        if shift <= 0:
+            return 0
+        shift = min(shift, self.num_slots)
+        self.owner[:, :self.num_slots - shift] = self.owner[:, shift:]
+        self.owner[:, self.num_slots - shift:] = FREE
+        self.base_time = self.base_time + timedelta(seconds=shift * self.slot_seconds)
+        self._dirty[:] = True
+        for request in self.pending.values():
+            for key in ('start', 'end', 'free_at'):
+                request[key] -= shift
+        return shift
+
+    # --- network helpers ----------------------------------------------------
+
+    def route_blocks(self, from_station: str, to_station: str) -> List[int]:
+        """Block rows between two adjacent stations, in travel order"""
+        return self._routes.get((from_station, to_station), [])
+
+    def block_id(self, row: int) -> str:
+        return self.block_ids[row]
+
+    def register_train(self, train_id: str, info: Dict = None) -> int:
+        if train_id not in self._train_index:
+            self._train_index[train_id] = len(self.train_ids)
+            self.train_ids.append(train_id)
+        if info is not None:
+            self.train_info[train_id] = info
+        return self._train_index[train_id]
+
+    # --- vectorized operations ----------------------------------------------
+
+    def _refresh(self, rows: np.ndarray):
+        dirty_rows = np.unique(rows[self._dirty[rows]])
+        if len(dirty_rows):
+            self._prefix[dirty_rows, 1:] = np.cumsum(self.owner[dirty_rows] != FREE, axis=1)
+            self._dirty[dirty_rows] = False
+
+    def are_free(self, rows, start_slots, end_slots) -> np.ndarray:
+        """Whether each block is free over [start, end) (slots beyond the horizon count as free)"""
+        rows = np.asarray(rows, dtype=np.int64)
+        if not len(rows):
+            return np.zeros(0, dtype=bool)
+        starts = np.clip(np.asarray(start_slots, dtype=np.int64), 0, self.num_slots)
+        ends = np.clip(np.asarray(end_slots, dtype=np.int64), 0, self.num_slots)
+        self._refresh(rows)
+        return self._prefix[rows, np.maximum(starts, ends)] - self._prefix[rows, starts] == 0
+
+    def reserve(self, rows, train_ids: List[str], start_slots, end_slots) -> np.ndarray:
+        """Reserve [start, end) on each block; earlier requests in the batch win overlaps"""
+        owners = np.array([self.register_train(train_id) for train_id in train_ids], dtype=np.int32)
+        return self.reserve_indexes(rows, owners, start_slots, end_slots)
+
+    def reserve_indexes(self, rows, owners, start_slots, end_slots) -> np.ndarray:
+        """Same as `reserve` with trains given by their registered index"""
+        rows = np.asarray(rows, dtype=np.int64)
+        owners = np.asarray(owners, dtype=np.int32)
+        starts = np.clip(np.asarray(start_slots, dtype=np.int64), 0, self.num_slots)
+        ends = np.clip(np.asarray(end_slots, dtype=np.int64), 0, self.num_slots)
+
+        accepted = self.are_free(rows, starts, ends)
+        lengths = np.where(accepted, np.maximum(ends - starts, 0), 0)
+        if not lengths.sum():
+            return accepted
+
+        # Expand every accepted request into its (row, slot) cells
+        request_index = np.repeat(np.arange(len(rows)), lengths)
+        offsets = np.arange(len(request_index)) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        cell_rows = rows[request_index]
+        cell_slots = starts[request_index] + offsets
+        cell_owners = owners[request_index]
+
+        # Within the batch, the earliest request claiming a cell wins it
+        cell_keys = cell_rows * self.num_slots + cell_slots
+        order = np.lexsort((request_index, cell_keys))
+        duplicate = np.zeros(len(order), dtype=bool)
+        duplicate[1:] = cell_keys[order][1:] == cell_keys[order][:-1]
+        lost_requests = np.unique(request_index[order[duplicate]])
+        if len(lost_requests):
+            accepted[lost_requests] = False
+
+        write = accepted[request_index]
+        self.owner[cell_rows[write], cell_slots[write]] = cell_owners[write]
+        self._dirty[rows] = True
+        if self._owned_rows is not None:
+            for owner, row in zip(owners[accepted].tolist(), rows[accepted].tolist()):
+                self._owned_rows.setdefault(owner, set()).add(row)
+        return accepted
+
+    def release(self, train_ids: List[str]):
+        """Drop every reservation held by the given trains"""
+        indexes = [self._train_index[train_id] for train_id in train_ids if train_id in self._train_index]
+        for train_id in train_ids:
+            self.pending.pop(train_id, None)
+        if not indexes:
+            return
+        if self._owned_rows is None:
+            mask = np.isin(self.owner, indexes)
+            self._dirty[np.flatnonzero(mask.any(axis=1))] = True
+            self.owner[mask] = FREE
+            return
+        for index in indexes:
+            rows = np.fromiter(self._owned_rows.pop(index, ()), dtype=np.int64)
+            if not len(rows):
+                continue
+            window = self.owner[rows]
+            window[window == index] = FREE
+            self.owner[rows] = window
+            self._dirty[rows] = True
+
+    def first_free_window(self, rows, duration_slots, earliest_slots, chunk_size: int = 2048) -> np.ndarray:
+        """Earliest start >= earliest with `duration` free slots on each block
+
+        A start at the end of the horizon is always possible, so every query
+        returns a slot in [earliest, num_slots].
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        durations = np.asarray(duration_slots, dtype=np.int64)
+        earliest = np.clip(np.asarray(earliest_slots, dtype=np.int64), 0, self.num_slots)
+        result = np.empty(len(rows), dtype=np.int64)
+        if not len(rows):
+            return result
+        self._refresh(rows)
+
+        candidate = np.arange(self.num_slots + 1)
+        for begin in range(0, len(rows), chunk_size):
+            chunk = slice(begin, begin + chunk_size)
+            prefix = self._prefix[rows[chunk]]
+            ends = np.minimum(candidate[None, :] + durations[chunk, None], self.num_slots)
+            busy = np.take_along_axis(prefix, ends, axis=1) - prefix
+            ok = (busy == 0) & (candidate[None, :] >= earliest[chunk, None])
+            result[chunk] = np.argmax(ok, axis=1)
+        return result
+
+    def occupant(self, row: int, start_slot: int, end_slot: int) -> Optional[str]:
+        """First train occupying a block within [start, end)"""
+        window = self.owner[row, max(0, start_slot):max(0, min(end_slot, self.num_slots))]
+        occupied = window[window != FREE]
+        return self.train_ids[occupied[0]] if len(occupied) else None
+
+    def occupants(self, rows, start_slots, end_slots, chunk_size: int = 2048) -> List[Optional[str]]:
+        """`occupant` for a batch of windows"""
+        rows = np.asarray(rows, dtype=np.int64)
+        starts = np.asarray(start_slots, dtype=np.int64)[:, None]
+        ends = np.asarray(end_slots, dtype=np.int64)[:, None]
+        slots = np.arange(self.num_slots)
+        result = []
+        for begin in range(0, len(rows), chunk_size):
+            chunk = slice(begin, begin + chunk_size)
+            window = self.owner[rows[chunk]]
+            occupied = (window != FREE) & (slots >= starts[chunk]) & (slots < ends[chunk])
+            first = np.argmax(occupied, axis=1)
+            found = occupied[np.arange(len(first)), first]
+            owners = window[np.arange(len(first)), first]
+            result.extend(self.train_ids[owner] if ok else None
+                          for owner, ok in zip(owners.tolist(), found.tolist()))
+        return result
+
+    def reservations_for(self, train_id: str) -> List[Dict]:
+        """Blocks and time windows currently reserved by one train"""
+        index = self._train_index.get(train_id)
+        if index is None:
+            return []
+        if self._owned_rows is None:
+            candidates = np.arange(len(self.block_ids))
+        else:
+            candidates = np.array(sorted(self._owned_rows.get(index, ())), dtype=np.int64)
+        rows, slots = np.nonzero(self.owner[candidates] == index)
+        rows = candidates[rows]
+        windows = []
+        for row in np.unique(rows):
+            row_slots = slots[rows == row]
+            windows.append({
+                'block_id': self.block_ids[row],
+                'start': self.slot_time(row_slots.min()).isoformat(),
+                'end': self.slot_time(row_slots.max() + 1).isoformat()
+            })
+        return windows
+
+    # --- request bookkeeping ------------------------------------------------
+
+    def request(self, requests: List[Dict]) -> np.ndarray:
+        """Reserve a batch of requests (in priority order) and remember the rejected ones
+
+        Each request needs 'train_id', 'row', 'start' and 'end' slots; an
+        optional 'train' summary is kept for conflict reporting.
+        """
+        if not requests:
+            return np.zeros(0, dtype=bool)
+        owners = [self.register_train(request['train_id'], request.get('train')) for request in requests]
+
+        rows = np.array([request['row'] for request in requests], dtype=np.int64)
+        starts = np.array([request['start'] for request in requests], dtype=np.int64)
+        ends = np.array([request['end'] for request in requests], dtype=np.int64)
+        accepted = self.reserve_indexes(rows, owners, starts, ends)
+
+        rejected = np.flatnonzero(~accepted)
+        if len(rejected):
+            windows = self.first_free_window(rows[rejected], ends[rejected] - starts[rejected], starts[rejected])
+            blockers = self.occupants(rows[rejected], starts[rejected], ends[rejected])
+        for position, index in enumerate(rejected.tolist()):
+            request = requests[index]
+            self.pending[request['train_id']] = {
+                **request,
+                'blocker': blockers[position],
+                'free_at': int(windows[position])
+            }
+        for index in np.flatnonzero(accepted):
+            self.pending.pop(requests[index]['train_id'], None)
+        return accepted
+
+    def required_hold_minutes(self, train_id: str) -> int:
+        """Minutes a train must wait before the block it asked for is free (0 if not blocked)"""
+        request = self.pending.get(train_id)
+        if not request:
+            return 0
+        return max(0, math.ceil((request['free_at'] - request['start']) * self.slot_seconds / 60))
+
+    def get_block_conflicts(self) -> List[Dict]:
+        """Rejected requests and the train holding the block they need"""
+        conflicts = []
+        for train_id, request in self.pending.items():
+            blocker = request.get('blocker')
+            if not blocker or blocker not in self.train_info:
+                continue
+            conflicts.append({
+                'block_id': self.block_ids[request['row']],
+                'train': self.train_info.get(train_id, {'id': train_id}),
+                'blocking_train': self.train_info[blocker],
+                'start': self.slot_time(request['start']),
+                'wait_minutes': max(1, self.required_hold_minutes(train_id))
+            })
+        return conflicts
+
+    def empty_copy(self, rows=None) -> 'BlockReservationTable':
+        """Same blocks and horizon with no reservations (used for look-ahead simulation)
+
+        With `rows`, the copy only holds those blocks, renumbered 0..len(rows)-1
+        in the given order, and starts with an empty train registry.
+        """
+        table = BlockReservationTable.__new__(BlockReservationTable)
+        table.__dict__.update(self.__dict__)
+        if rows is None:
+            table.owner = np.full_like(self.owner, FREE)
+            table._prefix = np.zeros_like(self._prefix)
+            table._dirty = np.zeros_like(self._dirty)
+            table.train_ids = list(self.train_ids)
+            table._train_index = dict(self._train_index)
+            table.train_info = dict(self.train_info)
+        else:
+            rows = np.asarray(rows, dtype=np.int64)
+            table.block_ids = [self.block_ids[row] for row in rows]
+            table.block_lengths = self.block_lengths[rows]
+            table._routes = {}
+            table.owner = np.full((len(rows), self.num_slots), FREE, dtype=np.int32)
+            table._prefix = np.zeros((len(rows), self.num_slots + 1), dtype=np.int32)
+            table._dirty = np.zeros(len(rows), dtype=bool)
+            table.train_ids = []
+            table._train_index = {}
+            table.train_info = {}
+        table.pending = {}
+        table._owned_rows = None
+        return table
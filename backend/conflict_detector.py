@@ -6,17 +6,45 @@ Real-time conflict detection and analysis for railway operations
 import random
 import uuid
 from datetime import datetime, timedelta
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Callable
+
+# Conflict type reported for each kind of predicted knock-on dependency
+KNOCK_ON_CONFLICT_TYPES = {'headway': 'signal_conflict', 'platform': 'platform_conflict', 'rake': 'rake_link'}
+
+
+def _in_scope(key: tuple, train_ids: set = None) -> bool:
+    """Whether a conflict key (location, train, other train) involves one of `train_ids` (None: any)"""
+    return train_ids is None or key[1] in train_ids or key[2] in train_ids
+
 
 class ConflictDetector:
     """Detects and manages railway operational conflicts"""
     
-    def __init__(self):
+    def __init__(self, platform_allocator=None, block_reservations=None, delay_predictor=None,
+                 knock_on_threshold: int = 5, max_predicted_conflicts: int = 10,
+                 simulated_conflicts: bool = True, now: Callable[[], datetime] = datetime.now):
         self.active_conflicts = {}
         self.conflict_history = []
+        self.now = now  # Current time (a virtual clock in replays)
         
-        # Initialize with some demo conflicts
-        self._initialize_demo_conflicts()
+        # Platform conflicts come from the allocator's occupancy timelines when available
+        self.platform_allocator = platform_allocator
+        self._platform_conflict_ids = {}
+        
+        # Signal conflicts come from rejected block reservations when available
+        self.block_reservations = block_reservations
+        self._block_conflict_ids = {}
+        
+        # Predicted conflicts come from knock-on delays of at least `knock_on_threshold` minutes
+        self.delay_predictor = delay_predictor
+        self.knock_on_threshold = knock_on_threshold
+        self.max_predicted_conflicts = max_predicted_conflicts
+        self._knock_on_conflict_ids = {}
+        
+        # Demo and randomly simulated conflicts (off for replays of recorded data)
+        self.simulated_conflicts = simulated_conflicts
+        if simulated_conflicts:
+            self._initialize_demo_conflicts()
     
     def _initialize_demo_conflicts(self):
         """Initialize with demo conflicts for presentation"""
@@ -26,14 +54,14 @@ class ConflictDetector:
                 'type': 'train_crossing',
                 'priority': 'high',
                 'location': 'Agra Cantt Junction',
-                'estimated_time': (datetime.now() + timedelta(minutes=8)).isoformat(),
+                'estimated_time': (self.now() + timedelta(minutes=8)).isoformat(),
                 'train1': {
                     'id': '12953',
                     'name': 'August Kranti Rajdhani Express',
                     'type': 'Express',
                     'priority': 'high',
                     'current_delay': 0,
-                    'estimated_arrival': (datetime.now() + timedelta(minutes=8)).isoformat()
+                    'estimated_arrival': (self.now() + timedelta(minutes=8)).isoformat()
                 },
                 'train2': {
                     'id': '34521',
@@ -41,26 +69,26 @@ class ConflictDetector:
                     'type': 'Freight', 
                     'priority': 'low',
                     'current_delay': 15,
-                    'estimated_arrival': (datetime.now() + timedelta(minutes=10)).isoformat()
+                    'estimated_arrival': (self.now() + timedelta(minutes=10)).isoformat()
                 },
                 'conflict_severity': 'medium',
                 'potential_delay': 12,
                 'status': 'active',
-                'detected_at': datetime.now().isoformat()
+                'detected_at': self.now().isoformat()
             },
             {
                 'id': str(uuid.uuid4()),
                 'type': 'platform_conflict',
                 'priority': 'medium',
                 'location': 'Agra Cantt Platform 2',
-                'estimated_time': (datetime.now() + timedelta(minutes=15)).isoformat(),
+                'estimated_time': (self.now() + timedelta(minutes=15)).isoformat(),
                 'train1': {
                     'id': '12015',
                     'name': 'Ajmer Shatabdi Express',
                     'type': 'Express',
                     'priority': 'high',
                     'current_delay': 5,
-                    'estimated_arrival': (datetime.now() + timedelta(minutes=15)).isoformat()
+                    'estimated_arrival': (self.now() + timedelta(minutes=15)).isoformat()
                 },
                 'train2': {
                     'id': '22933',
@@ -68,25 +96,41 @@ class ConflictDetector:
                     'type': 'Express',
                     'priority': 'medium',
                     'current_delay': 8,
-                    'estimated_arrival': (datetime.now() + timedelta(minutes=16)).isoformat()
+                    'estimated_arrival': (self.now() + timedelta(minutes=16)).isoformat()
                 },
                 'conflict_severity': 'low',
                 'potential_delay': 6,
                 'status': 'active',
-                'detected_at': datetime.now().isoformat()
+                'detected_at': self.now().isoformat()
             }
         ]
         
         for conflict in demo_conflicts:
             self.active_conflicts[conflict['id']] = conflict
     
-    def detect_conflicts(self) -> List[Dict]:
-        """Detect new conflicts in the railway network"""
+    def detect_conflicts(self, train_ids: set = None) -> List[Dict]:
+        """Detect new conflicts in the railway network
+        
+        With `train_ids`, only conflicts involving those trains are raised or
+        resolved (e.g. after accepting suggestions for them); the rest are
+        left for the next full detection.
+        """
         new_conflicts = []
         
+        if self.platform_allocator is not None:
+            new_conflicts.extend(self._detect_platform_conflicts(train_ids))
+        if self.block_reservations is not None:
+            new_conflicts.extend(self._detect_block_conflicts(train_ids))
+        if self.delay_predictor is not None:
+            new_conflicts.extend(self._detect_knock_on_conflicts(train_ids))
+        
         # Simulate occasional new conflict detection
-        if random.random() < 0.15:  # 15% chance of detecting new conflict
+        if self.simulated_conflicts and train_ids is None and random.random() < 0.15:  # 15% chance
             conflict_types = ['train_crossing', 'platform_conflict', 'signal_conflict', 'track_maintenance']
+            if self.platform_allocator is not None:
+                conflict_types.remove('platform_conflict')
+            if self.block_reservations is not None:
+                conflict_types.remove('signal_conflict')
             
             new_conflict = {
                 'id': str(uuid.uuid4()),
@@ -98,13 +142,13 @@ class ConflictDetector:
                     'Mumbai Central Platform 4',
                     'Chennai Central Yard'
                 ]),
-                'estimated_time': (datetime.now() + timedelta(minutes=random.randint(5, 30))).isoformat(),
+                'estimated_time': (self.now() + timedelta(minutes=random.randint(5, 30))).isoformat(),
                 'train1': self._generate_random_train_info(),
                 'train2': self._generate_random_train_info(),
                 'conflict_severity': random.choice(['low', 'medium', 'high']),
                 'potential_delay': random.randint(3, 20),
                 'status': 'active',
-                'detected_at': datetime.now().isoformat()
+                'detected_at': self.now().isoformat()
             }
             
             self.active_conflicts[new_conflict['id']] = new_conflict
@@ -112,13 +156,229 @@ class ConflictDetector:
             
             # Add to history
             self.conflict_history.append({
-                'timestamp': datetime.now().isoformat(),
+                'timestamp': self.now().isoformat(),
                 'action': 'conflict_detected',
                 'conflict': new_conflict
             })
         
         return new_conflicts
     
+    def _detect_platform_conflicts(self, train_ids: set = None) -> List[Dict]:
+        """Turn trains the platform allocator could not place into platform conflicts
+        
+        Conflicts whose train has since been given a platform are resolved.
+        """
+        new_conflicts = []
+        current_keys = set()
+        
+        for entry in self.platform_allocator.get_platform_conflicts():
+            key = (entry['station_id'], entry['train']['id'], entry['blocking_train']['id'])
+            if not _in_scope(key, train_ids):
+                continue
+            current_keys.add(key)
+            if key in self._platform_conflict_ids:
+                continue
+            
+            conflict = self._resource_conflict(
+                'platform_conflict', f"{entry['station_name']} Platform {entry['platform']}",
+                entry['train'], entry['arrival'], entry['blocking_train'], entry['blocking_arrival'],
+                entry['wait_minutes'])
+            
+            self._platform_conflict_ids[key] = conflict['id']
+            self.register_conflict(conflict)
+            new_conflicts.append(conflict)
+        
+        for key in list(self._platform_conflict_ids):
+            if key not in current_keys and _in_scope(key, train_ids):
+                self.resolve_conflict(self._platform_conflict_ids.pop(key), 'platform_reallocated')
+        
+        return new_conflicts
+    
+    def _detect_block_conflicts(self, train_ids: set = None) -> List[Dict]:
+        """Turn block reservations rejected because another train holds the block into signal conflicts
+        
+        Conflicts whose train has since been given the block are resolved.
+        """
+        new_conflicts = []
+        current_keys = set()
+        
+        for entry in self.block_reservations.get_block_conflicts():
+            key = (entry['block_id'], entry['train']['id'], entry['blocking_train']['id'])
+            if not _in_scope(key, train_ids):
+                continue
+            current_keys.add(key)
+            if key in self._block_conflict_ids:
+                continue
+            
+            conflict = self._resource_conflict(
+                'signal_conflict', f"Block {entry['block_id']}",
+                entry['train'], entry['start'], entry['blocking_train'], entry['start'],
+                entry['wait_minutes'])
+            conflict['block_id'] = entry['block_id']
+            
+            self._block_conflict_ids[key] = conflict['id']
+            self.register_conflict(conflict)
+            new_conflicts.append(conflict)
+        
+        for key in list(self._block_conflict_ids):
+            if key not in current_keys and _in_scope(key, train_ids):
+                self.resolve_conflict(self._block_conflict_ids.pop(key), 'block_released')
+        
+        return new_conflicts
+    
+    def _detect_knock_on_conflicts(self, train_ids: set = None) -> List[Dict]:
+        """Predict knock-on delays and raise conflicts for the dependencies causing them
+        
+        Train pairs already reported from the platform or block timelines are
+        skipped, and predictions that no longer hold are resolved.
+        """
+        self.delay_predictor.refresh()
+        prediction = self.delay_predictor.predict()
+        
+        reported = {(key[2], key[1]) for key in self._platform_conflict_ids}
+        reported |= {(key[2], key[1]) for key in self._block_conflict_ids}
+        new_conflicts = []
+        current_keys = set()
+        now = self.now()
+        
+        for entry in self.delay_predictor.knock_on_delays(prediction, self.knock_on_threshold):
+            pair = (entry['cause_train']['id'], entry['train']['id'])
+            if pair in reported:
+                continue
+            key = (entry['dependency'],) + pair
+            if not _in_scope(key, train_ids):
+                continue
+            current_keys.add(key)
+            # The rest are raised on later ticks if the prediction still holds
+            if key in self._knock_on_conflict_ids or len(new_conflicts) >= self.max_predicted_conflicts:
+                continue
+            
+            event_time = now + timedelta(minutes=max(0, entry['event_minutes']))
+            conflict = self._resource_conflict(
+                KNOCK_ON_CONFLICT_TYPES[entry['dependency']], entry['location'] or entry['train'].get('current_station'),
+                entry['train'], event_time, entry['cause_train'], event_time, int(round(entry['knock_on_delay'])))
+            conflict['predicted'] = True
+            conflict['dependency'] = entry['dependency']
+            conflict['predicted_delay'] = entry['predicted_delay']
+            
+            self._knock_on_conflict_ids[key] = conflict['id']
+            self.register_conflict(conflict)
+            new_conflicts.append(conflict)
+        
+        for key in list(self._knock_on_conflict_ids):
+            if key not in current_keys and _in_scope(key, train_ids):
+                self.resolve_conflict(self._knock_on_conflict_ids.pop(key), 'delay_absorbed')
+        
+        return new_conflicts
+    
+    def _resource_conflict(self, conflict_type: str, location: str, train: Dict, time: datetime,
+                           blocking_train: Dict, blocking_time: datetime, wait_minutes: int) -> Dict:
+        """Conflict between a train and the train occupying the platform or block it needs"""
+        priority_order = ['low', 'medium', 'high']
+        priority = max(train['priority'], blocking_train['priority'],
+                       key=lambda p: priority_order.index(p) if p in priority_order else 0)
+        return {
+            'id': str(uuid.uuid4()),
+            'type': conflict_type,
+            'priority': priority,
+            'location': location,
+            'estimated_time': time.isoformat(),
+            'train1': {
+                'id': blocking_train['id'],
+                'name': blocking_train['name'],
+                'type': blocking_train['type'],
+                'priority': blocking_train['priority'],
+                'current_delay': blocking_train['delay'],
+                'estimated_arrival': blocking_time.isoformat()
+            },
+            'train2': {
+                'id': train['id'],
+                'name': train['name'],
+                'type': train['type'],
+                'priority': train['priority'],
+                'current_delay': train['delay'],
+                'estimated_arrival': time.isoformat()
+            },
+            'conflict_severity': 'high' if wait_minutes > 15 else ('medium' if wait_minutes > 5 else 'low'),
+            'potential_delay': wait_minutes,
+            'status': 'active',
+            'detected_at': self.now().isoformat()
+        }
+    
+    def register_conflict(self, conflict: Dict):
+        """Track a conflict raised elsewhere (e.g. by a neighbouring zone worker)"""
+        if conflict['id'] in self.active_conflicts:
+            return
+        
+        self.active_conflicts[conflict['id']] = conflict
+        self.conflict_history.append({
+            'timestamp': self.now().isoformat(),
+            'action': 'conflict_detected',
+            'conflict': conflict
+        })
+    
+    def detect_cross_zone_conflicts(self, local_trains: List[Dict], incoming_trains: List[Dict],
+                                    station_names: Dict[str, str] = None) -> List[Dict]:
+        """Detect conflicts between local trains and trains about to enter from another zone
+        
+        Each incoming train carries the 'entry_station' where it crosses into this zone.
+        A conflict is raised when a local train currently occupies that station.
+        """
+        station_names = station_names or {}
+        trains_by_station = {}
+        for train in local_trains:
+            trains_by_station.setdefault(train.get('current_station'), []).append(train)
+        
+        known_pairs = {
+            frozenset((c.get('train1', {}).get('id'), c.get('train2', {}).get('id')))
+            for c in self.active_conflicts.values()
+            if c.get('cross_zone')
+        }
+        
+        new_conflicts = []
+        for incoming in incoming_trains:
+            entry_station = incoming.get('entry_station')
+            for local in trains_by_station.get(entry_station, []):
+                pair = frozenset((incoming['id'], local['id']))
+                if incoming['id'] == local['id'] or pair in known_pairs:
+                    continue
+                known_pairs.add(pair)
+                
+                minutes = 10 + max(incoming.get('delay', 0), local.get('delay', 0)) // 2
+                priority_order = ['low', 'medium', 'high']
+                priority = max(incoming.get('priority', 'low'), local.get('priority', 'low'),
+                               key=lambda p: priority_order.index(p) if p in priority_order else 0)
+                conflict = {
+                    'id': str(uuid.uuid4()),
+                    'type': 'train_crossing',
+                    'priority': priority,
+                    'location': station_names.get(entry_station, entry_station),
+                    'estimated_time': (self.now() + timedelta(minutes=minutes)).isoformat(),
+                    'train1': self._train_conflict_info(local, minutes),
+                    'train2': self._train_conflict_info(incoming, minutes + 2),
+                    'conflict_severity': 'high' if priority == 'high' else 'medium',
+                    'potential_delay': 5 + abs(incoming.get('delay', 0) - local.get('delay', 0)) // 2,
+                    'status': 'active',
+                    'cross_zone': True,
+                    'detected_at': self.now().isoformat()
+                }
+                
+                self.register_conflict(conflict)
+                new_conflicts.append(conflict)
+        
+        return new_conflicts
+    
+    def _train_conflict_info(self, train: Dict, minutes_to_arrival: int) -> Dict:
+        """Train summary embedded in conflict records"""
+        return {
+            'id': train.get('id'),
+            'name': train.get('name', 'Train'),
+            'type': train.get('type', 'Express'),
+            'priority': train.get('priority', 'medium'),
+            'current_delay': train.get('delay', 0),
+            'estimated_arrival': (self.now() + timedelta(minutes=minutes_to_arrival)).isoformat()
+        }
+    
     def _generate_random_train_info(self) -> Dict:
         """Generate random train information for conflict simulation"""
         train_names = [
@@ -136,13 +396,13 @@ class ConflictDetector:
             'type': train_type,
             'priority': 'high' if train_type == 'Express' else ('medium' if train_type == 'Passenger' else 'low'),
             'current_delay': random.randint(0, 20),
-            'estimated_arrival': (datetime.now() + timedelta(minutes=random.randint(5, 30))).isoformat()
+            'estimated_arrival': (self.now() + timedelta(minutes=random.randint(5, 30))).isoformat()
         }
     
     def get_active_conflicts(self) -> List[Dict]:
         """Get all currently active conflicts"""
         # Clean up old resolved conflicts
-        current_time = datetime.now()
+        current_time = self.now()
         conflicts_to_remove = []
         
         for conflict_id, conflict in self.active_conflicts.items():
@@ -169,7 +429,7 @@ class ConflictDetector:
         
         conflicts.sort(key=lambda x: (
             priority_order.get(x.get('priority', 'low'), 1),
-            x.get('estimated_time', datetime.now().isoformat())
+            x.get('estimated_time', self.now().isoformat())
         ), reverse=True)
         
         return conflicts
@@ -178,12 +438,12 @@ class ConflictDetector:
         """Mark a conflict as resolved"""
         if conflict_id in self.active_conflicts:
             self.active_conflicts[conflict_id]['status'] = 'resolved'
-            self.active_conflicts[conflict_id]['resolved_at'] = datetime.now().isoformat()
+            self.active_conflicts[conflict_id]['resolved_at'] = self.now().isoformat()
             self.active_conflicts[conflict_id]['resolution_method'] = resolution_method
             
             # Add to history
             self.conflict_history.append({
-                'timestamp': datetime.now().isoformat(),
+                'timestamp': self.now().isoformat(),
                 'action': 'conflict_resolved',
                 'conflict_id': conflict_id,
                 'resolution_method': resolution_method
@@ -219,7 +479,7 @@ class ConflictDetector:
             'total_conflicts_resolved': len([e for e in self.conflict_history if e.get('action') == 'conflict_resolved']),
             'hotspot_locations': sorted(location_frequency.items(), key=lambda x: x[1], reverse=True)[:5],
             'common_conflict_types': sorted(conflict_types_freq.items(), key=lambda x: x[1], reverse=True),
-            'analysis_timestamp': datetime.now().isoformat()
+            'analysis_timestamp': self.now().isoformat()
         }
     
     def get_conflict_statistics(self) -> Dict:
@@ -239,7 +499,7 @@ class ConflictDetector:
             'low_priority_conflicts': low_priority,
             'average_potential_delay': round(avg_potential_delay, 1),
             'most_common_locations': self._get_most_common_conflict_locations(),
-            'timestamp': datetime.now().isoformat()
+            'timestamp': self.now().isoformat()
         }
     
     def _get_most_common_conflict_locations(self) -> List[str]:
@@ -0,0 +1,194 @@
+"""
+RailOptiX Conflict Graph
+Decomposes conflicts into independent clusters and picks one option per conflict
+"""
+
+from typing import List, Dict, Any, Tuple
+
+PRIORITY_WEIGHTS = {'high': 3, 'medium': 2, 'low': 1}
+
+
+class UnionFind:
+    """Disjoint-set forest with path halving and union by size"""
+
+    def __init__(self):
+        self.parent = {}
+        self.size = {}
+
+    def find(self, item):
+        if item not in self.parent:
+            self.parent[item] = item
+            self.size[item] = 1
+            return item
+        while self.parent[item] != item:
+            self.parent[item] = self.parent[self.parent[item]]
+            item = self.parent[item]
+        return item
+
+    def union(self, a, b):
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a == root_b:
+            return root_a
+        if self.size[root_a] < self.size[root_b]:
+            root_a, root_b = root_b, root_a
+        self.parent[root_b] = root_a
+        self.size[root_a] += self.size[root_b]
+        return root_a
+
+
+def build_conflict_clusters(conflicts: List[Dict]) -> List[List[int]]:
+    """Group conflict indexes into clusters that share no trains
+
+    Trains are the nodes of the conflict graph and every conflict is an edge
+    between its two trains, so each connected component can be solved alone.
+    """
+    union_find = UnionFind()
+    edges = []
+
+    for index, conflict in enumerate(conflicts):
+        train1 = conflict.get('train1', {}).get('id')
+        train2 = conflict.get('train2', {}).get('id')
+        # Conflicts without train ids form their own single-edge component
+        node1 = ('train', train1) if train1 else ('conflict', index, 1)
+        node2 = ('train', train2) if train2 else ('conflict', index, 2)
+        union_find.union(node1, node2)
+        edges.append(node1)
+
+    clusters = {}
+    for index, node in enumerate(edges):
+        clusters.setdefault(union_find.find(node), []).append(index)
+    return list(clusters.values())
+
+
+def _train_weights(conflicts: List[Dict]) -> Dict[str, int]:
+    weights = {}
+    for conflict in conflicts:
+        for key in ('train1', 'train2'):
+            train = conflict.get(key, {})
+            if train.get('id'):
+                weights[train['id']] = PRIORITY_WEIGHTS.get(train.get('priority'), 2)
+    return weights
+
+
+def option_effects(option: Dict) -> Tuple[Dict[str, int], List[Tuple[str, int]]]:
+    """Holds per train and the (train, extra minutes) of each reroute for one option"""
+    holds = {}
+    reroute_minutes = []
+    for action in option.get('actions', []):
+        train_id = action.get('train_id')
+        if action.get('action') in ('hold', 'slight_hold'):
+            holds[train_id] = max(holds.get(train_id, 0), int(action.get('duration', 0)))
+        elif action.get('action') == 'reroute':
+            reroute_minutes.append((train_id, int(action.get('additional_time', 0))))
+    return holds, reroute_minutes
+
+
+def cluster_cost(conflicts: List[Dict], options: List[List[Dict]], choice: List[int]) -> int:
+    """Weighted delay of a joint choice of options for one cluster
+
+    Holds on the same train overlap (a train held for 5 minutes absorbs a
+    3 minute hold elsewhere), reroutes add their running time, and each
+    option's expected delay reduction is credited.
+    """
+    weights = _train_weights(conflicts)
+    train_holds = {}
+    cost = 0
+
+    for conflict_options, option_index in zip(options, choice):
+        if not conflict_options:
+            continue
+        option = conflict_options[option_index]
+        holds, reroutes = option_effects(option)
+        for train_id, minutes in holds.items():
+            train_holds[train_id] = max(train_holds.get(train_id, 0), minutes)
+        for train_id, minutes in reroutes:
+            cost += weights.get(train_id, 2) * minutes
+        cost -= int(option.get('expected_delay_reduction', 0))
+
+    cost += sum(weights.get(train_id, 2) * minutes for train_id, minutes in train_holds.items())
+    return cost
+
+
+def solve_cluster_greedy(conflicts: List[Dict], options: List[List[Dict]]) -> List[int]:
+    """Pick options conflict by conflict (highest priority first) by marginal cost"""
+    weights = _train_weights(conflicts)
+    train_holds = {}
+    choice = [0] * len(conflicts)
+
+    order = sorted(range(len(conflicts)),
+                   key=lambda i: PRIORITY_WEIGHTS.get(conflicts[i].get('priority'), 2), reverse=True)
+
+    for index in order:
+        if not options[index]:
+            continue
+        best_option, best_cost = 0, None
+        for option_index, option in enumerate(options[index]):
+            holds, reroutes = option_effects(option)
+            marginal = sum(weights.get(t, 2) * max(0, m - train_holds.get(t, 0)) for t, m in holds.items())
+            marginal += sum(weights.get(t, 2) * m for t, m in reroutes)
+            marginal -= int(option.get('expected_delay_reduction', 0))
+            if best_cost is None or marginal < best_cost:
+                best_option, best_cost = option_index, marginal
+
+        choice[index] = best_option
+        holds, _ = option_effects(options[index][best_option])
+        for train_id, minutes in holds.items():
+            train_holds[train_id] = max(train_holds.get(train_id, 0), minutes)
+
+    return choice
+
+
+def solve_cluster_exact(conflicts: List[Dict], options: List[List[Dict]], time_limit: float = 1.0) -> List[int]:
+    """Jointly optimal option choice for a cluster using the OR-Tools CP-SAT solver"""
+    try:
+        from ortools.sat.python import cp_model  # Heavy import, only needed for large clusters
+    except ImportError:
+        return solve_cluster_greedy(conflicts, options)
+
+    weights = _train_weights(conflicts)
+    model = cp_model.CpModel()
+    selected = {}
+    hold_requirements = {}
+    objective = []
+
+    for ci, conflict_options in enumerate(options):
+        if not conflict_options:
+            continue
+        for oi, option in enumerate(conflict_options):
+            var = model.NewBoolVar(f"x_{ci}_{oi}")
+            selected[ci, oi] = var
+            holds, reroutes = option_effects(option)
+            for train_id, minutes in holds.items():
+                hold_requirements.setdefault(train_id, []).append((minutes, var))
+            reroute_cost = sum(weights.get(t, 2) * m for t, m in reroutes)
+            objective.append((reroute_cost - int(option.get('expected_delay_reduction', 0))) * var)
+        model.AddExactlyOne(selected[ci, oi] for oi in range(len(conflict_options)))
+
+    # Each train's hold is the longest hold any chosen option asks of it
+    for train_id, requirements in hold_requirements.items():
+        hold = model.NewIntVar(0, max(minutes for minutes, _ in requirements), f"hold_{train_id}")
+        for minutes, var in requirements:
+            model.Add(hold >= minutes).OnlyEnforceIf(var)
+        objective.append(weights.get(train_id, 2) * hold)
+
+    model.Minimize(sum(objective))
+
+    solver = cp_model.CpSolver()
+    solver.parameters.max_time_in_seconds = time_limit
+    solver.parameters.num_workers = 1  # Clusters already run concurrently
+    status = solver.Solve(model)
+
+    if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        return solve_cluster_greedy(conflicts, options)
+
+    choice = [
+        next((oi for oi in range(len(conflict_options)) if solver.Value(selected[ci, oi])), 0)
+        if conflict_options else 0
+        for ci, conflict_options in enumerate(options)
+    ]
+    if status == cp_model.FEASIBLE:
+        # Stopped by the time limit: keep the greedy choice if it is cheaper
+        greedy = solve_cluster_greedy(conflicts, options)
+        if cluster_cost(conflicts, options, greedy) < cluster_cost(conflicts, options, choice):
+            return greedy
+    return choice
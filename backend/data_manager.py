@@ -3,17 +3,34 @@ RailOptiX Data Manager
 Handles train data, positions, schedules, and network information
 """
 
+import gc
 import random
 import uuid
 from datetime import datetime, timedelta
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Callable
+
+from block_reservations import BlockReservationTable, DEPARTURE_MINUTES, derive_sections, next_stops, running_minutes
+from conflict_graph import PRIORITY_WEIGHTS
+from platform_allocator import PlatformAllocator
+from timetable_store import CompiledNetwork
+
+# Train fields that change its route or schedule (as opposed to delay, position and status)
+TIMETABLE_FIELDS = {'current_station', 'from_station', 'to_station', 'route', 'speed', 'type',
+                    'scheduled_arrival', 'next_service'}
 
 class DataManager:
     """Manages all train and network data for the optimization system"""
     
-    def __init__(self):
+    def __init__(self, now: Callable[[], datetime] = datetime.now):
+        self.now = now  # Current time (a virtual clock in replays)
         self.trains = {}
         self.network_layout = {}
+        self.platform_allocator = PlatformAllocator()
+        self.block_reservations = None
+        self._block_reserved_until = {}  # train_id -> end slot of its current block reservation
+        self.compiled_network = None
+        # Bumped whenever trains are added or removed or a route/schedule changes
+        self.timetable_version = 0
         self.initialize_mock_data()
         
     def initialize_mock_data(self):
@@ -104,9 +121,9 @@ class DataManager:
                     'lng': current_station_data['lng'] + random.uniform(-0.01, 0.01)
                 },
                 'status': self._get_status_from_delay(train_data['delay']),
-                'last_updated': datetime.now().isoformat(),
-                'scheduled_arrival': (datetime.now() + timedelta(hours=random.randint(1, 8))).isoformat(),
-                'platform': random.randint(1, 6) if train_data['type'] != 'Freight' else None,
+                'last_updated': self.now().isoformat(),
+                'scheduled_arrival': (self.now() + timedelta(hours=random.randint(1, 8))).isoformat(),
+                'platform': None,
                 'consist': self._generate_consist(train_data['type']),
                 'occupancy': random.randint(60, 95) if train_data['type'] != 'Freight' else None
             }
@@ -114,6 +131,83 @@ class DataManager:
         # Store station data
         self.network_layout['stations'] = {station['id']: station for station in stations}
         
+        self._allocate_platforms()
+        self._build_block_reservations()
+        
+    def _allocate_platforms(self):
+        """Assign arrival platforms for all trains from the station platform layouts"""
+        for station in self.network_layout.get('stations', {}).values():
+            self.platform_allocator.set_station(station)
+        
+        assignments = self.platform_allocator.allocate_all(list(self.trains.values()))
+        for train_id, train in self.trains.items():
+            train['platform'] = assignments.get(train_id)
+        
+    def _reschedule_platform(self, train: Dict):
+        """Re-place one train's arrival platform after a delay or schedule change"""
+        train['platform'] = self.platform_allocator.reschedule(train)
+        self._sync_reallocated_platforms()
+    
+    def _sync_reallocated_platforms(self):
+        """Copy platforms given to waiting trains when another train freed a slot"""
+        for train_id in self.platform_allocator.pop_reallocated():
+            if train_id in self.trains:
+                self.trains[train_id]['platform'] = self.platform_allocator.get_platform(train_id)
+    
+    def _build_block_reservations(self):
+        """Split the network into signalling blocks and reserve each train's next block"""
+        sections = self.network_layout.get('sections') or derive_sections(
+            self.network_layout.get('stations', {}), list(self.trains.values()))
+        self.block_reservations = BlockReservationTable(sections, start_time=self.now())
+        self._block_reserved_until = {}
+        self._reserve_next_blocks(list(self.trains.values()))
+    
+    def _reserve_next_blocks(self, trains: List[Dict]):
+        """Request the first block towards the next stop, highest priority trains first"""
+        table = self.block_reservations
+        start = table.to_slot(self.now()) + table.minutes_to_slots(DEPARTURE_MINUTES).item()
+        waiting = [train for train in trains if train['id'] not in self._block_reserved_until]
+        waiting.sort(key=lambda t: (-PRIORITY_WEIGHTS.get(t.get('priority'), 2), -(t.get('delay') or 0)))
+        
+        requests = []
+        minutes = []
+        for train in waiting:
+            stops = next_stops(train)
+            rows = table.route_blocks(stops[0], stops[1]) if len(stops) > 1 else []
+            if not rows:
+                continue
+            minutes.append(running_minutes(table.block_lengths[rows[0]], train.get('speed')))
+            requests.append({
+                'train_id': train['id'],
+                'row': rows[0],
+                'start': start,
+                'train': {
+                    'id': train['id'],
+                    'name': train.get('name', 'Train'),
+                    'type': train.get('type'),
+                    'priority': train.get('priority', 'medium'),
+                    'delay': train.get('delay', 0)
+                }
+            })
+        
+        # One vectorised conversion for the whole batch
+        for request, running in zip(requests, table.minutes_to_slots(minutes).tolist()):
+            request['end'] = start + running
+        
+        accepted = table.request(requests)
+        for request, ok in zip(requests, accepted):
+            if ok:
+                self._block_reserved_until[request['train_id']] = request['end']
+    
+    def _advance_block_reservations(self):
+        """Roll the block timeline to now and re-request blocks for trains whose reservation ran out"""
+        shift = self.block_reservations.advance(self.now())
+        if shift:
+            self._block_reserved_until = {
+                train_id: end - shift for train_id, end in self._block_reserved_until.items() if end > shift
+            }
+        self._reserve_next_blocks(list(self.trains.values()))
+    
     def _get_status_from_delay(self, delay: int) -> str:
         """Determine train status based on delay"""
         if delay <= 0:
@@ -143,6 +237,36 @@ class DataManager:
                 'weight': f"{random.randint(2500, 4500)} tons"
             }
     
+    def load_network(self, stations: List[Dict], trains: List[Dict], sections: List[Dict] = None):
+        """Replace the demo data with an imported or generated network"""
+        self.network_layout = {
+            'stations': {station['id']: station for station in stations},
+            'sections': sections or []
+        }
+        self.trains = {train['id']: train for train in trains}
+        self.timetable_version += 1
+        self.platform_allocator = PlatformAllocator()
+        self._allocate_platforms()
+        self._build_block_reservations()
+    
+    def load_compiled(self, path: str) -> CompiledNetwork:
+        """Load a network compiled with timetable_store (memory-mapped, shared across processes)
+
+        Every train is decoded here, in one pass, because platform and block
+        allocation reads every one of them.
+        """
+        network = CompiledNetwork(path)
+        # Creating this many objects triggers repeated full collections that find no garbage
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            self.load_network(network.station_dicts(), network.train_dicts(), network.section_dicts())
+        finally:
+            if gc_enabled:
+                gc.enable()
+        self.compiled_network = network
+        return network
+    
     def get_active_trains(self) -> List[Dict]:
         """Get all active trains with current status"""
         return list(self.trains.values())
@@ -165,14 +289,21 @@ class DataManager:
             new_lng = current_lng + random.uniform(-movement_factor, movement_factor)
             
             self.trains[train_id]['position'] = {'lat': new_lat, 'lng': new_lng}
-            self.trains[train_id]['last_updated'] = datetime.now().isoformat()
+            self.trains[train_id]['last_updated'] = self.now().isoformat()
             
             # Occasionally update delay (simulate real-time changes)
             if random.random() < 0.1:  # 10% chance
                 delay_change = random.randint(-2, 3)
                 new_delay = max(0, train_data['delay'] + delay_change)
+                delay_changed = new_delay != train_data['delay']
                 self.trains[train_id]['delay'] = new_delay
                 self.trains[train_id]['status'] = self._get_status_from_delay(new_delay)
+                
+                # Delay moves the arrival window, so re-place only this train
+                if delay_changed:
+                    self._reschedule_platform(train_data)
+        
+        self._advance_block_reservations()
     
     def get_trains_near_location(self, lat: float, lng: float, radius: float = 0.1) -> List[Dict]:
         """Get trains within a certain radius of a location"""
@@ -204,7 +335,7 @@ class DataManager:
             'delayed_trains': delayed_trains,
             'avg_delay_minutes': round(avg_delay, 1),
             'network_efficiency': round((on_time_trains / total_trains) * 100, 1) if total_trains > 0 else 0,
-            'last_updated': datetime.now().isoformat()
+            'last_updated': self.now().isoformat()
         }
     
     def add_train(self, train_data: Dict) -> str:
@@ -213,21 +344,42 @@ class DataManager:
         self.trains[train_id] = {
             **train_data,
             'id': train_id,
-            'last_updated': datetime.now().isoformat()
+            'last_updated': self.now().isoformat()
         }
+        self.timetable_version += 1
+        self._reschedule_platform(self.trains[train_id])
+        self._reserve_next_blocks([self.trains[train_id]])
         return train_id
     
     def remove_train(self, train_id: str) -> bool:
         """Remove a train from the system"""
         if train_id in self.trains:
             del self.trains[train_id]
+            self.timetable_version += 1
+            self.platform_allocator.release(train_id)
+            self._sync_reallocated_platforms()
+            self.block_reservations.release([train_id])
+            self._block_reserved_until.pop(train_id, None)
             return True
         return False
     
+    def apply_train_updates(self, updates: Dict[str, Dict]):
+        """Apply a batch of recorded updates (train_id -> fields) in place of one simulated tick"""
+        for train_id, fields in updates.items():
+            if 'delay' in fields and 'status' not in fields:
+                fields = {**fields, 'status': self._get_status_from_delay(fields['delay'])}
+            self.update_train_status(train_id, fields)
+        
+        self._advance_block_reservations()
+    
     def update_train_status(self, train_id: str, updates: Dict) -> bool:
         """Update specific train information"""
         if train_id in self.trains:
             self.trains[train_id].update(updates)
-            self.trains[train_id]['last_updated'] = datetime.now().isoformat()
+            self.trains[train_id]['last_updated'] = self.now().isoformat()
+            if TIMETABLE_FIELDS & set(updates):
+                self.timetable_version += 1
+            if {'delay', 'scheduled_arrival', 'to_station'} & set(updates):
+                self._reschedule_platform(self.trains[train_id])
             return True
         return False
@@ -0,0 +1,470 @@
+"""
+RailOptiX Delay Propagation
+Predicts knock-on delays by pushing current delays through a sparse train dependency graph
+"""
+
+import threading
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Callable
+
+import numpy as np
+
+from block_reservations import next_stops, running_minutes
+from platform_allocator import _parse_time
+
+# Dependency kinds (edge types of the dependency matrix)
+RUN, HEADWAY, PLATFORM, RAKE = 0, 1, 2, 3
+DEPENDENCY_NAMES = {RUN: 'run', HEADWAY: 'headway', PLATFORM: 'platform', RAKE: 'rake'}
+
+# Minimum separation between two trains entering the same block
+MIN_HEADWAY_MINUTES = 4
+# Dwell at intermediate stops, by train type
+STOP_DWELL_MINUTES = {'Express': 2, 'Passenger': 3, 'Freight': 0}
+# Minimum time between a rake arriving and leaving again as its next service
+TURNAROUND_MINUTES = {'Express': 45, 'Passenger': 30, 'Freight': 90}
+
+
+class DependencyMatrix:
+    """Sparse event-to-event dependency matrix stored by level
+
+    Every train has a departure event (entering its next block) and an
+    arrival event (at its destination). Entry (src, dst) holds the slack in
+    minutes: dst is delayed by max(0, delay[src] - slack). Every dependency
+    points from an earlier to a later scheduled event, so the graph is a DAG;
+    edges are sorted by the longest-path level of their target, which lets a
+    prediction visit each level once with a single vectorized update.
+    """
+
+    def __init__(self, num_events: int, src: np.ndarray, dst: np.ndarray, slack: np.ndarray,
+                 kind: np.ndarray, label: np.ndarray):
+        self.num_events = num_events
+        level = self._levels(num_events, src, dst)
+        order = np.argsort(level[dst], kind='stable')
+        self.src = src[order]
+        self.dst = dst[order]
+        self.slack = slack[order]
+        self.kind = kind[order]
+        self.label = label[order]
+        self.num_levels = int(level.max()) + 1 if num_events else 0
+        # level_ptr[l]:level_ptr[l + 1] are the edges into events of level l
+        self.level_ptr = np.searchsorted(level[self.dst], np.arange(self.num_levels + 1))
+
+    @staticmethod
+    def _levels(num_events: int, src: np.ndarray, dst: np.ndarray) -> np.ndarray:
+        """Longest-path level of every event, expanding only from events whose level changed"""
+        level = np.zeros(num_events, dtype=np.int64)
+        if not len(src):
+            return level
+
+        # CSR by source, so the out-edges of a frontier can be gathered at once
+        order = np.argsort(src, kind='stable')
+        out_dst = dst[order]
+        indptr = np.concatenate(([0], np.cumsum(np.bincount(src, minlength=num_events))))
+
+        frontier = np.unique(src)
+        while len(frontier):
+            counts = indptr[frontier + 1] - indptr[frontier]
+            edge_index = np.repeat(indptr[frontier] - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+            sources = np.repeat(frontier, counts)
+            targets = out_dst[edge_index]
+            before = level[targets]
+            np.maximum.at(level, targets, level[sources] + 1)
+            frontier = np.unique(targets[level[targets] > before])
+        return level
+
+    def propagate(self, own_delay: np.ndarray) -> np.ndarray:
+        """Event delays after propagating `own_delay` along every dependency, one level at a time"""
+        delay = own_delay.astype(np.float64).copy()
+        for level in range(1, self.num_levels):
+            edges = slice(self.level_ptr[level], self.level_ptr[level + 1])
+            np.maximum.at(delay, self.dst[edges], delay[self.src[edges]] - self.slack[edges])
+        return delay
+
+    def causes(self, delay: np.ndarray, own_delay: np.ndarray) -> np.ndarray:
+        """Index of the edge that set each event's delay (-1 where the event's own delay dominates)"""
+        cause = np.full(self.num_events, -1, dtype=np.int64)
+        contribution = delay[self.src] - self.slack
+        binding = np.flatnonzero((contribution >= delay[self.dst] - 1e-9) & (delay[self.dst] > own_delay[self.dst]))
+        events, first = np.unique(self.dst[binding], return_index=True)
+        cause[events] = binding[first]
+        return cause
+
+
+class PropagationSnapshot:
+    """Matrix and train state of one refresh, published as a single reference"""
+
+    def __init__(self, matrix: DependencyMatrix, trains: List[Dict], train_ids: List[str],
+                 train_index: Dict[str, int], own: np.ndarray, event_time: np.ndarray,
+                 platform_keys: List[tuple], built_at: datetime):
+        self.matrix = matrix
+        self.trains = trains
+        self.train_ids = train_ids
+        self.train_index = train_index
+        self.own = own
+        self.event_time = event_time
+        self.platform_keys = platform_keys
+        self.built_at = built_at
+
+
+class DelayPropagationModel:
+    """Builds the dependency matrix from the live network and predicts knock-on delays
+
+    Dependencies come from three sources: headway followers on the same
+    block (from the block reservation table), successors on the same arrival
+    platform (from the platform allocator) and rake links, where a train's
+    rake forms a later departure from its destination.
+    """
+
+    def __init__(self, data_manager, horizon_minutes: int = 240, now: Callable[[], datetime] = None):
+        self.data_manager = data_manager
+        self.horizon_minutes = horizon_minutes
+        self.now = now or data_manager.now  # Current time (a virtual clock in replays)
+        self.snapshot = None
+        self._refresh_lock = threading.Lock()
+        # Both caches are valid for one block table only (see _build_timetable)
+        self._cache_table = None
+        self._hop_cache = {}  # (from_station, to_station) -> (length_km, first block row, first block km)
+        self._schedule_cache = {}  # train_id -> (schedule key, schedule)
+
+        # Run, headway and rake dependencies, rebuilt only when the timetable changes
+        self._timetable = None
+        self._timetable_version = None
+        # Platform successor edges per timeline, updated only for timelines that changed
+        self._allocator = None
+        self._platform_revision = 0
+        self._platform_keys = []
+        self._platform_key_index = {}
+        self._platform_edges = {}  # timeline index -> rows of (leader, follower, gap minutes, timeline index)
+
+    @property
+    def matrix(self) -> Optional[DependencyMatrix]:
+        snapshot = self.snapshot
+        return snapshot.matrix if snapshot is not None else None
+
+    @property
+    def train_ids(self) -> List[str]:
+        snapshot = self.snapshot
+        return snapshot.train_ids if snapshot is not None else []
+
+    @property
+    def built_at(self) -> Optional[datetime]:
+        snapshot = self.snapshot
+        return snapshot.built_at if snapshot is not None else None
+
+    # --- building -----------------------------------------------------------
+
+    def refresh(self) -> DependencyMatrix:
+        """Bring the dependency matrix up to date with the current trains and timelines
+
+        Run, headway and rake dependencies are rebuilt only when the timetable
+        changed, platform dependencies only for the timelines that changed.
+        Everything is assembled into a new snapshot that replaces the old one
+        in a single assignment, so concurrent predictions never mix the two.
+        """
+        with self._refresh_lock:
+            now = self.now()
+            version = self.data_manager.timetable_version
+            rebuilt = self._timetable is None or version != self._timetable_version
+            if rebuilt:
+                self._timetable = self._build_timetable(now)
+                self._timetable_version = version
+            timetable = self._timetable
+            self._update_platform_edges(timetable['position'], rebuilt)
+
+            trains = timetable['trains']
+            count = len(trains)
+            own = np.fromiter(((train.get('delay') or 0) for train in trains), dtype=np.float64, count=count)
+
+            # Platform: the next train on the same arrival platform
+            platform_edges = (np.concatenate([self._platform_edges[key] for key in sorted(self._platform_edges)])
+                              if self._platform_edges else np.zeros((0, 4)))
+            platform_l = platform_edges[:, 0].astype(np.int64)
+            platform_f = platform_edges[:, 1].astype(np.int64)
+            # Timeline entries include each train's current delay; slack is between scheduled times
+            platform_slack = np.maximum(0, platform_edges[:, 2] - own[platform_f] + own[platform_l])
+
+            # Labels locate each dependency: block row, platform timeline index or follower train index
+            run, rake = timetable['run'], timetable['rake']
+            src = np.concatenate((run[0], count + platform_l, rake[0]))
+            dst = np.concatenate((run[1], count + platform_f, rake[1]))
+            slack = np.concatenate((run[2], platform_slack, rake[2]))
+            kind = np.concatenate((run[3], np.full(len(platform_l), PLATFORM, dtype=np.int8), rake[3]))
+            label = np.concatenate((run[4], platform_edges[:, 3].astype(np.int64), rake[4]))
+
+            # Only predict events inside the horizon, and keep every edge pointing forward in
+            # scheduled time (platform order follows delayed arrivals and can disagree)
+            event_time = timetable['event_time'] - (now - timetable['anchor']).total_seconds() / 60
+            keep = (event_time[dst] <= self.horizon_minutes) & (
+                (event_time[src] < event_time[dst]) | ((event_time[src] == event_time[dst]) & (src < dst)))
+            matrix = DependencyMatrix(2 * count, src[keep], dst[keep], slack[keep], kind[keep], label[keep])
+
+            self.snapshot = PropagationSnapshot(matrix, trains, timetable['train_ids'], timetable['position'],
+                                                np.concatenate((own, own)), event_time, self._platform_keys, now)
+            return matrix
+
+    def _build_timetable(self, now: datetime) -> Dict[str, Any]:
+        """Scheduled event times (minutes after `now`) and the run, headway and rake dependencies"""
+        trains = self.data_manager.get_active_trains()
+        table = self.data_manager.block_reservations
+        count = len(trains)
+        if table is not self._cache_table:
+            # A new block table (e.g. a reloaded network) can change every hop
+            self._cache_table = table
+            self._hop_cache = {}
+            self._schedule_cache = {}
+        else:
+            # Forget trains that left the network
+            current = self.data_manager.trains
+            for train_id in [train_id for train_id in self._schedule_cache if train_id not in current]:
+                del self._schedule_cache[train_id]
+
+        # Event i is train i's departure, event count + i its arrival
+        arrival = np.full(count, np.nan)
+        departure = np.full(count, np.nan)
+        first_block = np.full(count, -1, dtype=np.int64)
+        headway = np.full(count, float(MIN_HEADWAY_MINUTES))
+        for index, train in enumerate(trains):
+            schedule = self._schedule(train, table)
+            if schedule is None:
+                continue
+            scheduled, run_minutes, block_row, block_minutes = schedule
+            arrival[index] = (scheduled - now).total_seconds() / 60
+            departure[index] = arrival[index] - run_minutes
+            first_block[index] = block_row
+            headway[index] = max(MIN_HEADWAY_MINUTES, block_minutes)
+        timed = np.flatnonzero(~np.isnan(arrival))
+
+        # Running: a late departure arrives equally late
+        run_src, run_dst = timed, timed + count
+
+        # Headway: consecutive departures into the same block, ordered by scheduled time
+        on_block = timed[first_block[timed] >= 0]
+        order = on_block[np.lexsort((on_block, departure[on_block], first_block[on_block]))]
+        same = first_block[order[1:]] == first_block[order[:-1]]
+        leaders, followers = order[:-1][same], order[1:][same]
+        headway_slack = np.maximum(0, departure[followers] - departure[leaders] - headway[leaders])
+
+        # Rake links: an arriving rake forms the next departure of the same type from its destination
+        rake = np.array(self._rake_links(trains, arrival, departure), dtype=np.int64).reshape(-1, 2)
+        turnaround = np.array([TURNAROUND_MINUTES.get(trains[leader].get('type'), 45) for leader in rake[:, 0]])
+        rake_slack = np.maximum(0, departure[rake[:, 1]] - arrival[rake[:, 0]] - turnaround)
+
+        train_ids = [train['id'] for train in trains]
+        return {
+            'trains': trains,
+            'train_ids': train_ids,
+            'position': {train_id: index for index, train_id in enumerate(train_ids)},
+            'anchor': now,
+            'event_time': np.concatenate((departure, arrival)),
+            # (src, dst, slack, kind, label) of the run and headway edges, and of the rake edges
+            'run': (np.concatenate((run_src, leaders)), np.concatenate((run_dst, followers)),
+                    np.concatenate((np.zeros(len(run_src)), headway_slack)),
+                    np.concatenate((np.full(len(run_src), RUN), np.full(len(leaders), HEADWAY))).astype(np.int8),
+                    np.concatenate((np.full(len(run_src), -1), first_block[leaders]))),
+            'rake': (count + rake[:, 0], rake[:, 1], rake_slack,
+                     np.full(len(rake), RAKE, dtype=np.int8), rake[:, 1])
+        }
+
+    def _update_platform_edges(self, position: Dict[str, int], rebuilt: bool):
+        """Recompute successor edges of the platform timelines changed since the last refresh"""
+        allocator = self.data_manager.platform_allocator
+        revision = allocator.revision
+        changed = None
+        if not rebuilt and allocator is self._allocator:
+            changed = allocator.changed_since(self._platform_revision)
+        if changed is None:
+            # Published snapshots keep the old key list, so start a new one
+            self._allocator = allocator
+            self._platform_keys = []
+            self._platform_key_index = {}
+            self._platform_edges = {}
+            changed = list(allocator.timelines)
+
+        for key in changed:
+            key_index = self._platform_key_index.get(key)
+            if key_index is None:
+                key_index = self._platform_key_index[key] = len(self._platform_keys)
+                self._platform_keys.append(key)
+            timeline = allocator.timelines.get(key, [])
+            edges = [(position[leader], position[follower], (start_f - end_l).total_seconds() / 60, key_index)
+                     for (_, end_l, leader), (start_f, _, follower) in zip(timeline, timeline[1:])
+                     if leader in position and follower in position]
+            if edges:
+                self._platform_edges[key_index] = np.array(edges, dtype=np.float64)
+            else:
+                self._platform_edges.pop(key_index, None)
+        self._platform_revision = revision
+
+    def _schedule(self, train: Dict, table) -> Optional[tuple]:
+        """Scheduled arrival, remaining running minutes, first block row and its running minutes
+
+        Cached per train until its route position, speed or schedule changes.
+        """
+        key = (train.get('current_station'), train.get('to_station'), train.get('speed'),
+               train.get('scheduled_arrival'))
+        cached = self._schedule_cache.get(train['id'])
+        if cached is not None and cached[0] == key:
+            return cached[1]
+
+        scheduled = _parse_time(train.get('scheduled_arrival'))
+        schedule = None if scheduled is None else (scheduled, *self._remaining_run(train, table))
+        self._schedule_cache[train['id']] = (key, schedule)
+        return schedule
+
+    def _location(self, snapshot: PropagationSnapshot, edge: int) -> Optional[str]:
+        kind, label = int(snapshot.matrix.kind[edge]), int(snapshot.matrix.label[edge])
+        if kind == HEADWAY:
+            return f"Block {self.data_manager.block_reservations.block_id(label)}"
+        if kind == PLATFORM:
+            station_id, platform = snapshot.platform_keys[label]
+            station_name = self.data_manager.platform_allocator.station_names.get(station_id, station_id)
+            return f"{station_name} Platform {platform}"
+        if kind == RAKE:
+            station_id = snapshot.trains[label].get('current_station')
+            station = self.data_manager.network_layout.get('stations', {}).get(station_id, {})
+            return f"{station.get('name', station_id)} (rake link)"
+        return None
+
+    def _remaining_run(self, train: Dict, table) -> tuple:
+        """Scheduled minutes to the destination, first block row and its running time"""
+        stops = next_stops(train)
+        minutes = 0.0
+        block_row, block_minutes = -1, 0.0
+        for hop, (a, b) in enumerate(zip(stops, stops[1:])):
+            key = (a, b)
+            if key not in self._hop_cache:
+                rows = table.route_blocks(a, b) if table is not None else []
+                self._hop_cache[key] = (float(table.block_lengths[rows].sum()) if rows else 0.0,
+                                        rows[0] if rows else -1,
+                                        float(table.block_lengths[rows[0]]) if rows else 0.0)
+            length, first_row, first_length = self._hop_cache[key]
+            minutes += running_minutes(length, train.get('speed'))
+            if hop:
+                minutes += STOP_DWELL_MINUTES.get(train.get('type'), 2)
+            else:
+                block_row = first_row
+                block_minutes = running_minutes(first_length, train.get('speed'))
+        return minutes, block_row, block_minutes
+
+    def _rake_links(self, trains: List[Dict], arrival: np.ndarray, departure: np.ndarray) -> List[tuple]:
+        """Pair arriving trains with the earliest feasible same-type departure from their origin station"""
+        position = {train['id']: index for index, train in enumerate(trains)}
+        links = []
+        starting = {}
+        for index, train in enumerate(trains):
+            explicit = train.get('next_service')
+            if explicit in position:
+                links.append((index, position[explicit]))
+            elif train.get('current_station') == train.get('from_station') and not np.isnan(departure[index]):
+                starting.setdefault((train.get('current_station'), train.get('type')), []).append(index)
+
+        linked = {follower for _, follower in links}
+        for waiting in starting.values():
+            waiting.sort(key=lambda i: departure[i])
+        arriving = sorted((index for index, train in enumerate(trains)
+                           if (train.get('to_station'), train.get('type')) in starting
+                           and not train.get('next_service') and not np.isnan(arrival[index])),
+                          key=lambda i: arrival[i])
+        for leader in arriving:
+            train = trains[leader]
+            ready = arrival[leader] + TURNAROUND_MINUTES.get(train.get('type'), 45)
+            for follower in starting[train['to_station'], train['type']]:
+                if follower not in linked and follower != leader and departure[follower] >= ready:
+                    links.append((leader, follower))
+                    linked.add(follower)
+                    break
+        return links
+
+    # --- prediction ---------------------------------------------------------
+
+    def predict(self, extra_delays: Dict[str, float] = None) -> Dict[str, Any]:
+        """Propagate current delays (plus optional what-if delays per train) through the network"""
+        snapshot = self.snapshot
+        if snapshot is None:
+            self.refresh()
+            snapshot = self.snapshot
+        matrix = snapshot.matrix
+        count = len(snapshot.train_ids)
+        own = snapshot.own.copy()
+        for train_id, minutes in (extra_delays or {}).items():
+            index = snapshot.train_index.get(train_id)
+            if index is not None:
+                own[index] += minutes
+                own[count + index] += minutes
+
+        delay = matrix.propagate(own)
+        cause = matrix.causes(delay, own)
+        knock_on = delay[count:] - own[count:]
+
+        return {
+            'delay': delay,
+            'own_delay': own,
+            'cause': cause,
+            'knock_on': knock_on,
+            'total_knock_on': round(float(knock_on.sum()), 1),
+            'affected_trains': int((knock_on > 0).sum()),
+            'max_knock_on': round(float(knock_on.max()), 1) if count else 0,
+            'avg_arrival_delay': round(float(delay[count:].mean()), 1) if count else 0,
+            'dependencies': len(matrix.src),
+            'levels': matrix.num_levels,
+            'snapshot': snapshot
+        }
+
+    def knock_on_delays(self, prediction: Dict, minimum: float = 0) -> List[Dict]:
+        """Trains whose predicted arrival delay grows by at least `minimum` minutes, worst first"""
+        snapshot = prediction['snapshot']
+        count = len(snapshot.train_ids)
+        knock_on = prediction['knock_on']
+        affected = np.flatnonzero(knock_on >= max(minimum, 1e-9))
+        affected = affected[np.argsort(-knock_on[affected], kind='stable')]
+
+        results = []
+        for index in affected:
+            source = self._root_dependency(prediction, count + index)
+            if source is None:
+                continue
+            edge, cause_event = source
+            cause_index = cause_event % count
+            results.append({
+                'train': snapshot.trains[index],
+                'cause_train': snapshot.trains[cause_index],
+                'dependency': DEPENDENCY_NAMES[int(snapshot.matrix.kind[edge])],
+                'location': self._location(snapshot, edge),
+                'knock_on_delay': round(float(knock_on[index]), 1),
+                'predicted_delay': round(float(prediction['delay'][count + index]), 1),
+                'event_minutes': float(snapshot.event_time[snapshot.matrix.dst[edge]])
+            })
+        return results
+
+    def _root_dependency(self, prediction: Dict, event: int) -> Optional[tuple]:
+        """Follow binding edges back past the train's own running edge to the train that caused it"""
+        cause = prediction['cause']
+        matrix = prediction['snapshot'].matrix
+        while cause[event] >= 0:
+            edge = cause[event]
+            if matrix.kind[edge] != RUN:
+                return edge, int(matrix.src[edge])
+            event = int(matrix.src[edge])
+        return None
+
+    def summary(self, prediction: Dict, top: int = 5) -> Dict[str, Any]:
+        """JSON-friendly overview of a prediction"""
+        return {
+            'total_knock_on': prediction['total_knock_on'],
+            'affected_trains': prediction['affected_trains'],
+            'max_knock_on': prediction['max_knock_on'],
+            'avg_arrival_delay': prediction['avg_arrival_delay'],
+            'dependencies': prediction['dependencies'],
+            'most_affected': [
+                {
+                    'train_id': entry['train']['id'],
+                    'name': entry['train'].get('name', 'Train'),
+                    'knock_on_delay': entry['knock_on_delay'],
+                    'predicted_delay': entry['predicted_delay'],
+                    'caused_by': entry['cause_train']['id'],
+                    'dependency': entry['dependency']
+                }
+                for entry in self.knock_on_delays(prediction)[:top]
+            ]
+        }
+
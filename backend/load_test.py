@@ -0,0 +1,567 @@
+#!/usr/bin/env python3
+"""
+RailOptiX WebSocket Load Test
+Opens many local Socket.IO dashboard clients against the backend, drives
+request_update / REST traffic at fixed rates and reports fan-out latency,
+dropped events and server CPU. Runs fully offline on one Linux box.
+
+Usage:
+    python load_test.py --clients 2000 --processes 4 --duration 60
+    python load_test.py --url http://127.0.0.1:5000 --server-pid 1234 --clients 500
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import random
+import resource
+import subprocess
+import sys
+import time
+from datetime import datetime
+from typing import List, Dict, Any, Optional
+
+import aiohttp
+import socketio
+
+BROADCAST_EVENTS = ('conflict_detected', 'suggestion_implemented', 'suggestions_implemented', 'kpi_update')
+# Broadcasts caused by the load test's own accepts, which every client must receive
+ACCEPT_EVENTS = ('suggestion_implemented', 'suggestions_implemented')
+
+
+def _percentiles(samples: List[float]) -> Dict[str, Any]:
+    """Summarize latency samples (milliseconds)"""
+    if not samples:
+        return {'count': 0}
+    ordered = sorted(samples)
+
+    def pick(p: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(p * (len(ordered) - 1)))], 3)
+
+    return {
+        'count': len(ordered),
+        'p50_ms': pick(0.50),
+        'p90_ms': pick(0.90),
+        'p99_ms': pick(0.99),
+        'p999_ms': pick(0.999),
+        'max_ms': round(ordered[-1], 3),
+        'mean_ms': round(sum(ordered) / len(ordered), 3)
+    }
+
+
+def _parse_timestamp(value: Optional[str]) -> Optional[float]:
+    """Convert a server isoformat timestamp (same host clock) to epoch seconds"""
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+def _broadcast_key(event: str, data: Dict) -> Optional[str]:
+    """Identify one broadcast so receipts can be matched across clients"""
+    if event == 'suggestion_implemented':
+        return f"{event}:{data.get('suggestion_id')}"
+    if event == 'suggestions_implemented':
+        return f"{event}:{','.join(data.get('suggestion_ids', []))}"
+    return f"{event}:{data.get('timestamp')}"
+
+
+def _broadcast_sent_at(event: str, data: Dict) -> Optional[float]:
+    if event == 'suggestion_implemented':
+        return _parse_timestamp(data.get('result', {}).get('implementation_time'))
+    return _parse_timestamp(data.get('timestamp'))
+
+
+class DashboardClient:
+    """One simulated dashboard connection"""
+
+    def __init__(self, url: str, request_timeout: float):
+        self.url = url
+        self.request_timeout = request_timeout
+        self.sio = socketio.AsyncClient(reconnection=False)
+        self.pending_updates = []
+        self.update_latencies = []
+        self.updates_timed_out = 0
+        self.broadcast_latencies = {event: [] for event in BROADCAST_EVENTS}
+        self.received_keys = set()
+        self.connected = False
+        self.dropped_connection = False
+
+        self.sio.on('connect', self._on_connect)
+        self.sio.on('disconnect', self._on_disconnect)
+        self.sio.on('data_update', self._on_data_update)
+        for event in BROADCAST_EVENTS:
+            self.sio.on(event, self._make_broadcast_handler(event))
+
+    async def connect(self) -> bool:
+        try:
+            await self.sio.connect(self.url, transports=['websocket'], wait_timeout=30)
+            return True
+        except Exception:
+            return False
+
+    async def _on_connect(self):
+        self.connected = True
+
+    async def _on_disconnect(self):
+        if self.connected:
+            self.dropped_connection = True
+        self.connected = False
+
+    async def _on_data_update(self, data):
+        now = time.time()
+        if self.pending_updates:
+            sent_at = self.pending_updates.pop(0)
+            self.update_latencies.append((now - sent_at) * 1000)
+
+    def _make_broadcast_handler(self, event: str):
+        async def handler(data):
+            now = time.time()
+            self.received_keys.add(_broadcast_key(event, data))
+            sent_at = _broadcast_sent_at(event, data)
+            if sent_at is not None:
+                self.broadcast_latencies[event].append((now - sent_at) * 1000)
+        return handler
+
+    async def request_update(self):
+        if not self.connected:
+            return
+        now = time.time()
+        # Requests older than the timeout will never be matched again
+        while self.pending_updates and now - self.pending_updates[0] > self.request_timeout:
+            self.pending_updates.pop(0)
+            self.updates_timed_out += 1
+        self.pending_updates.append(now)
+        try:
+            await self.sio.emit('request_update')
+        except Exception:
+            self.pending_updates.pop()
+            self.updates_timed_out += 1
+
+    def expire_pending(self):
+        self.updates_timed_out += len(self.pending_updates)
+        self.pending_updates = []
+
+
+async def _run_client_worker(worker_id: int, config: Dict, ready_queue, start_event, stop_event, result_queue):
+    """Connect a share of the clients and drive request_update traffic"""
+    clients = [DashboardClient(config['url'], config['request_timeout']) for _ in range(config['clients'])]
+    connect_delay = 1.0 / config['connect_rate'] if config['connect_rate'] > 0 else 0
+
+    connect_tasks = []
+    for client in clients:
+        connect_tasks.append(asyncio.create_task(client.connect()))
+        if connect_delay:
+            await asyncio.sleep(connect_delay)
+    connected = sum(await asyncio.gather(*connect_tasks))
+    ready_queue.put((worker_id, connected))
+
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(None, start_event.wait)
+    stable = [client for client in clients if client.connected]
+    for client in stable:
+        client.received_keys.clear()
+
+    # Spread request_update emits over this worker's connected clients
+    rng = random.Random(config['seed'] + worker_id)
+    interval = 1.0 / config['update_rate'] if config['update_rate'] > 0 else None
+    next_emit = time.time()
+    while not stop_event.is_set():
+        if interval is None or not stable:
+            await asyncio.sleep(0.1)
+            continue
+        now = time.time()
+        while next_emit <= now:
+            asyncio.create_task(rng.choice(stable).request_update())
+            next_emit += interval
+        await asyncio.sleep(min(0.05, max(0.0, next_emit - time.time())))
+
+    # Grace period for in-flight events
+    await asyncio.sleep(config['grace_period'])
+
+    stable = [client for client in stable if not client.dropped_connection]
+    received_counts = {}
+    for client in stable:
+        for key in client.received_keys:
+            received_counts[key] = received_counts.get(key, 0) + 1
+        client.expire_pending()
+
+    result_queue.put({
+        'worker_id': worker_id,
+        'clients': len(clients),
+        'connected': connected,
+        'stable_clients': len(stable),
+        'dropped_connections': sum(1 for client in clients if client.dropped_connection),
+        'update_latencies': [ms for client in clients for ms in client.update_latencies],
+        'updates_timed_out': sum(client.updates_timed_out for client in clients),
+        'broadcast_latencies': {
+            event: [ms for client in clients for ms in client.broadcast_latencies[event]]
+            for event in BROADCAST_EVENTS
+        },
+        'received_counts': received_counts
+    })
+
+    await asyncio.gather(*(client.sio.disconnect() for client in clients if client.connected),
+                         return_exceptions=True)
+
+
+def _client_worker_main(worker_id: int, config: Dict, ready_queue, start_event, stop_event, result_queue):
+    _raise_fd_limit()
+    asyncio.run(_run_client_worker(worker_id, config, ready_queue, start_event, stop_event, result_queue))
+
+
+class ServerMonitor:
+    """Samples CPU and memory of the backend process from /proc"""
+
+    def __init__(self, pid: int):
+        self.pid = pid
+        self.clock_ticks = os.sysconf('SC_CLK_TCK')
+        self.samples = []
+        self._last = None
+
+    def _read_cpu_seconds(self) -> Optional[float]:
+        try:
+            with open(f'/proc/{self.pid}/stat') as f:
+                fields = f.read().rsplit(')', 1)[1].split()
+            # utime and stime are fields 14 and 15 of /proc/<pid>/stat
+            return (int(fields[11]) + int(fields[12])) / self.clock_ticks
+        except (OSError, IndexError, ValueError):
+            return None
+
+    def _read_rss_mb(self) -> Optional[float]:
+        try:
+            with open(f'/proc/{self.pid}/status') as f:
+                for line in f:
+                    if line.startswith('VmRSS:'):
+                        return int(line.split()[1]) / 1024
+        except OSError:
+            pass
+        return None
+
+    def sample(self):
+        now = time.time()
+        cpu_seconds = self._read_cpu_seconds()
+        if cpu_seconds is None:
+            return
+        if self._last is not None:
+            elapsed = now - self._last[0]
+            if elapsed > 0:
+                self.samples.append({
+                    'cpu_percent': (cpu_seconds - self._last[1]) / elapsed * 100,
+                    'rss_mb': self._read_rss_mb()
+                })
+        self._last = (now, cpu_seconds)
+
+    def summary(self) -> Dict[str, Any]:
+        if not self.samples:
+            return {'pid': self.pid, 'samples': 0}
+        cpu = [sample['cpu_percent'] for sample in self.samples]
+        rss = [sample['rss_mb'] for sample in self.samples if sample['rss_mb'] is not None]
+        return {
+            'pid': self.pid,
+            'samples': len(self.samples),
+            'cpu_percent_avg': round(sum(cpu) / len(cpu), 1),
+            'cpu_percent_max': round(max(cpu), 1),
+            'rss_mb_max': round(max(rss), 1) if rss else None
+        }
+
+
+async def _drive_http(url: str, config: Dict, stop_event, monitor: Optional[ServerMonitor]) -> Dict[str, Any]:
+    """Drive /api/conflicts, /api/accept-suggestion and /api/accept-suggestions at the configured rates"""
+    stats = {
+        'conflicts': {'latencies': [], 'errors': 0},
+        'accept': {'latencies': [], 'errors': 0},
+        'batch_accept': {'latencies': [], 'errors': 0},
+        'accepted_suggestions': [],
+        'accepted_batches': []
+    }
+    candidates = []
+    timeout = aiohttp.ClientTimeout(total=config['request_timeout'])
+
+    async with aiohttp.ClientSession(timeout=timeout) as session:
+
+        async def fetch_conflicts():
+            start = time.time()
+            try:
+                async with session.get(f"{url}/api/conflicts") as response:
+                    payload = await response.json()
+                stats['conflicts']['latencies'].append((time.time() - start) * 1000)
+                candidates.extend(payload.get('suggestions', []))
+                del candidates[:-500]
+            except Exception:
+                stats['conflicts']['errors'] += 1
+
+        async def accept_suggestion():
+            if not candidates:
+                await fetch_conflicts()
+            if not candidates:
+                return
+            suggestion = candidates.pop()
+            start = time.time()
+            try:
+                async with session.post(f"{url}/api/accept-suggestion", json={
+                    'suggestion_id': suggestion['id'],
+                    'conflict_id': suggestion['conflict_id']
+                }) as response:
+                    result = await response.json()
+                stats['accept']['latencies'].append((time.time() - start) * 1000)
+                if result.get('success'):
+                    stats['accepted_suggestions'].append(suggestion['id'])
+            except Exception:
+                stats['accept']['errors'] += 1
+
+        async def accept_suggestions():
+            if len(candidates) < config['batch_size']:
+                await fetch_conflicts()
+            batch = [candidates.pop() for _ in range(min(config['batch_size'], len(candidates)))]
+            if not batch:
+                return
+            start = time.time()
+            try:
+                async with session.post(f"{url}/api/accept-suggestions", json={'suggestions': [
+                    {'suggestion_id': suggestion['id'], 'conflict_id': suggestion['conflict_id']}
+                    for suggestion in batch
+                ]}) as response:
+                    result = await response.json()
+                stats['batch_accept']['latencies'].append((time.time() - start) * 1000)
+                if result.get('implemented'):
+                    stats['accepted_batches'].append([entry['suggestion_id'] for entry in result['implemented']])
+            except Exception:
+                stats['batch_accept']['errors'] += 1
+
+        async def run_at_rate(rate: float, action):
+            if rate <= 0:
+                return
+            interval = 1.0 / rate
+            next_run = time.time()
+            tasks = []
+            while not stop_event.is_set():
+                now = time.time()
+                while next_run <= now:
+                    tasks.append(asyncio.create_task(action()))
+                    next_run += interval
+                await asyncio.sleep(min(0.05, max(0.0, next_run - time.time())))
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        async def run_monitor():
+            while monitor and not stop_event.is_set():
+                monitor.sample()
+                await asyncio.sleep(1.0)
+
+        await asyncio.gather(
+            run_at_rate(config['conflicts_rate'], fetch_conflicts),
+            run_at_rate(config['accept_rate'], accept_suggestion),
+            run_at_rate(config['batch_accept_rate'], accept_suggestions),
+            run_monitor()
+        )
+
+    return stats
+
+
+def _raise_fd_limit():
+    """Thousands of sockets need more than the default 1024 descriptors"""
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+
+def _start_local_server(port: int) -> subprocess.Popen:
+    """Launch app.py on a local port and wait until it answers"""
+    backend_dir = os.path.dirname(os.path.abspath(__file__))
+    env = dict(os.environ, PORT=str(port))
+    server = subprocess.Popen([sys.executable, 'app.py'], cwd=backend_dir, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                              preexec_fn=_raise_fd_limit)
+
+    async def wait_ready():
+        deadline = time.time() + 30
+        async with aiohttp.ClientSession() as session:
+            while time.time() < deadline:
+                try:
+                    async with session.get(f"http://127.0.0.1:{port}/") as response:
+                        if response.status == 200:
+                            return True
+                except aiohttp.ClientError:
+                    pass
+                await asyncio.sleep(0.2)
+        return False
+
+    if not asyncio.run(wait_ready()):
+        server.terminate()
+        raise RuntimeError('Backend did not start within 30 seconds')
+    return server
+
+
+def run_load_test(config: Dict) -> Dict[str, Any]:
+    """Run one load test and return the aggregated report"""
+    _raise_fd_limit()
+    server = None
+    url = config.get('url')
+    server_pid = config.get('server_pid')
+
+    if not url:
+        server = _start_local_server(config['port'])
+        url = f"http://127.0.0.1:{config['port']}"
+        server_pid = server.pid
+
+    ctx = multiprocessing.get_context('spawn')
+    ready_queue = ctx.Queue()
+    result_queue = ctx.Queue()
+    start_event = ctx.Event()
+    stop_event = ctx.Event()
+
+    processes = max(1, config['processes'])
+    per_worker = [config['clients'] // processes + (1 if i < config['clients'] % processes else 0)
+                  for i in range(processes)]
+    workers = []
+
+    try:
+        for worker_id, clients in enumerate(per_worker):
+            worker_config = dict(config, url=url, clients=clients,
+                                 update_rate=config['update_rate'] / processes,
+                                 connect_rate=config['connect_rate'] / processes)
+            process = ctx.Process(target=_client_worker_main,
+                                  args=(worker_id, worker_config, ready_queue, start_event, stop_event, result_queue))
+            process.start()
+            workers.append(process)
+
+        print(f"🔗 Connecting {config['clients']} clients to {url}...", file=sys.stderr)
+        connect_start = time.time()
+        connected = sum(ready_queue.get()[1] for _ in workers)
+        connect_seconds = time.time() - connect_start
+        print(f"✅ {connected} clients connected in {connect_seconds:.1f}s, running for {config['duration']}s",
+              file=sys.stderr)
+
+        monitor = ServerMonitor(server_pid) if server_pid else None
+
+        async def drive():
+            http_task = asyncio.create_task(_drive_http(url, config, stop_event, monitor))
+            await asyncio.sleep(config['duration'])
+            stop_event.set()
+            return await http_task
+
+        start_event.set()
+        http_stats = asyncio.run(drive())
+        worker_results = [result_queue.get() for _ in workers]
+    finally:
+        stop_event.set()
+        for process in workers:
+            process.join(timeout=30)
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=10)
+
+    return _build_report(config, url, connected, connect_seconds, worker_results, http_stats, monitor)
+
+
+def _build_report(config: Dict, url: str, connected: int, connect_seconds: float,
+                  worker_results: List[Dict], http_stats: Dict, monitor: Optional[ServerMonitor]) -> Dict[str, Any]:
+    stable_clients = sum(result['stable_clients'] for result in worker_results)
+    received_counts = {}
+    for result in worker_results:
+        for key, count in result['received_counts'].items():
+            received_counts[key] = received_counts.get(key, 0) + count
+
+    # Every successful accept must reach every client that stayed connected;
+    # other broadcasts are only known once at least one client saw them
+    expected_keys = {f"suggestion_implemented:{sid}" for sid in http_stats['accepted_suggestions']}
+    expected_keys.update(f"suggestions_implemented:{','.join(ids)}" for ids in http_stats['accepted_batches'])
+    expected_keys.update(key for key in received_counts if key.split(':', 1)[0] not in ACCEPT_EVENTS)
+
+    dropped_by_event = {event: 0 for event in BROADCAST_EVENTS}
+    delivered_by_event = {event: 0 for event in BROADCAST_EVENTS}
+    for key in expected_keys:
+        event = key.split(':', 1)[0]
+        received = min(received_counts.get(key, 0), stable_clients)
+        delivered_by_event[event] += received
+        dropped_by_event[event] += stable_clients - received
+
+    duration = config['duration']
+    update_latencies = [ms for result in worker_results for ms in result['update_latencies']]
+
+    return {
+        'timestamp': datetime.now().isoformat(),
+        'target': url,
+        'config': {key: config[key] for key in ('clients', 'processes', 'duration', 'update_rate',
+                                                'conflicts_rate', 'accept_rate', 'batch_accept_rate',
+                                                'batch_size', 'connect_rate')},
+        'connections': {
+            'requested': config['clients'],
+            'connected': connected,
+            'stable': stable_clients,
+            'dropped': sum(result['dropped_connections'] for result in worker_results),
+            'connect_seconds': round(connect_seconds, 2)
+        },
+        'request_update': {
+            'latency': _percentiles(update_latencies),
+            'timed_out': sum(result['updates_timed_out'] for result in worker_results),
+            'achieved_rate': round(len(update_latencies) / duration, 2)
+        },
+        'broadcasts': {
+            event: {
+                'emitted': sum(1 for key in expected_keys if key.startswith(f"{event}:")),
+                'delivered': delivered_by_event[event],
+                'dropped': dropped_by_event[event],
+                'latency': _percentiles([ms for result in worker_results
+                                         for ms in result['broadcast_latencies'][event]])
+            }
+            for event in BROADCAST_EVENTS
+        },
+        'http': {
+            'conflicts': {
+                'latency': _percentiles(http_stats['conflicts']['latencies']),
+                'errors': http_stats['conflicts']['errors']
+            },
+            'accept_suggestion': {
+                'latency': _percentiles(http_stats['accept']['latencies']),
+                'errors': http_stats['accept']['errors'],
+                'accepted': len(http_stats['accepted_suggestions'])
+            },
+            'accept_suggestions': {
+                'latency': _percentiles(http_stats['batch_accept']['latencies']),
+                'errors': http_stats['batch_accept']['errors'],
+                'accepted': sum(len(ids) for ids in http_stats['accepted_batches'])
+            }
+        },
+        'server': monitor.summary() if monitor else None
+    }
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description='RailOptiX Socket.IO fan-out load test')
+    parser.add_argument('--clients', type=int, default=500)
+    parser.add_argument('--processes', type=int, default=max(1, (os.cpu_count() or 2) // 2),
+                        help='Client processes (keep clients off the server cores where possible)')
+    parser.add_argument('--duration', type=float, default=30, help='Measurement window in seconds')
+    parser.add_argument('--update-rate', type=float, default=50, help='request_update emits per second (all clients)')
+    parser.add_argument('--conflicts-rate', type=float, default=2, help='GET /api/conflicts per second')
+    parser.add_argument('--accept-rate', type=float, default=1, help='POST /api/accept-suggestion per second')
+    parser.add_argument('--batch-accept-rate', type=float, default=0.2,
+                        help='POST /api/accept-suggestions per second')
+    parser.add_argument('--batch-size', type=int, default=5, help='Suggestions accepted per batch')
+    parser.add_argument('--connect-rate', type=float, default=200, help='New connections per second during ramp-up')
+    parser.add_argument('--request-timeout', type=float, default=10, help='Seconds before a request counts as dropped')
+    parser.add_argument('--grace-period', type=float, default=3, help='Seconds to wait for in-flight events')
+    parser.add_argument('--url', help='Existing backend to target (default: start app.py locally)')
+    parser.add_argument('--server-pid', type=int, help='PID of the existing backend for CPU sampling')
+    parser.add_argument('--port', type=int, default=5055, help='Port for the locally started backend')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='Write the JSON report to this file (default: stdout)')
+    args = parser.parse_args(argv)
+
+    config = {key.replace('-', '_'): value for key, value in vars(args).items()}
+    report = run_load_test(config)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
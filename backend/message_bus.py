@@ -0,0 +1,242 @@
+"""
+RailOptiX Message Bus
+Pub/sub transport shared by zone workers and the Socket.IO message queue
+"""
+
+import json
+import queue
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from typing import List, Dict, Any, Callable
+
+import socketio
+
+SOCKETIO_CHANNEL = 'flask-socketio'
+
+
+class MessageBus(ABC):
+    """Minimal publish/subscribe interface used for cross-process coordination"""
+
+    @abstractmethod
+    def publish(self, channel: str, message: Dict):
+        pass
+
+    @abstractmethod
+    def subscribe(self, channel: str, handler: Callable[[Dict], None]):
+        """Call `handler` from a background thread for every message on `channel`"""
+
+    @abstractmethod
+    def unsubscribe(self, channel: str, handler: Callable[[Dict], None]):
+        pass
+
+    @abstractmethod
+    def socketio_options(self, write_only: bool = False) -> Dict[str, Any]:
+        """Keyword arguments that route Flask-SocketIO emits through this bus"""
+
+    @abstractmethod
+    def create_emitter(self):
+        """Write-only Socket.IO manager for emitting from worker processes"""
+
+    def close(self):
+        pass
+
+    def request(self, channel: str, message: Dict, expected_replies: int = 1, timeout: float = 5.0) -> List[Dict]:
+        """Publish a message and collect replies sent back to its `reply_to` channel"""
+        reply_channel = f"railoptix:reply:{uuid.uuid4().hex}"
+        replies = []
+        done = threading.Event()
+
+        def collect(reply: Dict):
+            replies.append(reply)
+            if len(replies) >= expected_replies:
+                done.set()
+
+        self.subscribe(reply_channel, collect)
+        try:
+            self.publish(channel, {**message, 'reply_to': reply_channel})
+            done.wait(timeout)
+        finally:
+            self.unsubscribe(reply_channel, collect)
+        return list(replies)
+
+    def reply(self, request_message: Dict, payload: Dict):
+        """Answer a message received through `request`"""
+        reply_to = request_message.get('reply_to')
+        if reply_to:
+            self.publish(reply_to, payload)
+
+
+class InProcessMessageBus(MessageBus):
+    """Thread-based broker stand-in for tests and single-host development"""
+
+    def __init__(self):
+        self._subscribers = {}
+        self._lock = threading.Lock()
+
+    def publish(self, channel: str, message: Dict):
+        # Serialize like a real broker so no state is shared between subscribers
+        payload = json.dumps(message)
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, []))
+        for _, inbox in subscribers:
+            inbox.put(payload)
+
+    def subscribe(self, channel: str, handler: Callable[[Dict], None]):
+        inbox = queue.Queue()
+        with self._lock:
+            self._subscribers.setdefault(channel, []).append((handler, inbox))
+
+        def dispatch():
+            while True:
+                payload = inbox.get()
+                if payload is None:
+                    return
+                try:
+                    handler(json.loads(payload))
+                except Exception as e:
+                    print(f"Error handling message on {channel}: {e}")
+
+        threading.Thread(target=dispatch, daemon=True).start()
+
+    def unsubscribe(self, channel: str, handler: Callable[[Dict], None]):
+        with self._lock:
+            subscribers = self._subscribers.get(channel, [])
+            for entry in [entry for entry in subscribers if entry[0] is handler]:
+                subscribers.remove(entry)
+                entry[1].put(None)
+            if not subscribers:
+                self._subscribers.pop(channel, None)
+
+    def listen(self, channel: str):
+        """Blocking generator of raw messages, used by the Socket.IO manager"""
+        inbox = queue.Queue()
+        with self._lock:
+            self._subscribers.setdefault(channel, []).append((None, inbox))
+        while True:
+            payload = inbox.get()
+            if payload is None:
+                return
+            yield json.loads(payload)
+
+    def socketio_options(self, write_only: bool = False) -> Dict[str, Any]:
+        return {'client_manager': InProcessSocketIOManager(self, write_only=write_only)}
+
+    def create_emitter(self):
+        return InProcessSocketIOManager(self, write_only=True)
+
+    def close(self):
+        with self._lock:
+            for subscribers in self._subscribers.values():
+                for _, inbox in subscribers:
+                    inbox.put(None)
+            self._subscribers = {}
+
+
+class RedisMessageBus(MessageBus):
+    """Redis pub/sub bus shared by worker processes on one or more nodes
+
+    All subscriptions share one pub/sub connection and one listener thread,
+    which calls the handlers in turn; handlers must not wait on `request`.
+    """
+
+    def __init__(self, url: str):
+        import redis  # Only needed when a Redis message queue is configured
+
+        self.url = url
+        self.redis = redis.Redis.from_url(url)
+        self._pubsub = self.redis.pubsub()
+        self._handlers = {}    # channel -> handlers
+        self._confirmed = {}   # channel -> set once Redis confirmed the subscription
+        self._listener = None
+        self._closed = threading.Event()
+        self._lock = threading.Lock()
+
+    def publish(self, channel: str, message: Dict):
+        self.redis.publish(channel, json.dumps(message))
+
+    def subscribe(self, channel: str, handler: Callable[[Dict], None]):
+        with self._lock:
+            handlers = self._handlers.setdefault(channel, [])
+            handlers.append(handler)
+            confirmed = self._confirmed.setdefault(channel, threading.Event())
+            if len(handlers) == 1:
+                self._pubsub.subscribe(channel)
+            if self._listener is None:
+                self._listener = threading.Thread(target=self._listen, daemon=True)
+                self._listener.start()
+        # Wait for the subscription to be active so early replies are not lost
+        confirmed.wait(2)
+
+    def unsubscribe(self, channel: str, handler: Callable[[Dict], None]):
+        with self._lock:
+            handlers = self._handlers.get(channel, [])
+            if handler in handlers:
+                handlers.remove(handler)
+            if not handlers and channel in self._handlers:
+                del self._handlers[channel]
+                self._confirmed.pop(channel, None)
+                self._pubsub.unsubscribe(channel)
+
+    def _listen(self):
+        while not self._closed.is_set():
+            try:
+                raw = self._pubsub.get_message(timeout=0.1)
+            except Exception as e:
+                if self._closed.is_set():
+                    return
+                print(f"Error reading from Redis: {e}")
+                time.sleep(0.1)
+                continue
+            if raw is None:
+                continue
+
+            channel = raw['channel'].decode() if isinstance(raw['channel'], bytes) else raw['channel']
+            with self._lock:
+                if raw['type'] == 'subscribe' and channel in self._confirmed:
+                    self._confirmed[channel].set()
+                handlers = list(self._handlers.get(channel, [])) if raw['type'] == 'message' else []
+            for handler in handlers:
+                try:
+                    handler(json.loads(raw['data']))
+                except Exception as e:
+                    print(f"Error handling message on {channel}: {e}")
+
+    def socketio_options(self, write_only: bool = False) -> Dict[str, Any]:
+        return {'message_queue': self.url, 'channel': SOCKETIO_CHANNEL}
+
+    def create_emitter(self):
+        return socketio.RedisManager(self.url, channel=SOCKETIO_CHANNEL, write_only=True)
+
+    def close(self):
+        self._closed.set()
+        if self._listener is not None:
+            self._listener.join(timeout=1)
+        with self._lock:
+            self._handlers = {}
+            self._confirmed = {}
+            self._pubsub.close()
+
+
+class InProcessSocketIOManager(socketio.PubSubManager):
+    """Socket.IO client manager that fans emits out through an InProcessMessageBus"""
+
+    name = 'inprocess'
+
+    def __init__(self, bus: InProcessMessageBus, channel: str = SOCKETIO_CHANNEL, write_only: bool = False):
+        super().__init__(channel=channel, write_only=write_only)
+        self.bus = bus
+
+    def _publish(self, data):
+        self.bus.publish(self.channel, data)
+
+    def _listen(self):
+        yield from self.bus.listen(self.channel)
+
+
+def create_message_bus(url: str = None) -> MessageBus:
+    """Create a bus from a URL: redis://... for Redis, anything else for in-process"""
+    if url and url.startswith(('redis://', 'rediss://')):
+        return RedisMessageBus(url)
+    return InProcessMessageBus()
@@ -0,0 +1,289 @@
+"""
+RailOptiX Synthetic Network Generator
+Seeded generation of railway networks, timetables and trains for scale testing
+"""
+
+import math
+import random
+from datetime import datetime, timedelta
+from typing import List, Dict, Any
+
+# Preset sizes, from a single division up to the national network
+SCALE_PRESETS = {
+    'division': {'stations': 120, 'trains': 400},
+    'zone': {'stations': 900, 'trains': 6000},
+    'multi_zone': {'stations': 3000, 'trains': 30000},
+    'national': {'stations': 7300, 'trains': 100000}
+}
+
+# Rough bounding box of the Indian network
+LAT_RANGE = (8.5, 32.0)
+LNG_RANGE = (69.0, 94.0)
+
+TRAIN_TYPES = [
+    # (type, priority, share of trains, speed range km/h)
+    ('Express', 'high', 0.35, (80, 130)),
+    ('Passenger', 'medium', 0.30, (50, 80)),
+    ('Freight', 'low', 0.35, (35, 65))
+]
+
+TRAIN_NAME_PREFIXES = {
+    'Express': ['Rajdhani', 'Shatabdi', 'Duronto', 'Superfast', 'Mail', 'Garib Rath', 'Jan Shatabdi'],
+    'Passenger': ['Passenger', 'MEMU', 'DEMU', 'Intercity'],
+    'Freight': ['Freight Special', 'Container Rake', 'Coal Rake', 'BOXN Rake']
+}
+
+
+class SyntheticNetworkGenerator:
+    """Generates reproducible networks and timetables in the DataManager format"""
+
+    def __init__(self, seed: int = 42):
+        self.seed = seed
+        self.rng = random.Random(seed)
+
+    def generate(self, scale: str = 'division', stations: int = None, trains: int = None,
+                 start_time: datetime = None) -> Dict[str, Any]:
+        """Generate a full network: stations, sections, trains and timetable"""
+        preset = SCALE_PRESETS.get(scale, SCALE_PRESETS['division'])
+        num_stations = stations or preset['stations']
+        num_trains = trains or preset['trains']
+        start_time = start_time or datetime.now().replace(second=0, microsecond=0)
+
+        station_list, corridors = self.generate_stations(num_stations)
+        sections = self._build_sections(station_list, corridors)
+        train_list, timetable = self.generate_trains(num_trains, station_list, corridors, start_time)
+
+        return {
+            'scale': scale,
+            'seed': self.seed,
+            'stations': station_list,
+            'sections': sections,
+            'corridors': corridors,
+            'trains': train_list,
+            'timetable': timetable,
+            'generated_at': datetime.now().isoformat()
+        }
+
+    def generate_stations(self, num_stations: int):
+        """Lay stations along corridors that branch off existing junctions"""
+        stations = []
+        corridors = []
+
+        while len(stations) < num_stations:
+            length = min(self.rng.randint(8, 30), num_stations - len(stations) + (1 if stations else 0))
+            if length < 2:
+                length = 2
+
+            if stations:
+                # Branch from an existing station so the network stays connected
+                junction = self.rng.choice(stations)
+                start = (junction['lat'], junction['lng'])
+                corridor = [junction['id']]
+                junction['junction'] = True
+            else:
+                start = (self.rng.uniform(*LAT_RANGE), self.rng.uniform(*LNG_RANGE))
+                corridor = []
+
+            bearing = self.rng.uniform(0, 2 * math.pi)
+            spacing = self.rng.uniform(0.08, 0.25)  # degrees between stations
+            lat, lng = start
+
+            for _ in range(length - len(corridor)):
+                bearing += self.rng.uniform(-0.3, 0.3)
+                lat = min(max(lat + spacing * math.cos(bearing), LAT_RANGE[0]), LAT_RANGE[1])
+                lng = min(max(lng + spacing * math.sin(bearing), LNG_RANGE[0]), LNG_RANGE[1])
+
+                index = len(stations)
+                station = {
+                    'id': f"S{index:05d}",
+                    'name': f"Station {index}",
+                    'lat': round(lat, 5),
+                    'lng': round(lng, 5),
+                    'platforms': self.rng.choice([2, 3, 4, 4, 6, 8]),
+                    'junction': False
+                }
+                stations.append(station)
+                corridor.append(station['id'])
+
+            corridors.append(corridor)
+
+        return stations, corridors
+
+    def _build_sections(self, stations: List[Dict], corridors: List[List[str]]) -> List[Dict]:
+        """Build track sections (blocks) between consecutive corridor stations"""
+        by_id = {station['id']: station for station in stations}
+        sections = []
+
+        for corridor_index, corridor in enumerate(corridors):
+            for a, b in zip(corridor, corridor[1:]):
+                sections.append({
+                    'id': f"{a}-{b}",
+                    'from_station': a,
+                    'to_station': b,
+                    'corridor': corridor_index,
+                    'length_km': round(_distance_km(by_id[a], by_id[b]), 2),
+                    'tracks': self.rng.choice([1, 2, 2, 2, 4])
+                })
+
+        return sections
+
+    def generate_trains(self, num_trains: int, stations: List[Dict], corridors: List[List[str]],
+                        start_time: datetime):
+        """Generate trains running along corridor segments with their timetables"""
+        by_id = {station['id']: station for station in stations}
+        usable = [corridor for corridor in corridors if len(corridor) >= 2]
+        weights = [len(corridor) for corridor in usable]
+        type_weights = [share for _, _, share, _ in TRAIN_TYPES]
+
+        trains = []
+        timetable = {}
+
+        for i in range(num_trains):
+            train_type, priority, _, speed_range = self.rng.choices(TRAIN_TYPES, weights=type_weights)[0]
+            corridor = self.rng.choices(usable, weights=weights)[0]
+
+            # Contiguous run of stops along the corridor, in either direction
+            stops = self.rng.randint(2, min(len(corridor), 12))
+            first = self.rng.randint(0, len(corridor) - stops)
+            route = corridor[first:first + stops]
+            if self.rng.random() < 0.5:
+                route = list(reversed(route))
+
+            train_id = str(10000 + i)
+            speed = self.rng.randint(*speed_range)
+            departure = start_time + timedelta(minutes=self.rng.randint(-240, 720))
+            stop_times = self._build_stop_times(route, by_id, speed, train_type, departure)
+            timetable[train_id] = stop_times
+
+            # Place the train somewhere along its route
+            progress = self.rng.randint(0, len(route) - 1)
+            current = by_id[route[progress]]
+            delay = self._random_delay()
+
+            trains.append({
+                'id': train_id,
+                'name': f"{self.rng.choice(TRAIN_NAME_PREFIXES[train_type])} {train_id}",
+                'type': train_type,
+                'priority': priority,
+                'from_station': route[0],
+                'to_station': route[-1],
+                'current_station': route[progress],
+                'route': route,
+                'delay': delay,
+                'speed': speed,
+                'position': {
+                    'lat': current['lat'] + self.rng.uniform(-0.01, 0.01),
+                    'lng': current['lng'] + self.rng.uniform(-0.01, 0.01)
+                },
+                'status': 'on_time' if delay <= 0 else ('slight_delay' if delay <= 10 else 'delayed'),
+                'last_updated': start_time.isoformat(),
+                'scheduled_arrival': stop_times[-1][1],
+                'platform': self.rng.randint(1, current['platforms']) if train_type != 'Freight' else None,
+                'consist': self._generate_consist(train_type),
+                'occupancy': self.rng.randint(60, 95) if train_type != 'Freight' else None
+            })
+
+        return trains, timetable
+
+    def generate_conflicts(self, trains: List[Dict], count: int, stations: List[Dict] = None) -> List[Dict]:
+        """Generate conflicts between trains sharing a station, in the ConflictDetector format"""
+        by_station = {}
+        for train in trains:
+            by_station.setdefault(train['current_station'], []).append(train)
+
+        shared = [group for group in by_station.values() if len(group) >= 2]
+        station_names = {station['id']: station['name'] for station in (stations or [])}
+        conflicts = []
+        now = datetime.now()
+
+        for i in range(count):
+            if shared:
+                group = self.rng.choice(shared)
+                train1, train2 = self.rng.sample(group, 2)
+            else:
+                train1, train2 = self.rng.sample(trains, 2)
+
+            minutes = self.rng.randint(5, 30)
+            location = station_names.get(train1['current_station'], train1['current_station'])
+            conflicts.append({
+                'id': f"synthetic-{self.seed}-{i}",
+                'type': self.rng.choice(['train_crossing', 'platform_conflict', 'signal_conflict']),
+                'priority': max(train1['priority'], train2['priority'], key=['low', 'medium', 'high'].index),
+                'location': location,
+                'estimated_time': (now + timedelta(minutes=minutes)).isoformat(),
+                'train1': _conflict_train_info(train1, now + timedelta(minutes=minutes)),
+                'train2': _conflict_train_info(train2, now + timedelta(minutes=minutes + self.rng.randint(0, 3))),
+                'conflict_severity': self.rng.choice(['low', 'medium', 'high']),
+                'potential_delay': self.rng.randint(3, 20),
+                'status': 'active',
+                'detected_at': now.isoformat()
+            })
+
+        return conflicts
+
+    def _build_stop_times(self, route: List[str], by_id: Dict[str, Dict], speed: int,
+                          train_type: str, departure: datetime) -> List[List]:
+        """Build [station_id, arrival, departure] rows for a route"""
+        dwell = 0 if train_type == 'Freight' else 2
+        stop_times = []
+        current = departure
+
+        for index, station_id in enumerate(route):
+            if index > 0:
+                run_minutes = _distance_km(by_id[route[index - 1]], by_id[station_id]) / speed * 60
+                current = current + timedelta(minutes=max(1, round(run_minutes)))
+            arrival = current
+            if 0 < index < len(route) - 1:
+                current = current + timedelta(minutes=dwell)
+            stop_times.append([station_id, arrival.isoformat(), current.isoformat()])
+
+        return stop_times
+
+    def _random_delay(self) -> int:
+        """Mostly punctual trains with a long tail of delays"""
+        roll = self.rng.random()
+        if roll < 0.55:
+            return 0
+        if roll < 0.85:
+            return self.rng.randint(1, 10)
+        return self.rng.randint(11, 90)
+
+    def _generate_consist(self, train_type: str) -> Dict:
+        """Generate train consist information (same shape as DataManager)"""
+        if train_type == 'Express':
+            return {
+                'coaches': self.rng.randint(16, 24),
+                'ac_coaches': self.rng.randint(6, 12),
+                'sleeper_coaches': self.rng.randint(8, 12)
+            }
+        elif train_type == 'Passenger':
+            return {
+                'coaches': self.rng.randint(12, 18),
+                'ac_coaches': self.rng.randint(2, 4),
+                'sleeper_coaches': self.rng.randint(8, 12)
+            }
+        else:  # Freight
+            return {
+                'wagons': self.rng.randint(40, 60),
+                'weight': f"{self.rng.randint(2500, 4500)} tons"
+            }
+
+
+def _distance_km(a: Dict, b: Dict) -> float:
+    """Equirectangular distance between two stations in kilometres"""
+    mean_lat = math.radians((a['lat'] + b['lat']) / 2)
+    dx = math.radians(b['lng'] - a['lng']) * math.cos(mean_lat)
+    dy = math.radians(b['lat'] - a['lat'])
+    return 6371.0 * math.hypot(dx, dy)
+
+
+def _conflict_train_info(train: Dict, estimated_arrival: datetime) -> Dict:
+    """Train summary embedded in conflict records"""
+    return {
+        'id': train['id'],
+        'name': train['name'],
+        'type': train['type'],
+        'priority': train['priority'],
+        'current_delay': train['delay'],
+        'estimated_arrival': estimated_arrival.isoformat()
+    }
@@ -6,23 +6,63 @@ Advanced train scheduling optimization using OR-Tools and heuristics
 import random
 import uuid
 from datetime import datetime, timedelta
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Callable
+from concurrent.futures import ThreadPoolExecutor
 import json
 
+from conflict_graph import (PRIORITY_WEIGHTS, build_conflict_clusters, solve_cluster_greedy,
+                            solve_cluster_exact, option_effects)
+
+# Fuel burned per minute a train stands waiting (idling locomotive plus restart), by train type
+IDLE_FUEL_LITRES_PER_MINUTE = {'Express': 6, 'Passenger': 5, 'Freight': 9}
+
+
 class TrainOptimizer:
     """Main optimization engine for train scheduling and conflict resolution"""
     
-    def __init__(self):
+    def __init__(self, max_workers: int = 4, exact_cluster_size: int = 3, solver_time_limit: float = 1.0,
+                 block_reservations=None, simulator=None, evaluation_horizon: int = 30,
+                 prune_margin: float = 0.25, delay_predictor=None, evaluation_batch: int = 128,
+                 now: Callable[[], datetime] = datetime.now):
         self.active_suggestions = {}
         self.optimization_history = []
+        self.now = now  # Current time (a virtual clock in replays)
+        
+        # Clusters with at least `exact_cluster_size` conflicts go to the exact solver
+        self.max_workers = max_workers
+        self.exact_cluster_size = exact_cluster_size
+        self.solver_time_limit = solver_time_limit
+        self._solver_pool = None
+        
+        # Hold lengths are checked against the block timeline, what-if runs use the look-ahead simulator
+        self.block_reservations = block_reservations
+        self.simulator = simulator
+        self.delay_predictor = delay_predictor
+        
+        # Candidate options are scored by short look-ahead runs, `evaluation_batch` conflicts per
+        # simulator call; runs worse than the lead option by more than `prune_margin` are stopped early
+        self.evaluation_horizon = evaluation_horizon
+        self.evaluation_batch = evaluation_batch
+        self.prune_margin = prune_margin
         
     def get_recommendations(self, conflicts: List[Dict]) -> List[Dict]:
         """Generate AI-powered recommendations for resolving conflicts"""
         suggestions = []
         
-        for conflict in conflicts:
-            # Generate multiple optimization options
-            options = self._generate_optimization_options(conflict)
+        # Generate multiple optimization options
+        options_per_conflict = [self._generate_optimization_options(conflict) for conflict in conflicts]
+        if self.block_reservations is not None:
+            for options in options_per_conflict:
+                self._fit_holds_to_blocks(options)
+        if self.simulator is not None:
+            self._evaluate_options(conflicts, options_per_conflict)
+        
+        # Choose one option per conflict, solving independent clusters separately
+        choices, clusters = self._solve_conflict_clusters(conflicts, options_per_conflict)
+        
+        for index, conflict in enumerate(conflicts):
+            options = options_per_conflict[index]
+            recommended = options[choices[index]] if options else None
             
             suggestion = {
                 'id': str(uuid.uuid4()),
@@ -30,10 +70,11 @@ class TrainOptimizer:
                 'type': 'conflict_resolution',
                 'priority': conflict.get('priority', 'medium'),
                 'options': options,
-                'recommended_option': options[0] if options else None,
-                'explanation': self._generate_explanation(conflict, options[0] if options else None),
-                'impact_analysis': self._calculate_impact(conflict, options[0] if options else None),
-                'timestamp': datetime.now().isoformat()
+                'recommended_option': recommended,
+                'explanation': self._generate_explanation(conflict, recommended),
+                'impact_analysis': self._calculate_impact(conflict, recommended, options),
+                'cluster': clusters[index],
+                'timestamp': self.now().isoformat()
             }
             
             suggestions.append(suggestion)
@@ -41,6 +82,162 @@ class TrainOptimizer:
             
         return suggestions
     
+    def _solve_conflict_clusters(self, conflicts: List[Dict], options_per_conflict: List[List[Dict]]):
+        """Split the conflict graph into independent clusters and solve them concurrently
+        
+        Small clusters take the greedy path inline; large ones are solved exactly
+        on the worker pool. Returns the chosen option index and cluster info per conflict.
+        """
+        choices = [0] * len(conflicts)
+        cluster_info = [None] * len(conflicts)
+        pending = []
+        
+        for cluster_id, members in enumerate(build_conflict_clusters(conflicts)):
+            cluster_conflicts = [conflicts[i] for i in members]
+            cluster_options = [options_per_conflict[i] for i in members]
+            
+            if len(members) >= self.exact_cluster_size:
+                future = self._get_pool().submit(solve_cluster_exact, cluster_conflicts,
+                                                  cluster_options, self.solver_time_limit)
+                pending.append((cluster_id, members, future))
+                solver = 'exact'
+            else:
+                for index, option_index in zip(members, solve_cluster_greedy(cluster_conflicts, cluster_options)):
+                    choices[index] = option_index
+                solver = 'greedy'
+            
+            for index in members:
+                cluster_info[index] = {'id': cluster_id, 'size': len(members), 'solver': solver}
+        
+        # Merge the exact solutions back in conflict order
+        for cluster_id, members, future in pending:
+            for index, option_index in zip(members, future.result()):
+                choices[index] = option_index
+        
+        return choices, cluster_info
+    
+    def _get_pool(self) -> ThreadPoolExecutor:
+        if self._solver_pool is None:
+            self._solver_pool = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                   thread_name_prefix='railoptix-solver')
+        return self._solver_pool
+    
+    def _evaluate_options(self, conflicts: List[Dict], options_per_conflict: List[List[Dict]]):
+        """Score every option with a look-ahead simulation of the trains around its conflict
+        
+        Runs for a batch of conflicts are simulated side by side in vectorized
+        simulator calls, which (unlike threads) do not serialize on the GIL. The
+        baseline and each conflict's lead option (least direct delay) go first;
+        the other options then run with a fixed cutoff derived from the lead's
+        score, so the same options are pruned on every run. Each option list is
+        then ranked best first and its measured figures replace the estimated
+        delay reduction and throughput impact.
+        """
+        by_station = self.simulator.trains_by_station()
+        jobs = []
+        
+        for index, conflict in enumerate(conflicts):
+            options = options_per_conflict[index]
+            train_ids = [conflict.get(key, {}).get('id') for key in ('train1', 'train2')]
+            trains = self.simulator.neighbourhood(train_ids, by_station) if options else []
+            if not trains:
+                continue  # Trains outside the simulated network keep the estimated figures
+            
+            scenarios = []
+            for option in options:
+                holds, reroutes = self._option_actions(option)
+                direct, weighted_direct = self._direct_delay(trains, holds, reroutes)
+                scenarios.append({'trains': trains, 'holds': holds, 'reroutes': reroutes,
+                                  'direct_delay': direct, 'weighted_direct_delay': weighted_direct})
+            lead = min(range(len(scenarios)), key=lambda i: scenarios[i]['weighted_direct_delay'])
+            jobs.append((index, trains, scenarios, lead))
+        
+        horizon = self.evaluation_horizon
+        for begin in range(0, len(jobs), self.evaluation_batch):
+            batch = jobs[begin:begin + self.evaluation_batch]
+            first = self.simulator.simulate_batch(
+                [run for _, trains, scenarios, lead in batch for run in ({'trains': trains}, scenarios[lead])],
+                horizon_minutes=horizon)
+            
+            rest = []
+            for position, (_, _, scenarios, lead) in enumerate(batch):
+                cutoff = first[2 * position + 1]['weighted_delay'] * (1 + self.prune_margin) + 1
+                rest.extend({**scenario, 'cutoff': cutoff} for i, scenario in enumerate(scenarios) if i != lead)
+            rest = iter(self.simulator.simulate_batch(rest, horizon_minutes=horizon))
+            
+            for position, (index, _, scenarios, lead) in enumerate(batch):
+                runs = [first[2 * position + 1] if i == lead else next(rest) for i in range(len(scenarios))]
+                for scenario, run in zip(scenarios, runs):
+                    run['direct_delay'] = scenario['direct_delay']
+                    run['weighted_direct_delay'] = scenario['weighted_direct_delay']
+                self._rank_options(options_per_conflict[index], first[2 * position], runs)
+    
+    def _option_actions(self, option: Dict):
+        """Holds and reroute minutes per train, as the simulator takes them"""
+        holds, reroutes = option_effects(option)
+        reroute_minutes = {}
+        for train_id, minutes in reroutes:
+            reroute_minutes[train_id] = max(reroute_minutes.get(train_id, 0), minutes)
+        return holds, reroute_minutes
+    
+    def _direct_delay(self, trains: List[Dict], holds: Dict[str, int], reroute_minutes: Dict[str, int]):
+        """Delay (plain and priority-weighted) an option imposes directly, as opposed to knock-on delay"""
+        weights = {train['id']: PRIORITY_WEIGHTS.get(train.get('priority'), 2) for train in trains}
+        # A train can be both held and rerouted; the simulator charges it both
+        direct = dict(holds)
+        for train_id, minutes in reroute_minutes.items():
+            direct[train_id] = direct.get(train_id, 0) + minutes
+        return (sum(minutes for train_id, minutes in direct.items() if train_id in weights),
+                sum(weights[train_id] * minutes for train_id, minutes in direct.items() if train_id in weights))
+    
+    def _rank_options(self, options: List[Dict], baseline: Dict, runs: List[Dict]):
+        """Attach measured impact to each option and sort the options best first"""
+        trains = len(baseline['trains']) or 1
+        baseline_efficiency = (trains - baseline['waiting_trains']) / trains * 100
+        baseline_throughput = baseline['throughput_per_hour'] or 1
+        
+        for option, run in zip(options, runs):
+            knock_on = run['total_added_delay'] - run['direct_delay']
+            weighted_knock_on = run['weighted_delay'] - run['weighted_direct_delay']
+            fuel = sum(
+                (baseline['trains'][train_id]['added_delay'] - result['added_delay'])
+                * IDLE_FUEL_LITRES_PER_MINUTE.get(self._train_type(train_id), 6)
+                for train_id, result in run['trains'].items()
+                if train_id in baseline['trains']
+            )
+            throughput_change = (run['throughput_per_hour'] - baseline_throughput) / baseline_throughput * 100
+            
+            option['evaluation'] = {
+                'simulated_trains': len(run['trains']),
+                'horizon_minutes': run['horizon_minutes'],
+                'added_delay': run['total_added_delay'],
+                'weighted_delay': run['weighted_delay'],
+                'delay_change': round(run['total_added_delay'] - baseline['total_added_delay'], 1),
+                'knock_on_delay_avoided': round(baseline['total_added_delay'] - knock_on, 1),
+                'throughput_per_hour': run['throughput_per_hour'],
+                'throughput_change': round(throughput_change, 1),
+                'efficiency_change': round((trains - run['waiting_trains']) / trains * 100 - baseline_efficiency, 1),
+                'fuel_litres_saved': round(fuel),
+                'pruned': run['pruned']
+            }
+            # The cluster solver charges holds and reroutes itself, so it is credited the
+            # (priority-weighted) knock-on delay the option avoids. A pruned run stopped
+            # part way, so its delay is only a lower bound and its throughput is unknown.
+            option['expected_delay_reduction'] = round(baseline['weighted_delay'] - weighted_knock_on)
+            if run['pruned']:
+                option['evaluation'].update({'throughput_per_hour': None, 'throughput_change': None,
+                                             'efficiency_change': None, 'fuel_litres_saved': None})
+            else:
+                option['throughput_impact'] = f"{throughput_change:+.0f}%"
+        
+        options.sort(key=lambda o: (o['evaluation']['pruned'], o['evaluation']['weighted_delay'],
+                                    -(o['evaluation']['throughput_per_hour'] or 0)))
+        for rank, option in enumerate(options, 1):
+            option['evaluation']['rank'] = rank
+    
+    def _train_type(self, train_id: str) -> str:
+        return self.simulator.data_manager.trains.get(train_id, {}).get('type')
+    
     def _generate_optimization_options(self, conflict: Dict) -> List[Dict]:
         """Generate multiple optimization options for a given conflict"""
         train1 = conflict.get('train1', {})
@@ -114,6 +311,19 @@ class TrainOptimizer:
         
         return options
     
+    def _fit_holds_to_blocks(self, options: List[Dict]):
+        """Lengthen holds to the time the held train's requested block actually becomes free"""
+        for option in options:
+            for action in option['actions']:
+                if action['action'] not in ('hold', 'slight_hold'):
+                    continue
+                request = self.block_reservations.pending.get(action['train_id'])
+                if not request:
+                    continue
+                action['block_id'] = self.block_reservations.block_id(request['row'])
+                action['duration'] = max(action['duration'],
+                                         self.block_reservations.required_hold_minutes(action['train_id']))
+    
     def _generate_explanation(self, conflict: Dict, option: Dict) -> str:
         """Generate human-readable explanation for the recommendation"""
         if not option:
@@ -129,27 +339,58 @@ class TrainOptimizer:
         
         return explanations.get(strategy, "Optimized based on current network conditions and train priorities.")
     
-    def _calculate_impact(self, conflict: Dict, option: Dict) -> Dict:
+    def _calculate_impact(self, conflict: Dict, option: Dict, options: List[Dict] = None) -> Dict:
         """Calculate the expected impact of implementing the recommendation"""
         if not option:
             return {'delay_reduction': 0, 'throughput_gain': 0, 'passenger_impact': 'neutral'}
         
+        evaluation = option.get('evaluation')
+        if evaluation is None:
+            # Not simulated (trains outside the network or no simulator attached)
+            return {
+                'delay_reduction': option.get('expected_delay_reduction', 0),
+                'throughput_gain': option.get('throughput_impact', '+0%'),
+                'passenger_impact': 'low' if option.get('strategy') == 'balanced' else 'minimal',
+                'network_efficiency': 'n/a',
+                'fuel_savings': 'n/a',
+                'confidence': 0,
+                'simulated': False
+            }
+        
         return {
-            'delay_reduction': option.get('expected_delay_reduction', 0),
-            'throughput_gain': option.get('throughput_impact', '+0%'),
+            'delay_reduction': evaluation['knock_on_delay_avoided'],
+            'net_delay_change': evaluation['delay_change'],
+            'throughput_gain': self._format_measured(evaluation['throughput_change'], '{:+.1f}%'),
             'passenger_impact': 'low' if option.get('strategy') == 'balanced' else 'minimal',
-            'network_efficiency': f"+{random.randint(5, 15)}%",
-            'fuel_savings': f"{random.randint(100, 500)} L",
-            'confidence': random.randint(85, 95)
+            'network_efficiency': self._format_measured(evaluation['efficiency_change'], '{:+.1f}%'),
+            'fuel_savings': self._format_measured(evaluation['fuel_litres_saved'], '{} L'),
+            'confidence': self._confidence(option, options or []),
+            'simulated': True,
+            'simulated_trains': evaluation['simulated_trains'],
+            'horizon_minutes': evaluation['horizon_minutes']
         }
     
+    def _format_measured(self, value, template: str) -> str:
+        # Figures of pruned runs are unknown
+        return 'n/a' if value is None else template.format(value)
+    
+    def _confidence(self, option: Dict, options: List[Dict]) -> int:
+        """How clearly the chosen option beat the runner-up in simulation (50-99)"""
+        scores = sorted(o['evaluation']['weighted_delay'] for o in options
+                        if o.get('evaluation') and o is not option)
+        if not scores:
+            return 60
+        runner_up = scores[0]
+        separation = max(0.0, runner_up - option['evaluation']['weighted_delay']) / max(runner_up, 1)
+        return int(min(99, 50 + 49 * separation))
+    
     def implement_suggestion(self, suggestion_id: str, conflict_id: str) -> Dict:
         """Implement an accepted suggestion and update system state"""
         if suggestion_id not in self.active_suggestions:
             return {
                 'success': False,
                 'error': 'Suggestion not found',
-                'timestamp': datetime.now().isoformat()
+                'timestamp': self.now().isoformat()
             }
         
         suggestion = self.active_suggestions[suggestion_id]
@@ -161,13 +402,13 @@ class TrainOptimizer:
             'conflict_id': conflict_id,
             'actions_taken': suggestion.get('recommended_option', {}).get('actions', []),
             'actual_delay_reduction': suggestion.get('impact_analysis', {}).get('delay_reduction', 0) + random.randint(-2, 2),
-            'implementation_time': datetime.now().isoformat(),
+            'implementation_time': self.now().isoformat(),
             'status': 'implemented'
         }
         
         # Add to history
         self.optimization_history.append({
-            'timestamp': datetime.now().isoformat(),
+            'timestamp': self.now().isoformat(),
             'suggestion': suggestion,
             'result': implementation_result
         })
@@ -177,25 +418,85 @@ class TrainOptimizer:
         
         return implementation_result
     
+    def validate_suggestions(self, requests: List[Dict], active_conflict_ids: set = None,
+                             suggestions: Dict[str, Dict] = None):
+        """Check a batch of accepted suggestions together before any of them is applied
+        
+        Each request is {'suggestion_id', 'conflict_id'}. A suggestion is rejected
+        if it is unknown, accepted twice, belongs to another or an already
+        resolved conflict, or reroutes a train that an earlier suggestion in the
+        batch holds or reroutes (holds on the same train simply overlap).
+        `suggestions` defaults to this optimizer's active suggestions. Returns
+        the valid (suggestion_id, conflict_id, suggestion) entries and the rejections.
+        """
+        suggestions = self.active_suggestions if suggestions is None else suggestions
+        valid, rejected = [], []
+        seen = set()
+        holds, reroutes = {}, {}  # train_id -> suggestion_id that claimed it
+        
+        for entry in requests:
+            suggestion_id, conflict_id = entry.get('suggestion_id'), entry.get('conflict_id')
+            suggestion = suggestions.get(suggestion_id)
+            error = None
+            if suggestion is None:
+                error = 'Suggestion not found'
+            elif suggestion_id in seen:
+                error = 'Duplicate suggestion in batch'
+            elif conflict_id and suggestion.get('conflict_id') != conflict_id:
+                error = 'Suggestion belongs to another conflict'
+            elif active_conflict_ids is not None and suggestion.get('conflict_id') not in active_conflict_ids:
+                error = 'Conflict is no longer active'
+            else:
+                option_holds, option_reroutes = option_effects(suggestion.get('recommended_option') or {})
+                for train_id, _ in option_reroutes:
+                    claimed = reroutes.get(train_id) or holds.get(train_id)
+                    if claimed:
+                        error = f"Train {train_id} is already held or rerouted by suggestion {claimed}"
+                        break
+                for train_id in option_holds:
+                    if error is None and train_id in reroutes:
+                        error = f"Train {train_id} is already rerouted by suggestion {reroutes[train_id]}"
+            
+            if error:
+                rejected.append({'suggestion_id': suggestion_id, 'conflict_id': conflict_id, 'error': error})
+                continue
+            seen.add(suggestion_id)
+            for train_id in option_holds:
+                holds.setdefault(train_id, suggestion_id)
+            for train_id, _ in option_reroutes:
+                reroutes[train_id] = suggestion_id
+            valid.append((suggestion_id, conflict_id or suggestion.get('conflict_id'), suggestion))
+        
+        return valid, rejected
+    
+    def implement_suggestions(self, requests: List[Dict], active_conflict_ids: set = None) -> Dict:
+        """Validate a batch of accepted suggestions together, then implement the valid ones"""
+        valid, rejected = self.validate_suggestions(requests, active_conflict_ids)
+        
+        implemented, affected_trains = [], set()
+        for suggestion_id, conflict_id, suggestion in valid:
+            affected_trains.update(action.get('train_id') for action in
+                                   (suggestion.get('recommended_option') or {}).get('actions', []))
+            implemented.append(self.implement_suggestion(suggestion_id, conflict_id))
+        affected_trains.discard(None)
+        
+        return {
+            'success': bool(implemented),
+            'implemented': implemented,
+            'rejected': rejected,
+            'affected_trains': sorted(affected_trains),
+            'timestamp': self.now().isoformat()
+        }
+    
     def run_simulation(self, scenario: Dict) -> Dict:
         """Run what-if simulation for given scenario"""
         simulation_id = str(uuid.uuid4())
+        started = datetime.now()
         
-        # Simulate different scenarios
-        scenarios = {
-            'current_state': {
-                'avg_delay': 12,
-                'throughput': 85,
-                'conflicts': 3,
-                'efficiency': 78
-            },
-            'optimized_state': {
-                'avg_delay': 6,
-                'throughput': 97,
-                'conflicts': 1,
-                'efficiency': 94
-            }
-        }
+        if self.simulator is not None:
+            scenarios = self._simulate_scenarios(scenario)
+        else:
+            scenarios = self._static_scenarios()
         
         # Generate simulation results
         simulation_results = {
@@ -205,12 +506,7 @@ class TrainOptimizer:
             'results': {
                 'before': scenarios['current_state'],
                 'after': scenarios['optimized_state'],
-                'improvements': {
-                    'delay_reduction': f"-{scenarios['current_state']['avg_delay'] - scenarios['optimized_state']['avg_delay']} min",
-                    'throughput_gain': f"+{scenarios['optimized_state']['throughput'] - scenarios['current_state']['throughput']}%",
-                    'conflict_reduction': f"-{scenarios['current_state']['conflicts'] - scenarios['optimized_state']['conflicts']} conflicts",
-                    'efficiency_gain': f"+{scenarios['optimized_state']['efficiency'] - scenarios['current_state']['efficiency']}%"
-                }
+                'improvements': self._improvements(scenarios['current_state'], scenarios['optimized_state'])
             },
             'recommendations': [
                 "Implement priority-based scheduling for Express trains",
@@ -218,12 +514,98 @@ class TrainOptimizer:
                 "Optimize signal timing at major junctions"
             ],
             'confidence': random.randint(88, 96),
-            'execution_time': f"{random.randint(2, 8)} seconds",
-            'timestamp': datetime.now().isoformat()
+            'execution_time': (f"{(datetime.now() - started).total_seconds():.2f} seconds" if self.simulator is not None
+                               else f"{random.randint(2, 8)} seconds"),
+            'timestamp': self.now().isoformat()
         }
+        if self.delay_predictor is not None:
+            simulation_results['results']['propagation'] = self._propagation_scenarios(scenario)
         
         return simulation_results
     
+    def _improvements(self, before: Dict, after: Dict) -> Dict:
+        return {
+            'delay_reduction': f"{after['avg_delay'] - before['avg_delay']:+g} min",
+            'throughput_gain': f"{after['throughput'] - before['throughput']:+g}%",
+            'conflict_reduction': f"{after['conflicts'] - before['conflicts']:+d} conflicts",
+            'efficiency_gain': f"{after['efficiency'] - before['efficiency']:+g}%"
+        }
+    
+    def _simulate_scenarios(self, scenario: Dict) -> Dict:
+        """Before/after figures from look-ahead runs without and with the recommended actions"""
+        holds, reroutes = self._recommended_actions()
+        
+        trains = self.simulator.data_manager.get_active_trains()
+        before, after = self.simulator.simulate_batch([
+            {'trains': trains},
+            {'trains': trains, 'holds': holds, 'reroutes': reroutes,
+             'priority_boost': float(scenario.get('priorityBoost', 0) or 0)}
+        ])
+        
+        # Throughput is indexed to the current state (= 100) so the gain reads as a percentage
+        baseline = before['throughput_per_hour'] or 1
+        
+        def summary(run: Dict) -> Dict:
+            trains = len(run['trains'])
+            return {
+                'avg_delay': run['avg_delay'],
+                'throughput': round(run['throughput_per_hour'] / baseline * 100, 1),
+                'conflicts': run['waiting_trains'],
+                'efficiency': round((trains - run['waiting_trains']) / trains * 100, 1) if trains else 100
+            }
+        
+        return {'current_state': summary(before), 'optimized_state': summary(after)}
+    
+    def _propagation_scenarios(self, scenario: Dict) -> Dict:
+        """Knock-on delays predicted from current delays, and with the recommended actions applied
+        
+        `scenario['delays']` ({train_id: minutes}) injects what-if incidents into both runs.
+        """
+        incidents = {train_id: float(minutes) for train_id, minutes in (scenario.get('delays') or {}).items()}
+        holds, reroutes = self._recommended_actions()
+        with_actions = dict(incidents)
+        for train_id, minutes in list(holds.items()) + list(reroutes.items()):
+            with_actions[train_id] = with_actions.get(train_id, 0) + minutes
+        
+        if self.delay_predictor.matrix is None:
+            self.delay_predictor.refresh()
+        before = self.delay_predictor.predict(incidents)
+        after = self.delay_predictor.predict(with_actions)
+        return {
+            'before': self.delay_predictor.summary(before),
+            'after': self.delay_predictor.summary(after),
+            'knock_on_change': round(after['total_knock_on'] - before['total_knock_on'], 1)
+        }
+    
+    def _recommended_actions(self):
+        """Longest hold and reroute per train over the recommended options of active suggestions"""
+        holds, reroutes = {}, {}
+        for suggestion in self.active_suggestions.values():
+            if suggestion.get('recommended_option'):
+                option_holds, option_reroutes = option_effects(suggestion['recommended_option'])
+                for train_id, minutes in option_holds.items():
+                    holds[train_id] = max(holds.get(train_id, 0), minutes)
+                for train_id, minutes in option_reroutes:
+                    reroutes[train_id] = max(reroutes.get(train_id, 0), minutes)
+        return holds, reroutes
+    
+    def _static_scenarios(self) -> Dict:
+        """Fixed demo figures used when no simulator is attached"""
+        return {
+            'current_state': {
+                'avg_delay': 12,
+                'throughput': 85,
+                'conflicts': 3,
+                'efficiency': 78
+            },
+            'optimized_state': {
+                'avg_delay': 6,
+                'throughput': 97,
+                'conflicts': 1,
+                'efficiency': 94
+            }
+        }
+    
     def get_optimization_history(self) -> List[Dict]:
         """Get history of optimization decisions"""
         return self.optimization_history
@@ -236,5 +618,5 @@ class TrainOptimizer:
             'avg_implementation_time': f"{random.randint(2, 8)} seconds",
             'success_rate': f"{random.randint(92, 98)}%",
             'network_efficiency': f"{random.randint(85, 95)}%",
-            'timestamp': datetime.now().isoformat()
+            'timestamp': self.now().isoformat()
         }
@@ -0,0 +1,299 @@
+"""
+RailOptiX Platform Allocator
+Station platform assignment using per-station occupancy timelines and interval colouring
+"""
+
+import heapq
+from bisect import bisect_left, insort
+from datetime import datetime, timedelta
+from typing import List, Dict, Any, Optional
+
+# Minutes a train occupies its arrival platform, by train type
+DWELL_MINUTES = {'Express': 10, 'Passenger': 10, 'Freight': 30}
+# Clearance between two trains on the same platform
+BUFFER_MINUTES = 3
+
+# Passenger platform lengths (in coaches), cycled over a station's platforms
+PASSENGER_PLATFORM_LENGTHS = [26, 24, 24, 18]
+# The last platform is a loop line usable by freight as well
+LOOP_LINE_LENGTH = 60
+
+
+def default_platforms(station: Dict) -> List[Dict]:
+    """Platform layout for a station without detailed platform data"""
+    count = max(1, int(station.get('platforms') or 6))
+    platforms = [
+        {'number': number, 'length': PASSENGER_PLATFORM_LENGTHS[(number - 1) % len(PASSENGER_PLATFORM_LENGTHS)],
+         'category': 'passenger'}
+        for number in range(1, count)
+    ]
+    platforms.append({'number': count, 'length': LOOP_LINE_LENGTH, 'category': 'any'})
+    return platforms
+
+
+def train_length(train: Dict) -> int:
+    consist = train.get('consist') or {}
+    return int(consist.get('coaches') or consist.get('wagons') or 0)
+
+
+def _parse_time(value) -> Optional[datetime]:
+    if isinstance(value, datetime):
+        return value
+    try:
+        parsed = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    except (TypeError, ValueError):
+        return None
+    return parsed if parsed.tzinfo is None else parsed.replace(tzinfo=None)
+
+
+class PlatformAllocator:
+    """Assigns arrival platforms and keeps a sorted occupancy timeline per platform"""
+
+    def __init__(self):
+        self.platforms = {}     # station_id -> list of platform dicts
+        self.station_names = {}
+        self.timelines = {}     # (station_id, platform) -> sorted [(start, end, train_id)]
+        self.assignments = {}   # train_id -> occupancy request incl. assigned platform
+        self.unallocated = {}   # train_id -> occupancy request that found no platform
+        self.reallocated = []   # waiting trains that got a platform since the last pop
+        # Change tracking for incremental readers: every timeline change bumps `revision`
+        # and records it per timeline; a full reallocation sets `reset_revision`
+        self.revision = 0
+        self.reset_revision = 0
+        self.timeline_revisions = {}  # (station_id, platform) -> revision of its last change
+
+    def set_station(self, station: Dict, platforms: List[Dict] = None):
+        """Register a station and its platform layout"""
+        self.platforms[station['id']] = platforms or default_platforms(station)
+        self.station_names[station['id']] = station.get('name', station['id'])
+
+    def build_request(self, train: Dict) -> Optional[Dict]:
+        """Occupancy request for the train's arrival platform at its destination"""
+        arrival = _parse_time(train.get('scheduled_arrival'))
+        station_id = train.get('to_station')
+        if arrival is None or station_id not in self.platforms:
+            return None
+
+        arrival = arrival + timedelta(minutes=train.get('delay', 0) or 0)
+        dwell = DWELL_MINUTES.get(train.get('type'), 10)
+        return {
+            'train_id': train['id'],
+            'station_id': station_id,
+            'start': arrival,
+            'end': arrival + timedelta(minutes=dwell + BUFFER_MINUTES),
+            'length': train_length(train),
+            'freight': train.get('type') == 'Freight',
+            'preferred_platform': train.get('platform'),
+            'train': {
+                'id': train['id'],
+                'name': train.get('name', 'Train'),
+                'type': train.get('type'),
+                'priority': train.get('priority', 'medium'),
+                'delay': train.get('delay', 0)
+            }
+        }
+
+    def allocate_all(self, trains: List[Dict]) -> Dict[str, Optional[int]]:
+        """Allocate every train from scratch, station by station (O(n log n) per station)"""
+        self.timelines = {}
+        self.assignments = {}
+        self.unallocated = {}
+        self.reallocated = []
+        self.revision += 1
+        self.reset_revision = self.revision
+        self.timeline_revisions = {}
+
+        by_station = {}
+        for train in trains:
+            request = self.build_request(train)
+            if request:
+                by_station.setdefault(request['station_id'], []).append(request)
+
+        for station_id, requests in by_station.items():
+            self._colour_station(station_id, requests)
+
+        return {train_id: request['platform'] for train_id, request in self.assignments.items()}
+
+    def _colour_station(self, station_id: str, requests: List[Dict]):
+        """Interval partitioning: sweep by arrival and give each train the best free platform
+
+        Busy platforms sit in a heap keyed by the time they clear; free
+        platforms are kept sorted by length so the shortest platform that
+        fits is taken, leaving long platforms for long trains.
+        """
+        platforms = self.platforms[station_id]
+        free = {'passenger': [], 'any': []}
+        for platform in platforms:
+            free[platform['category']].append((platform['length'], platform['number']))
+        for pool in free.values():
+            pool.sort()
+        categories = {platform['number']: platform['category'] for platform in platforms}
+        lengths = {platform['number']: platform['length'] for platform in platforms}
+        busy = []  # (end, platform, train_id)
+
+        for request in sorted(requests, key=lambda r: (r['start'], r['end'])):
+            while busy and busy[0][0] <= request['start']:
+                _, number, _ = heapq.heappop(busy)
+                insort(free[categories[number]], (lengths[number], number))
+
+            chosen = None
+            for category in (['any'] if request['freight'] else ['passenger', 'any']):
+                pool = free[category]
+                index = bisect_left(pool, (request['length'], -1))
+                if index < len(pool):
+                    chosen = pool.pop(index)[1]
+                    break
+
+            if chosen is None:
+                self._mark_unallocated(request)
+                continue
+
+            heapq.heappush(busy, (request['end'], chosen, request['train_id']))
+            self._assign(request, chosen)
+
+    def reschedule(self, train: Dict) -> Optional[int]:
+        """Incrementally re-place one train after its delay or schedule changed
+
+        The current platform is kept when it is still free, otherwise the
+        shortest compatible free platform is used. Trains still waiting for a
+        platform at the same station get another chance afterwards.
+        """
+        previous = self.assignments.get(train['id'])
+        self.release(train['id'], retry=False)
+
+        request = self.build_request(train)
+        if request is None:
+            return None
+        if previous:
+            request['preferred_platform'] = previous['platform']
+
+        platform = self._place(request)
+        self._retry_unallocated(request['station_id'])
+        if previous and previous['station_id'] != request['station_id']:
+            self._retry_unallocated(previous['station_id'])
+        return platform
+
+    def release(self, train_id: str, retry: bool = True):
+        """Remove a train's platform occupancy"""
+        self.unallocated.pop(train_id, None)
+        request = self.assignments.pop(train_id, None)
+        if request is None:
+            return
+        timeline = self.timelines.get((request['station_id'], request['platform']), [])
+        index = bisect_left(timeline, (request['start'], request['end'], train_id))
+        if index < len(timeline) and timeline[index][2] == train_id:
+            timeline.pop(index)
+            self._touch((request['station_id'], request['platform']))
+        if retry:
+            self._retry_unallocated(request['station_id'])
+
+    def changed_since(self, revision: int) -> Optional[List[tuple]]:
+        """Timelines changed after `revision` (None if everything was reallocated since)"""
+        if revision < self.reset_revision:
+            return None
+        return [key for key, changed in self.timeline_revisions.items() if changed > revision]
+
+    def get_platform(self, train_id: str) -> Optional[int]:
+        request = self.assignments.get(train_id)
+        return request['platform'] if request else None
+
+    def pop_reallocated(self) -> List[str]:
+        """Trains that were given a platform as a side effect of another change"""
+        reallocated, self.reallocated = self.reallocated, []
+        return reallocated
+
+    def is_free(self, station_id: str, platform: int, start: datetime, end: datetime,
+                ignore_train: str = None) -> bool:
+        """Check whether a platform is unoccupied over [start, end)"""
+        return self._blocking_entry(station_id, platform, start, end, ignore_train) is None
+
+    def get_occupancy(self, station_id: str) -> Dict[int, List[Dict]]:
+        """Occupancy timeline of every platform at a station"""
+        return {
+            platform['number']: [
+                {'train_id': train_id, 'start': start.isoformat(), 'end': end.isoformat()}
+                for start, end, train_id in self.timelines.get((station_id, platform['number']), [])
+            ]
+            for platform in self.platforms.get(station_id, [])
+        }
+
+    def get_platform_conflicts(self) -> List[Dict]:
+        """Trains without a platform and the train blocking the best platform for them"""
+        conflicts = []
+        for request in self.unallocated.values():
+            blocking = None
+            for platform in self._compatible_platforms(request):
+                entry = self._blocking_entry(request['station_id'], platform['number'],
+                                             request['start'], request['end'])
+                if entry and (blocking is None or entry[1] < blocking[1][1]):
+                    blocking = (platform['number'], entry)
+            if blocking is None:
+                continue
+
+            number, (start, end, blocking_train) = blocking
+            conflicts.append({
+                'station_id': request['station_id'],
+                'station_name': self.station_names.get(request['station_id'], request['station_id']),
+                'platform': number,
+                'train': request['train'],
+                'blocking_train': self.assignments[blocking_train]['train'],
+                'arrival': request['start'],
+                'blocking_arrival': start,
+                'wait_minutes': max(1, int((end - request['start']).total_seconds() // 60))
+            })
+        return conflicts
+
+    def _place(self, request: Dict) -> Optional[int]:
+        candidates = self._compatible_platforms(request)
+        preferred = request.get('preferred_platform')
+        candidates.sort(key=lambda p: (p['number'] != preferred, p['category'] != 'passenger', p['length']))
+
+        for platform in candidates:
+            if self.is_free(request['station_id'], platform['number'], request['start'], request['end']):
+                self._assign(request, platform['number'])
+                return platform['number']
+
+        self._mark_unallocated(request)
+        return None
+
+    def _retry_unallocated(self, station_id: str):
+        waiting = [request for request in self.unallocated.values() if request['station_id'] == station_id]
+        for request in sorted(waiting, key=lambda r: r['start']):
+            del self.unallocated[request['train_id']]
+            if self._place(request) is not None:
+                self.reallocated.append(request['train_id'])
+
+    def _compatible_platforms(self, request: Dict) -> List[Dict]:
+        return [
+            platform for platform in self.platforms.get(request['station_id'], [])
+            if platform['length'] >= request['length']
+            and (platform['category'] == 'any' or not request['freight'])
+        ]
+
+    def _blocking_entry(self, station_id: str, platform: int, start: datetime, end: datetime,
+                        ignore_train: str = None):
+        """First occupancy overlapping [start, end), found by bisecting the sorted timeline"""
+        timeline = self.timelines.get((station_id, platform), [])
+        index = bisect_left(timeline, (start,))
+        # The previous entry can still overlap if it started earlier
+        for entry in timeline[max(0, index - 1):]:
+            if entry[0] >= end:
+                break
+            if entry[1] > start and entry[2] != ignore_train:
+                return entry
+        return None
+
+    def _assign(self, request: Dict, platform: int):
+        request['platform'] = platform
+        self.assignments[request['train_id']] = request
+        insort(self.timelines.setdefault((request['station_id'], platform), []),
+               (request['start'], request['end'], request['train_id']))
+        self._touch((request['station_id'], platform))
+
+    def _touch(self, key: tuple):
+        self.revision += 1
+        self.timeline_revisions[key] = self.revision
+
+    def _mark_unallocated(self, request: Dict):
+        request['platform'] = None
+        self.unallocated[request['train_id']] = request
@@ -0,0 +1,380 @@
+#!/usr/bin/env python3
+"""
+RailOptiX Replay Runner
+Replays a recorded stream of train updates through the detector and optimizer on a virtual clock
+
+Usage:
+    python replay_runner.py record --scale division --hours 6 -o day.jsonl
+    python replay_runner.py replay day.jsonl --output replay.json
+    python replay_runner.py replay day.jsonl --network-file division.rxn --tick-seconds 30
+"""
+
+import argparse
+import json
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import List, Dict, Any, Iterable
+
+from data_manager import DataManager
+from conflict_detector import ConflictDetector
+from optimization_engine import TrainOptimizer
+from network_simulator import LookaheadSimulator
+from delay_propagation import DelayPropagationModel
+from network_generator import SyntheticNetworkGenerator
+
+RECORDING_FORMAT_VERSION = 1
+
+
+def _summary(samples: List[float]) -> Dict[str, Any]:
+    if not samples:
+        return {'count': 0}
+    ordered = sorted(samples)
+    return {
+        'count': len(ordered),
+        'mean': round(statistics.fmean(ordered), 3),
+        'p50': round(ordered[len(ordered) // 2], 3),
+        'p95': round(ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))], 3),
+        'max': round(ordered[-1], 3)
+    }
+
+
+class VirtualClock:
+    """Replay time; its `now` is passed to the components in place of datetime.now"""
+
+    def __init__(self, start: datetime):
+        self.time = start
+
+    def now(self) -> datetime:
+        return self.time
+
+
+# --- recordings ---------------------------------------------------------------
+
+def read_recording(path: str):
+    """Return the recording header and its events in time order
+
+    A recording is JSON lines: an optional {"recording": {...}} header, then
+    events {"time", "train_id", "updates"} with "action" "add" (and a full
+    "train") or "remove" for trains entering or leaving the network.
+    """
+    header, events = {}, []
+    with open(path, encoding='utf-8') as handle:
+        for line in handle:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            if 'recording' in entry:
+                header = entry['recording']
+            else:
+                events.append(entry)
+    events.sort(key=lambda event: event['time'])
+    return header, events
+
+
+def record_synthetic_day(network: Dict[str, Any], start: datetime, hours: float, seed: int = 42) -> List[Dict]:
+    """Build a recording from a generated timetable with randomly drifting delays
+
+    Every train first reports where it stands at `start`, then reports its
+    delay at each stop it reaches before the recording ends.
+    """
+    rng = random.Random(seed)
+    end = start + timedelta(hours=hours)
+    stations = {station['id']: station for station in network['stations']}
+    events = []
+
+    for train in network['trains']:
+        delay = train.get('delay') or 0
+        first = stations[train['route'][0]]
+        current = {'current_station': first['id'], 'delay': delay,
+                   'position': {'lat': first['lat'], 'lng': first['lng']}}
+        for index, (station, arrival, _) in enumerate(network['timetable'][train['id']]):
+            if index:
+                delay = max(0, delay + rng.choice((-2, -1, 0, 0, 1, 2, 3)))
+                if rng.random() < 0.03:  # Occasional incident
+                    delay += rng.randint(5, 25)
+            actual = datetime.fromisoformat(arrival) + timedelta(minutes=delay)
+            if actual >= end:
+                break
+            update = {
+                'current_station': station,
+                'delay': delay,
+                'position': {'lat': stations[station]['lat'], 'lng': stations[station]['lng']}
+            }
+            if actual <= start:
+                current = update
+                continue
+            events.append({'time': actual.isoformat(), 'train_id': train['id'], 'updates': update})
+        events.append({'time': start.isoformat(), 'train_id': train['id'], 'updates': current})
+
+    events.sort(key=lambda event: event['time'])
+    return events
+
+
+# --- replaying ----------------------------------------------------------------
+
+class ReplayRunner:
+    """Feeds recorded events into the backend tick by tick, as fast as the components run
+
+    Each tick applies the events recorded since the previous tick, then runs
+    conflict detection and, for new conflicts, the optimizer, exactly as the
+    live update loop does but without sleeping between ticks.
+    """
+
+    def __init__(self, data_manager: DataManager, conflict_detector: ConflictDetector,
+                 optimizer: TrainOptimizer, clock: VirtualClock, tick_seconds: float = 60,
+                 outcome_minutes: int = None):
+        self.data_manager = data_manager
+        self.conflict_detector = conflict_detector
+        self.optimizer = optimizer
+        self.clock = clock
+        self.tick = timedelta(seconds=tick_seconds)
+        self.outcome_minutes = outcome_minutes or optimizer.evaluation_horizon
+
+        self.ticks = 0
+        self.detect_ms = []
+        self.solve_ms = []
+        self.solved_conflicts = 0
+        self.detection_lag = []
+        self.time_driven_conflicts = 0
+        self.lead_minutes = []
+        self.outcomes = []
+        self._delays = {}  # train_id -> [(time, recorded delay)]
+
+    def run(self, events: Iterable[Dict], start: datetime = None) -> Dict[str, Any]:
+        events = list(events)
+        start = start or (datetime.fromisoformat(events[0]['time']) if events else self.clock.time)
+        tick_time = start
+        pending = []
+
+        wall_start = time.perf_counter()
+        for event in events:
+            event_time = datetime.fromisoformat(event['time'])
+            while event_time > tick_time:
+                self._run_tick(tick_time, pending)
+                pending = []
+                tick_time += self.tick
+            pending.append(event)
+            delay = (event.get('updates') or event.get('train') or {}).get('delay')
+            if delay is not None:
+                self._delays.setdefault(event['train_id'], []).append((event_time, delay))
+        self._run_tick(tick_time, pending)
+        wall_seconds = time.perf_counter() - wall_start
+
+        simulated_hours = (tick_time - start).total_seconds() / 3600
+        return {
+            'replay': {
+                'start': start.isoformat(),
+                'end': tick_time.isoformat(),
+                'events': len(events),
+                'ticks': self.ticks,
+                'tick_seconds': self.tick.total_seconds(),
+                'simulated_hours': round(simulated_hours, 3),
+                'wall_seconds': round(wall_seconds, 3),
+                'simulated_hours_per_second': round(simulated_hours / wall_seconds, 3) if wall_seconds else None
+            },
+            'detection': {
+                'conflicts': len(self.outcomes),
+                'detect_ms': _summary(self.detect_ms),
+                'lag_seconds': _summary(self.detection_lag),
+                'time_driven_conflicts': self.time_driven_conflicts,
+                'lead_minutes': _summary(self.lead_minutes)
+            },
+            'solver': {
+                'ticks_with_conflicts': len(self.solve_ms),
+                'solve_ms_per_tick': _summary(self.solve_ms),
+                'solve_ms_per_conflict': round(sum(self.solve_ms) / self.solved_conflicts, 3)
+                if self.solved_conflicts else None
+            },
+            'quality': self._score_outcomes(tick_time),
+            'timestamp': datetime.now().isoformat()
+        }
+
+    def _run_tick(self, now: datetime, events: List[Dict]):
+        self.clock.time = now
+        self.ticks += 1
+
+        updates = {}
+        received = {}  # train_id -> time of its latest event applied on this tick
+        for event in events:
+            received[event['train_id']] = datetime.fromisoformat(event['time'])
+            action = event.get('action', 'update')
+            if action == 'add':
+                self.data_manager.add_train({**event['train'], 'id': event['train_id']})
+            elif action == 'remove':
+                self.data_manager.remove_train(event['train_id'])
+                updates.pop(event['train_id'], None)
+            elif event['train_id'] in self.data_manager.trains:
+                updates.setdefault(event['train_id'], {}).update(event['updates'])
+        self.data_manager.apply_train_updates(updates)
+
+        started = time.perf_counter()
+        new_conflicts = self.conflict_detector.detect_conflicts()
+        self.detect_ms.append((time.perf_counter() - started) * 1000)
+        if not new_conflicts:
+            return
+
+        started = time.perf_counter()
+        suggestions = self.optimizer.get_recommendations(new_conflicts)
+        self.solve_ms.append((time.perf_counter() - started) * 1000)
+        self.solved_conflicts += len(new_conflicts)
+
+        for conflict, suggestion in zip(new_conflicts, suggestions):
+            train_ids = [conflict.get(key, {}).get('id') for key in ('train1', 'train2')]
+            train_ids = [train_id for train_id in train_ids if train_id in self.data_manager.trains]
+            # A conflict first reported on the tick that applied an event of one of its
+            # trains is traced to that event (each event once). Anything reported later
+            # comes from time passing, not from an event, and has no detection lag
+            caused_by = [received.pop(train_id) for train_id in train_ids if train_id in received]
+            if caused_by:
+                self.detection_lag.append((now - max(caused_by)).total_seconds())
+            else:
+                self.time_driven_conflicts += 1
+            if conflict.get('estimated_time'):
+                lead = datetime.fromisoformat(conflict['estimated_time']) - now
+                self.lead_minutes.append(lead.total_seconds() / 60)
+
+            recommended = suggestion.get('recommended_option') or {}
+            self.outcomes.append({
+                'detected_at': now,
+                'train_ids': train_ids,
+                'delays': {train_id: self.data_manager.trains[train_id].get('delay') or 0 for train_id in train_ids},
+                'predicted_delay': conflict.get('potential_delay') or 0,
+                'claimed_reduction': recommended.get('expected_delay_reduction'),
+                'simulated': 'evaluation' in recommended
+            })
+
+    def _delay_at(self, train_id: str, when: datetime, default: int) -> int:
+        delay = default
+        for recorded_at, recorded in self._delays.get(train_id, []):
+            if recorded_at > when:
+                break
+            delay = recorded
+        return delay
+
+    def _score_outcomes(self, end: datetime) -> Dict[str, Any]:
+        """Compare each conflict's prediction and recommendation with what the recording shows
+
+        The recording is what actually happened without our suggestions, so
+        the delay the involved trains really lost over the outcome window is
+        the delay a recommendation could at most have saved.
+        """
+        window = timedelta(minutes=self.outcome_minutes)
+        predicted, actuals, claims, overclaims = [], [], [], 0
+        materialised = 0
+        for outcome in self.outcomes:
+            if outcome['detected_at'] + window > end or not outcome['train_ids']:
+                continue  # Outcome window not covered by the recording
+            due = outcome['detected_at'] + window
+            actual = max(self._delay_at(train_id, due, delay) - delay
+                         for train_id, delay in outcome['delays'].items())
+            actual = max(0, actual)
+            actuals.append(actual)
+            predicted.append(outcome['predicted_delay'])
+            materialised += actual > 0
+            if outcome['simulated'] and outcome['claimed_reduction'] is not None:
+                claims.append(outcome['claimed_reduction'])
+                overclaims += outcome['claimed_reduction'] > actual
+
+        scored = len(actuals)
+        errors = [p - a for p, a in zip(predicted, actuals)]
+        return {
+            'outcome_minutes': self.outcome_minutes,
+            'conflicts_scored': scored,
+            'materialised_rate': round(materialised / scored * 100, 1) if scored else None,
+            'mean_predicted_delay': round(statistics.fmean(predicted), 2) if scored else None,
+            'mean_actual_delay': round(statistics.fmean(actuals), 2) if scored else None,
+            'delay_mae_minutes': round(statistics.fmean(abs(e) for e in errors), 2) if scored else None,
+            'delay_bias_minutes': round(statistics.fmean(errors), 2) if scored else None,
+            'simulated_recommendations': len(claims),
+            'mean_claimed_reduction': round(statistics.fmean(claims), 2) if claims else None,
+            'overclaim_rate': round(overclaims / len(claims) * 100, 1) if claims else None
+        }
+
+
+def build_replay(header: Dict[str, Any], clock: VirtualClock, network_file: str = None,
+                 network_path: str = None, scale: str = None, seed: int = None):
+    """Load the recorded network into fresh components running on the replay clock"""
+    data_manager = DataManager(now=clock.now)
+    if network_file:
+        data_manager.load_compiled(network_file)
+    else:
+        if network_path:
+            from timetable_store import read_source
+
+            network = read_source(network_path)
+        else:
+            network = SyntheticNetworkGenerator(seed if seed is not None else header.get('seed', 42)).generate(
+                scale or header.get('scale', 'division'), start_time=clock.time)
+        data_manager.load_network(network['stations'], network['trains'], network['sections'])
+
+    delay_predictor = DelayPropagationModel(data_manager)
+    conflict_detector = ConflictDetector(platform_allocator=data_manager.platform_allocator,
+                                         block_reservations=data_manager.block_reservations,
+                                         delay_predictor=delay_predictor,
+                                         simulated_conflicts=False, now=clock.now)
+    optimizer = TrainOptimizer(block_reservations=data_manager.block_reservations,
+                               simulator=LookaheadSimulator(data_manager),
+                               delay_predictor=delay_predictor, now=clock.now)
+    return data_manager, conflict_detector, optimizer
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description='RailOptiX replay / backtest runner')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    record_parser = commands.add_parser('record', help='Record a synthetic day from a generated timetable')
+    record_parser.add_argument('--scale', default='division')
+    record_parser.add_argument('--seed', type=int, default=42)
+    record_parser.add_argument('--hours', type=float, default=6)
+    record_parser.add_argument('--start', help='Recording start (ISO time, default: this hour)')
+    record_parser.add_argument('-o', '--output', required=True)
+
+    replay_parser = commands.add_parser('replay', help='Replay a recording and report detector/optimizer quality')
+    replay_parser.add_argument('recording')
+    replay_parser.add_argument('--network-file', help='Network compiled with timetable_store.py')
+    replay_parser.add_argument('--network', help='Network JSON file or CSV directory')
+    replay_parser.add_argument('--scale', help='Synthetic network scale (default: from the recording)')
+    replay_parser.add_argument('--seed', type=int)
+    replay_parser.add_argument('--tick-seconds', type=float, default=60, help='Virtual time between ticks')
+    replay_parser.add_argument('--outcome-minutes', type=int, help='Window for judging outcomes')
+    replay_parser.add_argument('--output', help='Write the JSON report here')
+    args = parser.parse_args(argv)
+
+    if args.command == 'record':
+        start = datetime.fromisoformat(args.start) if args.start else datetime.now().replace(minute=0, second=0,
+                                                                                             microsecond=0)
+        network = SyntheticNetworkGenerator(args.seed).generate(args.scale, start_time=start)
+        events = record_synthetic_day(network, start, args.hours, args.seed)
+        header = {'format_version': RECORDING_FORMAT_VERSION, 'scale': args.scale, 'seed': args.seed,
+                  'start': start.isoformat(), 'hours': args.hours, 'events': len(events)}
+        with open(args.output, 'w', encoding='utf-8') as handle:
+            handle.write(json.dumps({'recording': header}) + '\n')
+            for event in events:
+                handle.write(json.dumps(event) + '\n')
+        print(json.dumps(header, indent=2))
+        return 0
+
+    header, events = read_recording(args.recording)
+    start = datetime.fromisoformat(header['start']) if header.get('start') else \
+        datetime.fromisoformat(events[0]['time']) if events else datetime.now()
+
+    random.seed(header.get('seed', 42))
+    clock = VirtualClock(start)
+    components = build_replay(header, clock, args.network_file, args.network, args.scale, args.seed)
+    runner = ReplayRunner(*components, clock, tick_seconds=args.tick_seconds,
+                          outcome_minutes=args.outcome_minutes)
+    report = runner.run(events, start)
+
+    report['recording'] = {**header, 'path': args.recording}
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as handle:
+            json.dump(report, handle, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
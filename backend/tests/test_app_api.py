@@ -0,0 +1,61 @@
+import threading
+
+import pytest
+
+import app as backend
+
+
+@pytest.fixture
+def client():
+    return backend.app.test_client()
+
+
+def test_admin_endpoints_closed_without_token(client, monkeypatch):
+    monkeypatch.delenv('RAILOPTIX_ADMIN_TOKEN', raising=False)
+    assert client.get('/api/admin/profiler').status_code == 403
+
+
+def test_arm_rejects_non_numeric_count(client, monkeypatch):
+    monkeypatch.setenv('RAILOPTIX_ADMIN_TOKEN', 'secret')
+    response = client.post('/api/admin/profiler/arm', json={'count': 'abc'},
+                           headers={'X-Admin-Token': 'secret'})
+    assert response.status_code == 400
+    assert not backend.tick_profiler.is_armed()
+
+
+def test_accept_suggestions_redetects_only_the_touched_trains(client, monkeypatch):
+    conflicts = backend.conflict_detector.get_active_conflicts()
+    suggestions = backend.optimizer.get_recommendations(conflicts)
+    scopes = []
+    detect = backend.conflict_detector.detect_conflicts
+    monkeypatch.setattr(backend.conflict_detector, 'detect_conflicts',
+                        lambda train_ids=None: scopes.append(train_ids) or detect(train_ids))
+
+    response = client.post('/api/accept-suggestions', json={'suggestions': [
+        {'suggestion_id': suggestion['id'], 'conflict_id': suggestion['conflict_id']}
+        for suggestion in suggestions] + [{'suggestion_id': 'missing'}]})
+    batch = response.get_json()
+
+    assert batch['implemented']
+    assert len(batch['implemented']) + len(batch['rejected']) == len(suggestions) + 1
+    assert {'suggestion_id': 'missing', 'conflict_id': None, 'error': 'Suggestion not found'} in batch['rejected']
+    # One scoped re-detect for the whole batch
+    assert scopes == [set(batch['affected_trains'])]
+    assert not {result['conflict_id'] for result in batch['implemented']} & \
+        {conflict['id'] for conflict in backend.conflict_detector.get_active_conflicts()}
+
+
+def test_accept_suggestions_waits_for_the_tick_loop(client):
+    responses = []
+    with backend.detection_lock:
+        request = threading.Thread(target=lambda: responses.append(
+            client.post('/api/accept-suggestions', json={'suggestions': [{'suggestion_id': 'missing'}]})))
+        request.start()
+        request.join(0.2)
+        assert request.is_alive() and not responses
+    request.join(5)
+    assert responses[0].get_json()['rejected'][0]['error'] == 'Suggestion not found'
+
+
+def test_accept_suggestions_requires_a_list(client):
+    assert client.post('/api/accept-suggestions', json={'suggestions': []}).status_code == 400
@@ -0,0 +1,28 @@
+from benchmark_suite import compare_results
+
+
+def report(medians, trains=400, revision='abc123'):
+    return {'scale': 'division', 'seed': 42, 'network': {'trains': trains}, 'backend_revision': revision,
+            'results': {name: {'median_ms': median} for name, median in medians.items()}}
+
+
+def test_compare_results_flags_regressions_above_the_threshold():
+    comparison = compare_results(report({'detect': 12.0, 'recommend': 5.0, 'simulate': 3.0, 'new_path': 1.0}),
+                                 report({'detect': 10.0, 'recommend': 5.0, 'simulate': 0, 'gone': 2.0}),
+                                 threshold=1.10)
+
+    assert comparison['baseline_revision'] == 'abc123'
+    assert comparison['threshold'] == 1.10
+    assert comparison['same_workload']
+    # Paths without a usable baseline median are skipped
+    assert comparison['paths'] == {
+        'detect': {'baseline_median_ms': 10.0, 'current_median_ms': 12.0, 'ratio': 1.2, 'regression': True},
+        'recommend': {'baseline_median_ms': 5.0, 'current_median_ms': 5.0, 'ratio': 1.0, 'regression': False}
+    }
+
+
+def test_compare_results_notices_a_different_workload():
+    comparison = compare_results(report({'detect': 9.0}), report({'detect': 10.0}, trains=6000))
+    assert not comparison['same_workload']
+    assert comparison['paths']['detect'] == {'baseline_median_ms': 10.0, 'current_median_ms': 9.0,
+                                             'ratio': 0.9, 'regression': False}
@@ -0,0 +1,73 @@
+from datetime import datetime
+
+import numpy as np
+
+from block_reservations import BlockReservationTable, FREE
+
+START = datetime(2026, 1, 1, 8, 0)
+
+
+def table():
+    sections = [{'id': 'A-B', 'from_station': 'A', 'to_station': 'B', 'length_km': 20, 'tracks': 1}]
+    return BlockReservationTable(sections, slot_seconds=60, horizon_minutes=60, start_time=START)
+
+
+def test_single_line_shares_blocks_in_both_directions():
+    reservations = table()
+    assert reservations.route_blocks('A', 'B') == [0, 1]
+    assert reservations.route_blocks('B', 'A') == [1, 0]
+
+
+def test_reserve_and_are_free():
+    reservations = table()
+    accepted = reservations.reserve([0, 1], ['T1', 'T2'], [10, 0], [20, 5])
+    assert accepted.tolist() == [True, True]
+
+    free = reservations.are_free([0, 0, 0, 1], [0, 15, 20, 5], [10, 25, 30, 10])
+    assert free.tolist() == [True, False, True, True]
+
+
+def test_earlier_request_in_batch_wins_overlap():
+    reservations = table()
+    accepted = reservations.reserve([0, 0, 1], ['T1', 'T2', 'T3'], [10, 15, 10], [20, 25, 20])
+    assert accepted.tolist() == [True, False, True]
+    assert reservations.occupant(0, 15, 16) == 'T1'
+    assert reservations.occupant(0, 20, 25) is None
+
+
+def test_first_free_window_skips_occupied_slots():
+    reservations = table()
+    reservations.reserve([0], ['T1'], [10], [20])
+    windows = reservations.first_free_window([0, 0, 0, 1], [5, 5, 15, 5], [0, 8, 0, 8])
+    assert windows.tolist() == [0, 20, 20, 8]
+
+
+def test_release_clears_only_that_train():
+    reservations = table()
+    reservations.reserve([0, 1, 0], ['T1', 'T1', 'T2'], [0, 5, 30], [5, 10, 40])
+    reservations.release(['T1'])
+
+    assert reservations.are_free([0, 1], [0, 5], [5, 10]).all()
+    assert not reservations.are_free([0], [30], [40])[0]
+    assert reservations.reservations_for('T1') == []
+    assert [window['block_id'] for window in reservations.reservations_for('T2')] == ['A-B#1']
+
+
+def test_release_after_advance_keeps_shifted_slots_consistent():
+    reservations = table()
+    reservations.reserve([0, 1], ['T1', 'T2'], [10, 10], [20, 20])
+    reservations.advance(datetime(2026, 1, 1, 8, 5))
+    reservations.release(['T1'])
+
+    assert (reservations.owner[0] == FREE).all()
+    assert np.flatnonzero(reservations.owner[1] != FREE).tolist() == list(range(5, 15))
+
+
+def test_rejected_request_reports_blocker_and_hold():
+    reservations = table()
+    reservations.request([{'train_id': 'T1', 'row': 0, 'start': 0, 'end': 10}])
+    accepted = reservations.request([{'train_id': 'T2', 'row': 0, 'start': 4, 'end': 8}])
+
+    assert not accepted[0]
+    assert reservations.pending['T2']['blocker'] == 'T1'
+    assert reservations.required_hold_minutes('T2') == 6
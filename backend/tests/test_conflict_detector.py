@@ -0,0 +1,35 @@
+from datetime import datetime
+
+from block_reservations import BlockReservationTable
+from conflict_detector import ConflictDetector
+
+
+def info(train_id):
+    return {'id': train_id, 'name': train_id, 'type': 'Passenger', 'priority': 'medium', 'delay': 0}
+
+
+def blocked_network():
+    sections = [{'id': 'A-B', 'from_station': 'A', 'to_station': 'B', 'length_km': 2, 'tracks': 1},
+                {'id': 'C-D', 'from_station': 'C', 'to_station': 'D', 'length_km': 2, 'tracks': 1}]
+    table = BlockReservationTable(sections, slot_seconds=60, horizon_minutes=60, start_time=datetime(2030, 1, 1))
+    # T2 waits for T1 on A-B, T4 waits for T3 on C-D
+    table.request([{'train_id': train_id, 'row': row, 'start': start, 'end': start + 10, 'train': info(train_id)}
+                   for train_id, row, start in (('T1', 0, 0), ('T3', 1, 0), ('T2', 0, 2), ('T4', 1, 2))])
+    return table
+
+
+def test_scoped_detection_only_touches_the_given_trains():
+    table = blocked_network()
+    detector = ConflictDetector(block_reservations=table, simulated_conflicts=False)
+    assert {conflict['train2']['id'] for conflict in detector.detect_conflicts()} == {'T2', 'T4'}
+
+    # Both waits are gone, but only T2's conflict is re-checked
+    table.pending.clear()
+    assert detector.detect_conflicts({'T2'}) == []
+    assert [conflict['train2']['id'] for conflict in detector.get_active_conflicts()] == ['T4']
+
+    # New conflicts are only raised for the given trains either
+    table.request([{'train_id': 'T5', 'row': 0, 'start': 4, 'end': 8, 'train': info('T5')}])
+    assert detector.detect_conflicts({'T2'}) == []
+    new, = detector.detect_conflicts({'T5'})
+    assert (new['train1']['id'], new['train2']['id']) == ('T1', 'T5')
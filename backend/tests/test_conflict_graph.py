@@ -0,0 +1,57 @@
+import itertools
+
+from conflict_graph import (UnionFind, build_conflict_clusters, cluster_cost, solve_cluster_exact,
+                            solve_cluster_greedy)
+
+
+def conflict(train1, train2, priority='medium'):
+    return {'priority': priority,
+            'train1': {'id': train1, 'priority': priority},
+            'train2': {'id': train2, 'priority': priority}}
+
+
+def hold(train_id, minutes, reduction=0):
+    return {'actions': [{'action': 'hold', 'train_id': train_id, 'duration': minutes}],
+            'expected_delay_reduction': reduction}
+
+
+def reroute(train_id, minutes, reduction=0):
+    return {'actions': [{'action': 'reroute', 'train_id': train_id, 'additional_time': minutes}],
+            'expected_delay_reduction': reduction}
+
+
+def test_union_find_merges_components():
+    union_find = UnionFind()
+    union_find.union('a', 'b')
+    union_find.union('c', 'd')
+    assert union_find.find('a') == union_find.find('b')
+    assert union_find.find('a') != union_find.find('c')
+    union_find.union('b', 'd')
+    assert union_find.find('a') == union_find.find('c')
+
+
+def test_clusters_share_no_trains():
+    conflicts = [conflict('1', '2'), conflict('3', '4'), conflict('2', '5'), {'train1': {}, 'train2': {}}]
+    clusters = sorted(sorted(cluster) for cluster in build_conflict_clusters(conflicts))
+    assert clusters == [[0, 2], [1], [3]]
+
+
+def test_cluster_cost_overlaps_holds_on_the_same_train():
+    conflicts = [conflict('1', '2'), conflict('1', '3')]
+    options = [[hold('1', 5)], [hold('1', 3)]]
+    # One 5 minute hold of a medium priority train, not 5 + 3
+    assert cluster_cost(conflicts, options, [0, 0]) == 10
+
+
+def test_exact_solver_finds_the_cheapest_joint_choice():
+    conflicts = [conflict('1', '2', 'high'), conflict('1', '3'), conflict('3', '4', 'low')]
+    options = [
+        [hold('1', 6), reroute('2', 4, reduction=2)],
+        [hold('1', 5), hold('3', 2)],
+        [reroute('4', 3), hold('3', 4, reduction=1)],
+    ]
+    best = min(cluster_cost(conflicts, options, list(choice))
+               for choice in itertools.product(*(range(len(o)) for o in options)))
+
+    assert cluster_cost(conflicts, options, solve_cluster_exact(conflicts, options)) == best
+    assert cluster_cost(conflicts, options, solve_cluster_greedy(conflicts, options)) >= best
@@ -0,0 +1,104 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from data_manager import DataManager
+from delay_propagation import DelayPropagationModel
+
+
+def network(platforms=1, length_km=20, data_manager=None):
+    now = datetime.now()
+    stations = [{'id': 'A', 'name': 'Alpha', 'lat': 20.0, 'lng': 80.0, 'platforms': platforms},
+                {'id': 'B', 'name': 'Bravo', 'lat': 20.18, 'lng': 80.0, 'platforms': platforms}]
+    sections = [{'id': 'A-B', 'from_station': 'A', 'to_station': 'B', 'length_km': length_km, 'tracks': 1}]
+    trains = [{'id': train_id, 'name': train_id, 'type': 'Passenger', 'priority': 'medium',
+               'from_station': 'A', 'current_station': 'A', 'to_station': 'B', 'route': ['A', 'B'],
+               'speed': 60, 'delay': 0, 'position': {'lat': 20.0, 'lng': 80.0}, 'consist': {'coaches': 20},
+               'scheduled_arrival': (now + timedelta(minutes=minutes)).isoformat()}
+              for train_id, minutes in (('T1', 30), ('T2', 60))]
+    data_manager = data_manager or DataManager()
+    data_manager.load_network(stations, trains, sections)
+    return data_manager
+
+
+def knock_on(model, prediction, train_id):
+    return prediction['knock_on'][model.train_ids.index(train_id)]
+
+
+def test_delay_beyond_slack_propagates_along_platform_and_headway():
+    model = DelayPropagationModel(network())
+    model.refresh()
+
+    # T2 departs 30 minutes after T1 (20 minutes of headway slack) and uses the
+    # platform 17 minutes after T1 clears it (dwell plus buffer)
+    assert knock_on(model, model.predict({'T1': 10}), 'T2') == pytest.approx(0)
+    prediction = model.predict({'T1': 25})
+    assert knock_on(model, prediction, 'T2') == pytest.approx(8)
+
+    entry, = model.knock_on_delays(prediction)
+    assert (entry['train']['id'], entry['cause_train']['id']) == ('T2', 'T1')
+    assert entry['dependency'] == 'platform'
+    assert entry['location'] == 'Bravo Platform 1'
+
+
+def test_refresh_reuses_timetable_until_it_changes():
+    data_manager = network()
+    model = DelayPropagationModel(data_manager)
+    model.refresh()
+    timetable = model._timetable
+
+    data_manager.update_train_status('T1', {'delay': 25})
+    model.refresh()
+    assert model._timetable is timetable
+    # T1 now overlaps T2 on the only platform and waits for one, leaving the headway dependency
+    assert knock_on(model, model.predict(), 'T2') == pytest.approx(5)
+
+    data_manager.update_train_status('T2', {'scheduled_arrival': (datetime.now() + timedelta(minutes=90)).isoformat()})
+    model.refresh()
+    assert model._timetable is not timetable
+    assert knock_on(model, model.predict(), 'T2') == pytest.approx(0)
+
+
+def test_incremental_refresh_matches_a_fresh_model():
+    data_manager = network(platforms=2)
+    model = DelayPropagationModel(data_manager)
+    model.refresh()
+    for delay in (5, 40, 12):
+        data_manager.update_train_status('T1', {'delay': delay})
+        model.refresh()
+
+    fresh = DelayPropagationModel(data_manager)
+    fresh.refresh()
+    incremental, rebuilt = model.predict({'T2': 3}), fresh.predict({'T2': 3})
+    assert incremental['dependencies'] == rebuilt['dependencies']
+    assert incremental['delay'] == pytest.approx(rebuilt['delay'])
+
+
+def test_prediction_keeps_the_snapshot_it_was_made_from():
+    data_manager = network()
+    model = DelayPropagationModel(data_manager)
+    prediction = model.predict({'T1': 25})
+
+    data_manager.remove_train('T1')
+    model.refresh()
+    assert model.train_ids == ['T2']
+    assert [entry['cause_train']['id'] for entry in model.knock_on_delays(prediction)] == ['T1']
+
+
+def test_reloaded_network_drops_cached_hops_and_schedules():
+    data_manager = network(platforms=2)
+    data_manager.update_train_status('T2', {'speed': 40})
+    model = DelayPropagationModel(data_manager)
+    model.refresh()
+    # T2 departs 20 minutes after T1, which holds the first 10 km block for 10 minutes
+    assert knock_on(model, model.predict({'T1': 25}), 'T2') == pytest.approx(15)
+
+    # Over a 16 km hop the departures are 22 minutes apart and the first block takes 8
+    network(platforms=2, length_km=16, data_manager=data_manager)
+    data_manager.update_train_status('T2', {'speed': 40})
+    model.refresh()
+    assert knock_on(model, model.predict({'T1': 25}), 'T2') == pytest.approx(11)
+
+    data_manager.remove_train('T1')
+    model.refresh()
+    assert set(model._schedule_cache) == {'T2'}
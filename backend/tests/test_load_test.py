@@ -0,0 +1,55 @@
+from load_test import BROADCAST_EVENTS, _broadcast_key, _build_report, _percentiles
+
+CONFIG = {'clients': 4, 'processes': 2, 'duration': 10, 'update_rate': 5, 'conflicts_rate': 1,
+          'accept_rate': 1, 'batch_accept_rate': 0.5, 'batch_size': 3, 'connect_rate': 100}
+
+
+def test_percentiles_pick_nearest_lower_rank():
+    assert _percentiles([]) == {'count': 0}
+    summary = _percentiles([float(ms) for ms in range(100, 0, -1)])
+    assert summary == {'count': 100, 'p50_ms': 50.0, 'p90_ms': 90.0, 'p99_ms': 99.0, 'p999_ms': 99.0,
+                       'max_ms': 100.0, 'mean_ms': 50.5}
+    assert _percentiles([2.5])['p999_ms'] == 2.5
+
+
+def test_batch_broadcasts_are_keyed_by_their_suggestions():
+    assert _broadcast_key('suggestions_implemented', {'suggestion_ids': ['S1', 'S2'], 'timestamp': 'x'}) == \
+        'suggestions_implemented:S1,S2'
+    assert 'suggestions_implemented' in BROADCAST_EVENTS
+
+
+def worker(received_counts, update_latencies=(), stable=2):
+    return {'stable_clients': stable, 'dropped_connections': 0, 'updates_timed_out': 1,
+            'update_latencies': list(update_latencies), 'received_counts': received_counts,
+            'broadcast_latencies': {event: [] for event in BROADCAST_EVENTS}}
+
+
+def test_build_report_counts_drops_against_the_accepted_suggestions():
+    http_stats = {
+        'conflicts': {'latencies': [5.0], 'errors': 0},
+        'accept': {'latencies': [8.0, 12.0], 'errors': 1},
+        'batch_accept': {'latencies': [20.0], 'errors': 0},
+        'accepted_suggestions': ['S1', 'S2'],
+        'accepted_batches': [['S3', 'S4']]
+    }
+    workers = [
+        worker({'suggestion_implemented:S1': 2, 'suggestions_implemented:S3,S4': 2, 'kpi_update:t1': 2},
+               update_latencies=[10.0, 20.0]),
+        worker({'suggestion_implemented:S1': 1, 'suggestions_implemented:S3,S4': 2, 'kpi_update:t1': 2,
+                'suggestion_implemented:other': 2}, update_latencies=[30.0])
+    ]
+    report = _build_report(CONFIG, 'http://test', 4, 1.5, workers, http_stats, None)
+
+    assert report['connections'] == {'requested': 4, 'connected': 4, 'stable': 4, 'dropped': 0,
+                                     'connect_seconds': 1.5}
+    assert report['request_update']['achieved_rate'] == 0.3
+    assert report['request_update']['timed_out'] == 2
+    # S2 reached nobody and S1 missed one client; accepts by others are not expected
+    assert report['broadcasts']['suggestion_implemented'] == {'emitted': 2, 'delivered': 3, 'dropped': 5,
+                                                              'latency': {'count': 0}}
+    assert report['broadcasts']['suggestions_implemented']['emitted'] == 1
+    assert report['broadcasts']['suggestions_implemented']['dropped'] == 0
+    assert report['broadcasts']['kpi_update']['delivered'] == 4
+    assert report['http']['accept_suggestion']['accepted'] == 2
+    assert report['http']['accept_suggestions']['accepted'] == 2
+    assert report['server'] is None
@@ -0,0 +1,25 @@
+import pytest
+
+from message_bus import InProcessMessageBus, MessageBus
+
+
+def test_message_bus_is_abstract():
+    class PublishOnly(MessageBus):
+        def publish(self, channel, message):
+            pass
+
+    with pytest.raises(TypeError):
+        MessageBus()
+    with pytest.raises(TypeError):
+        PublishOnly()
+
+
+def test_request_collects_replies():
+    bus = InProcessMessageBus()
+    try:
+        for zone in range(2):
+            bus.subscribe('commands', lambda message, zone=zone: bus.reply(message, {'zone': zone}))
+        replies = bus.request('commands', {'command': 'ping'}, expected_replies=2, timeout=2)
+        assert sorted(reply['zone'] for reply in replies) == [0, 1]
+    finally:
+        bus.close()
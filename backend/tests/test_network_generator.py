@@ -0,0 +1,39 @@
+from datetime import datetime
+
+from block_reservations import derive_sections
+from network_generator import SyntheticNetworkGenerator
+
+START = datetime(2026, 1, 1, 8, 0)
+FIELDS = ('stations', 'sections', 'corridors', 'trains', 'timetable')
+
+
+def generate(seed):
+    return SyntheticNetworkGenerator(seed).generate('division', stations=40, trains=80, start_time=START)
+
+
+def conflict_key(conflict):
+    return (conflict['type'], conflict['location'], conflict['train1']['id'], conflict['train2']['id'],
+            conflict['potential_delay'])
+
+
+def test_same_seed_generates_the_same_network():
+    first, second = generate(7), generate(7)
+    assert all(first[field] == second[field] for field in FIELDS)
+    assert len(first['stations']) == 40 and len(first['trains']) == 80
+
+    # Conflict times follow the wall clock; everything else is seeded
+    first, second = (SyntheticNetworkGenerator(7).generate_conflicts(generate(7)['trains'], 5) for _ in range(2))
+    assert [conflict_key(conflict) for conflict in first] == [conflict_key(conflict) for conflict in second]
+
+
+def test_different_seeds_generate_different_networks():
+    assert generate(7)['trains'] != generate(8)['trains']
+
+
+def test_derived_sections_use_the_generator_distances():
+    network = generate(7)
+    stations = {station['id']: station for station in network['stations']}
+    generated = {section['id']: section['length_km'] for section in network['sections']}
+    derived = derive_sections(stations, network['trains'])
+    assert derived and all(generated[section['id']] == section['length_km']
+                           for section in derived if section['id'] in generated)
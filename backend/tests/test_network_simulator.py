@@ -0,0 +1,108 @@
+from data_manager import DataManager
+from network_generator import SyntheticNetworkGenerator
+from network_simulator import LookaheadSimulator
+from optimization_engine import TrainOptimizer
+
+
+def simulator():
+    network = SyntheticNetworkGenerator(7).generate('division', stations=40, trains=160)
+    data_manager = DataManager()
+    data_manager.load_network(network['stations'], network['trains'], network['sections'])
+    return LookaheadSimulator(data_manager)
+
+
+def busiest_neighbourhood(lookahead):
+    by_station = lookahead.trains_by_station()
+    return max(by_station.values(), key=len)
+
+
+def test_batched_scenarios_match_separate_runs():
+    lookahead = simulator()
+    trains = busiest_neighbourhood(lookahead)
+    scenarios = [
+        {'trains': trains},
+        {'trains': trains, 'holds': {trains[0]['id']: 5}},
+        {'trains': trains, 'reroutes': {trains[-1]['id']: 7}, 'priority_boost': 50}
+    ]
+    batch = lookahead.simulate_batch(scenarios, horizon_minutes=30)
+    for scenario, run in zip(scenarios, batch):
+        single = lookahead.simulate(holds=scenario.get('holds'), reroutes=scenario.get('reroutes'),
+                                    priority_boost=scenario.get('priority_boost', 0), trains=trains,
+                                    horizon_minutes=30)
+        assert single == run
+
+
+def test_cutoff_prunes_runs_that_exceed_it():
+    lookahead = simulator()
+    trains = busiest_neighbourhood(lookahead)
+    holds = {train['id']: 5 for train in trains}
+    free, held = lookahead.simulate_batch([{'trains': trains}, {'trains': trains, 'holds': holds}],
+                                          horizon_minutes=30)
+    cutoff = free['weighted_delay'] + 1
+    runs = lookahead.simulate_batch([{'trains': trains, 'cutoff': cutoff},
+                                     {'trains': trains, 'holds': holds, 'cutoff': cutoff}], horizon_minutes=30)
+
+    assert held['weighted_delay'] > cutoff
+    assert [run['pruned'] for run in runs] == [False, True]
+    assert runs[0] == {**free, 'pruned': False}
+
+
+def test_option_ranking_is_deterministic():
+    lookahead = simulator()
+    optimizer = TrainOptimizer(block_reservations=lookahead.data_manager.block_reservations, simulator=lookahead)
+    trains = busiest_neighbourhood(lookahead)
+    conflict = {'id': 'c1', 'priority': 'high', 'type': 'block_conflict',
+                'train1': {'id': trains[0]['id'], 'priority': trains[0].get('priority')},
+                'train2': {'id': trains[1]['id'], 'priority': trains[1].get('priority')}}
+
+    def ranking():
+        options = [{'actions': [{'action': 'hold', 'train_id': train['id'], 'duration': minutes}],
+                    'expected_delay_reduction': 0, 'name': f"{train['id']}-{minutes}"}
+                   for train in trains[:3] for minutes in (2, 8, 15)]
+        optimizer._evaluate_options([conflict], [options])
+        return [(option['name'], option['evaluation']['weighted_delay'], option['evaluation']['pruned'])
+                for option in options]
+
+    first = ranking()
+    assert first == ranking()
+    assert any(pruned for _, _, pruned in first)
+    assert not first[0][2]
+
+
+def test_direct_delay_adds_hold_and_reroute_of_one_train():
+    optimizer = TrainOptimizer()
+    trains = [{'id': 'T1', 'priority': 'high'}, {'id': 'T2', 'priority': 'low'}]
+    assert optimizer._direct_delay(trains, {'T1': 5}, {'T1': 10, 'T2': 4}) == (19, 3 * 15 + 4)
+
+
+def line_network(trains):
+    stations = [{'id': station, 'name': station, 'lat': 20.0 + index * 0.05, 'lng': 75.0}
+                for index, station in enumerate('ABC')]
+    sections = [{'id': 'A-B', 'from_station': 'A', 'to_station': 'B', 'length_km': 6, 'tracks': 1},
+                {'id': 'B-C', 'from_station': 'B', 'to_station': 'C', 'length_km': 6, 'tracks': 1}]
+    data_manager = DataManager()
+    data_manager.load_network(stations, trains, sections)
+    return LookaheadSimulator(data_manager)
+
+
+def line_train(train_id, priority, train_type='Passenger', route='AB'):
+    return {'id': train_id, 'name': train_id, 'type': train_type, 'priority': priority, 'speed': 60, 'delay': 0,
+            'from_station': route[0], 'to_station': route[-1], 'current_station': route[0], 'route': list(route)}
+
+
+def test_losing_a_block_contest_counts_the_whole_wait():
+    # T1 and T2 both find the block free once T0 clears it; T1 wins, so T2 waits for both
+    lookahead = line_network([line_train('T0', 'high'), line_train('T1', 'medium'), line_train('T2', 'low')])
+    run = lookahead.simulate(horizon_minutes=60)
+
+    assert [run['trains'][train_id]['added_delay'] for train_id in ('T0', 'T1', 'T2')] == [0, 6, 12]
+    assert run['weighted_delay'] == 6 * 2 + 12 * 1
+
+
+def test_non_stopping_freight_has_no_dwell():
+    lookahead = line_network([line_train('F1', 'low', 'Freight', 'ABC'), line_train('P1', 'low', 'Passenger', 'ABC')])
+    network = lookahead.data_manager.block_reservations
+    trains = lookahead.data_manager.trains
+
+    assert lookahead._route_sequence(trains['F1'], network)[2] == [0, 0]
+    assert lookahead._route_sequence(trains['P1'], network)[2] == [3 * 60 // network.slot_seconds, 0]
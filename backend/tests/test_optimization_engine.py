@@ -0,0 +1,54 @@
+from optimization_engine import TrainOptimizer
+
+
+def suggestion(conflict_id, action, train_id, minutes=5):
+    key = 'duration' if action == 'hold' else 'additional_time'
+    return {'conflict_id': conflict_id,
+            'recommended_option': {'actions': [{'action': action, 'train_id': train_id, key: minutes}]}}
+
+
+def optimizer():
+    engine = TrainOptimizer()
+    engine.active_suggestions = {
+        'S1': suggestion('C1', 'hold', 'T1'),
+        'S2': suggestion('C2', 'reroute', 'T1'),
+        'S3': suggestion('C3', 'hold', 'T1', 3),
+        'S4': suggestion('C4', 'hold', 'T2')
+    }
+    return engine
+
+
+def test_batch_is_validated_as_a_whole():
+    engine = optimizer()
+    requests = [{'suggestion_id': 'S1'}, {'suggestion_id': 'S2'}, {'suggestion_id': 'S3'},
+                {'suggestion_id': 'S1'}, {'suggestion_id': 'S4'}, {'suggestion_id': 'S9'},
+                {'suggestion_id': 'S3', 'conflict_id': 'C1'}]
+    valid, rejected = engine.validate_suggestions(requests, active_conflict_ids={'C1', 'C2', 'C3'})
+
+    # Holds on the same train overlap; a reroute of a held train does not
+    assert [entry[0] for entry in valid] == ['S1', 'S3']
+    assert [(entry['suggestion_id'], entry['error']) for entry in rejected] == [
+        ('S2', 'Train T1 is already held or rerouted by suggestion S1'),
+        ('S1', 'Duplicate suggestion in batch'),
+        ('S4', 'Conflict is no longer active'),
+        ('S9', 'Suggestion not found'),
+        ('S3', 'Duplicate suggestion in batch')
+    ]
+
+
+def test_implement_applies_only_valid_suggestions():
+    engine = optimizer()
+    batch = engine.implement_suggestions([{'suggestion_id': 'S2'}, {'suggestion_id': 'S1'},
+                                          {'suggestion_id': 'S4'}])
+
+    assert [result['suggestion_id'] for result in batch['implemented']] == ['S2', 'S4']
+    assert batch['rejected'][0]['error'] == 'Train T1 is already rerouted by suggestion S2'
+    assert batch['affected_trains'] == ['T1', 'T2']
+    assert set(engine.active_suggestions) == {'S1', 'S3'}
+
+
+def test_validation_uses_the_given_suggestions():
+    engine = TrainOptimizer()
+    valid, rejected = engine.validate_suggestions([{'suggestion_id': 'R1'}],
+                                                  suggestions={'R1': suggestion('C1', 'hold', 'T5')})
+    assert [entry[0] for entry in valid] == ['R1'] and not rejected
@@ -0,0 +1,48 @@
+from datetime import datetime, timedelta
+
+from platform_allocator import PlatformAllocator
+
+ARRIVAL = datetime(2026, 1, 1, 8, 0)
+
+
+def train(train_id, minutes=0, train_type='Express', coaches=20):
+    consist = {'wagons': coaches} if train_type == 'Freight' else {'coaches': coaches}
+    return {'id': train_id, 'name': f"Train {train_id}", 'type': train_type, 'priority': 'medium',
+            'to_station': 'A', 'delay': 0, 'consist': consist,
+            'scheduled_arrival': (ARRIVAL + timedelta(minutes=minutes)).isoformat()}
+
+
+def allocator(platforms=3):
+    platform_allocator = PlatformAllocator()
+    platform_allocator.set_station({'id': 'A', 'name': 'Alpha', 'platforms': platforms})
+    return platform_allocator
+
+
+def test_colouring_never_overlaps_on_a_platform():
+    platform_allocator = allocator(4)
+    trains = [train(str(i), minutes=i * 4) for i in range(12)]
+    platform_allocator.allocate_all(trains)
+
+    for (_, _), timeline in platform_allocator.timelines.items():
+        for (_, end, _), (start, _, _) in zip(timeline, timeline[1:]):
+            assert end <= start
+
+
+def test_freight_only_uses_the_loop_line():
+    platform_allocator = allocator(3)
+    assignments = platform_allocator.allocate_all([train('F1', train_type='Freight', coaches=50)])
+    assert assignments['F1'] == 3
+
+
+def test_overflow_raises_a_platform_conflict_and_release_reallocates():
+    platform_allocator = allocator(2)
+    platform_allocator.allocate_all([train('1'), train('2', minutes=1), train('3', minutes=2)])
+    assert platform_allocator.get_platform('3') is None
+
+    conflicts = platform_allocator.get_platform_conflicts()
+    assert [conflict['train']['id'] for conflict in conflicts] == ['3']
+
+    blocking = conflicts[0]['blocking_train']['id']
+    platform_allocator.release(blocking)
+    assert platform_allocator.get_platform('3') is not None
+    assert platform_allocator.pop_reallocated() == ['3']
@@ -0,0 +1,55 @@
+import threading
+
+from tick_profiler import TickProfiler
+
+
+class Loop:
+    def step(self, value):
+        return sum(range(value))
+
+
+def test_tick_capture_completes_after_target_ticks(tmp_path):
+    profiler = TickProfiler(output_dir=str(tmp_path))
+    loop = Loop()
+    profiler.register_hook('Loop.step', loop, 'step')
+
+    assert profiler.arm('ticks', 2)['success']
+    for _ in range(2):
+        assert loop.step(1000) == sum(range(1000))
+        profiler.tick_completed()
+
+    report = profiler.last_report
+    assert not profiler.is_armed()
+    assert report['completed'] == 2
+    assert report['sections']['Loop.step']['calls'] == 2
+    assert 'step' not in vars(loop)  # hook removed
+
+
+def test_tick_capture_refused_without_hooks(tmp_path):
+    result = TickProfiler(output_dir=str(tmp_path)).arm('ticks', 1)
+    assert not result['success']
+
+
+def test_profiled_call_does_not_hold_the_lock(tmp_path):
+    profiler = TickProfiler(output_dir=str(tmp_path))
+    started, release = threading.Event(), threading.Event()
+
+    class Slow:
+        def step(self):
+            started.set()
+            release.wait(5)
+
+    slow = Slow()
+    profiler.register_hook('Slow.step', slow, 'step')
+    profiler.arm('ticks', 5)
+    worker = threading.Thread(target=slow.step)
+    worker.start()
+    assert started.wait(5)
+
+    # Disarming must not wait for the profiled call to finish
+    done = threading.Event()
+    threading.Thread(target=lambda: (profiler.disarm(), done.set())).start()
+    assert done.wait(2)
+    release.set()
+    worker.join(5)
+    assert not profiler.is_armed()
@@ -0,0 +1,94 @@
+import json
+
+import pytest
+
+from data_manager import DataManager
+from message_bus import InProcessMessageBus
+from timetable_store import CompiledNetwork, compile_network
+from zone_cluster import ZoneWorker
+
+
+def network():
+    stations = [
+        {'id': 'A', 'name': 'Alpha', 'lat': 19.0, 'lng': 72.8, 'platforms': 4},
+        {'id': 'B', 'name': 'Bravo', 'lat': 19.2, 'lng': 73.0, 'platforms': 2, 'junction': True},
+        {'id': 'C', 'name': 'Charlie', 'lat': 19.4, 'lng': 73.2, 'platforms': 3}
+    ]
+    sections = [
+        {'id': 'A-B', 'from_station': 'A', 'to_station': 'B', 'length_km': 30, 'tracks': 2},
+        {'id': 'B-C', 'from_station': 'B', 'to_station': 'C', 'length_km': 25, 'tracks': 1}
+    ]
+    trains = [
+        {'id': '12001', 'name': 'Shatabdi', 'type': 'Express', 'priority': 'high', 'from_station': 'A',
+         'to_station': 'C', 'current_station': 'A', 'delay': 4, 'speed': 110,
+         'position': {'lat': 19.0, 'lng': 72.8}, 'scheduled_arrival': '2026-01-01T09:30:00',
+         'consist': {'coaches': 18, 'ac_coaches': 6}, 'occupancy': 85, 'route': ['A', 'B', 'C']},
+        {'id': 'F7', 'name': 'Coal rake', 'type': 'Freight', 'priority': 'low', 'from_station': 'C',
+         'to_station': 'A', 'current_station': 'B', 'delay': 0, 'speed': 50,
+         'position': {'lat': 19.2, 'lng': 73.0}, 'scheduled_arrival': None, 'platform': 2,
+         'consist': {'wagons': 58, 'weight': '4000T'}, 'route': ['C', 'B', 'A']}
+    ]
+    timetable = {'12001': [['A', None, '2026-01-01T08:00:00'], ['B', '2026-01-01T08:40:00', '2026-01-01T08:45:00'],
+                           ['C', '2026-01-01T09:30:00', None]]}
+    return {'stations': stations, 'sections': sections, 'trains': trains, 'timetable': timetable}
+
+
+@pytest.fixture
+def compiled(tmp_path):
+    path = str(tmp_path / 'network.rxn')
+    compile_network(network(), path)
+    return CompiledNetwork(path)
+
+
+def test_round_trip_keeps_train_fields(compiled):
+    express, freight = compiled.train_dicts()
+
+    assert express['route'] == ['A', 'B', 'C']
+    assert express['scheduled_arrival'] == '2026-01-01T09:30:00'
+    assert express['consist'] == {'coaches': 18, 'ac_coaches': 6}
+    assert (express['priority'], express['delay'], express['status']) == ('high', 4, 'slight_delay')
+    assert express['platform'] is None
+    assert freight['scheduled_arrival'] is None
+    assert freight['consist'] == {'wagons': 58, 'weight': '4000T'}
+    assert (freight['platform'], freight['occupancy']) == (2, None)
+    assert [station['id'] for station in compiled.station_dicts()] == ['A', 'B', 'C']
+    assert compiled.stop_times(0)[1] == ['B', '2026-01-01T08:40:00', '2026-01-01T08:45:00']
+
+
+def test_selected_records_decode_to_plain_dicts(compiled):
+    everything = compiled.train_dicts()
+    freight, = compiled.train_dicts([1])
+
+    assert type(freight) is dict and freight == everything[1] == compiled.train_record(1)
+    assert json.loads(json.dumps(freight)) == freight
+    assert compiled.train_dicts([]) == []
+    assert compiled.current_stations() == ['A', 'B']
+
+
+def test_zone_worker_decodes_its_own_compiled_trains(compiled):
+    bus = InProcessMessageBus()
+    try:
+        workers = [ZoneWorker(zone_id, 2, bus, network_file=compiled.path) for zone_id in range(2)]
+        owned = [worker.data_manager.trains for worker in workers]
+        assert set(owned[0]) | set(owned[1]) == {'12001', 'F7'}
+        assert not set(owned[0]) & set(owned[1])
+        assert all(type(train) is dict for trains in owned for train in trains.values())
+    finally:
+        bus.close()
+
+
+def test_load_compiled_allocates_platforms(compiled):
+    data_manager = DataManager()
+    data_manager.load_compiled(compiled.path)
+
+    assert set(data_manager.trains) == {'12001', 'F7'}
+    assert data_manager.trains['12001']['platform'] is not None
+
+
+@pytest.mark.parametrize('timestamp', ['2026-01-01T09:30:00+05:30', '2026-01-01T04:00:00Z'])
+def test_timestamps_with_offsets_are_rejected(tmp_path, timestamp):
+    data = network()
+    data['trains'][0]['scheduled_arrival'] = timestamp
+
+    with pytest.raises(ValueError, match='UTC offset'):
+        compile_network(data, str(tmp_path / 'network.rxn'))
@@ -0,0 +1,148 @@
+import time
+
+from message_bus import InProcessMessageBus
+from zone_cluster import (COMMAND_CHANNEL, ClusterOptimizer, ZoneCluster, ZoneWorker, assign_zones,
+                          load_base_network)
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_assign_zones_covers_every_station_once():
+    network = load_base_network()
+    zones = assign_zones(network['stations'], 3)
+    assert set(zones) == {station['id'] for station in network['stations']}
+    assert set(zones.values()) <= {0, 1, 2}
+
+
+def test_workers_partition_trains_and_share_simulated_conflicts():
+    bus = InProcessMessageBus()
+    try:
+        workers = [ZoneWorker(zone_id, 2, bus) for zone_id in range(2)]
+        all_trains = {train['id'] for train in load_base_network()['trains']}
+        owned = [set(worker.data_manager.trains) for worker in workers]
+
+        assert owned[0] | owned[1] == all_trains
+        assert not owned[0] & owned[1]
+        # Only one zone runs the demo/random conflict generator
+        assert [worker.conflict_detector.simulated_conflicts for worker in workers] == [True, False]
+        assert not workers[1].conflict_detector.active_conflicts
+    finally:
+        bus.close()
+
+
+def test_cluster_batch_is_validated_first_and_sent_once_per_zone():
+    bus = InProcessMessageBus()
+    try:
+        workers = [ZoneWorker(zone_id, 2, bus) for zone_id in range(2)]
+        cluster = ZoneCluster(bus, 2)
+        optimizer = ClusterOptimizer(cluster)
+        commands = []
+        bus.subscribe(COMMAND_CHANNEL, commands.append)
+
+        conflicts = workers[0].conflict_detector.get_active_conflicts()
+        suggestions = workers[0].optimizer.get_recommendations(conflicts)
+        for worker in workers:
+            worker.publish_snapshot()
+        assert wait_for(lambda: len(cluster.get_suggestions()) == len(suggestions))
+
+        requests = [{'suggestion_id': suggestion['id'], 'conflict_id': suggestion['conflict_id']}
+                    for suggestion in suggestions]
+        valid, _ = workers[0].optimizer.validate_suggestions(requests, {conflict['id'] for conflict in conflicts})
+        assert valid
+
+        # Nothing is sent when no entry of the batch is valid
+        batch = optimizer.implement_suggestions([{'suggestion_id': 'missing'}])
+        assert not batch['implemented'] and batch['rejected'][0]['error'] == 'Suggestion not found'
+
+        batch = optimizer.implement_suggestions(requests + [{'suggestion_id': 'missing'}],
+                                                {conflict['id'] for conflict in conflicts})
+        assert wait_for(lambda: commands)
+        assert [(command['command'], command['zone'], len(command['suggestions'])) for command in commands] == \
+            [('accept_suggestions', 0, len(valid))]
+        assert [result['suggestion_id'] for result in batch['implemented']] == [entry[0] for entry in valid]
+        assert len(batch['rejected']) == len(requests) - len(valid) + 1
+        assert not {entry[0] for entry in valid} & set(workers[0].optimizer.active_suggestions)
+        assert not {entry[1] for entry in valid} & \
+            {conflict['id'] for conflict in workers[0].conflict_detector.get_active_conflicts()}
+    finally:
+        bus.close()
+
+
+def test_cluster_recommendations_and_simulations_run_in_the_zones():
+    bus = InProcessMessageBus()
+    try:
+        workers = [ZoneWorker(zone_id, 2, bus) for zone_id in range(2)]
+        cluster = ZoneCluster(bus, 2)
+        optimizer = ClusterOptimizer(cluster)
+        for worker in workers:
+            worker.publish_snapshot()
+        assert wait_for(lambda: len(cluster.snapshots) == 2)
+
+        conflicts = cluster.get_active_conflicts()
+        suggestions = optimizer.get_recommendations(conflicts)
+        assert [suggestion['conflict_id'] for suggestion in suggestions] == [conflict['id'] for conflict in conflicts]
+        # Zone 0 raises the demo conflicts; the zone owning their trains simulates them and keeps
+        # the suggestions, so the impact figures come from its look-ahead simulator
+        assert all(suggestion['impact_analysis']['simulated'] for suggestion in suggestions)
+        owner = workers[cluster.train_zones()[conflicts[0]['train1']['id']]]
+        assert suggestions[0]['id'] in owner.optimizer.active_suggestions
+        assert conflicts[0]['id'] in owner.conflict_detector.active_conflicts
+        assert not optimizer.active_suggestions
+
+        simulation = optimizer.run_simulation({'name': 'Test', 'delays': {conflicts[0]['train1']['id']: 20}})
+        assert simulation['zones'] == 2
+        assert simulation['results']['before']['conflicts'] == sum(
+            worker.optimizer.run_simulation({})['results']['before']['conflicts'] for worker in workers)
+        assert simulation['results']['propagation']['before']['dependencies'] > 0
+    finally:
+        bus.close()
+
+
+def test_accepted_suggestions_are_applied_by_their_zone_and_leave_every_snapshot():
+    bus = InProcessMessageBus()
+    try:
+        workers = [ZoneWorker(zone_id, 2, bus) for zone_id in range(2)]
+        cluster = ZoneCluster(bus, 2)
+        optimizer = ClusterOptimizer(cluster)
+        for worker in workers:
+            worker.publish_snapshot()
+        assert wait_for(lambda: len(cluster.snapshots) == 2)
+
+        conflicts = cluster.get_active_conflicts()
+        suggestions = optimizer.get_recommendations(conflicts)
+        requests = [{'suggestion_id': suggestion['id'], 'conflict_id': suggestion['conflict_id']}
+                    for suggestion in suggestions]
+        batch = optimizer.implement_suggestions(requests, {conflict['id'] for conflict in conflicts})
+        accepted = {result['conflict_id'] for result in batch['implemented']}
+        assert accepted
+        assert not optimizer.active_suggestions
+
+        # The owner resolves the conflict and tells the zone that raised it, so it leaves every snapshot
+        def resolved_everywhere():
+            active = {conflict['id'] for conflict in cluster.get_active_conflicts()}
+            for worker in workers:
+                active |= {conflict['id'] for conflict in worker.conflict_detector.get_active_conflicts()}
+            return not accepted & active
+        assert wait_for(resolved_everywhere)
+        assert not {result['suggestion_id'] for result in batch['implemented']} & set(optimizer.zone_suggestions)
+
+        # A single accept takes the same path; re-detection left a conflict to accept
+        single = optimizer.get_recommendations(cluster.get_active_conflicts())
+        assert single
+        result = optimizer.implement_suggestion(single[0]['id'], single[0]['conflict_id'])
+        assert result['success']
+        assert wait_for(lambda: single[0]['conflict_id'] not in
+                        {conflict['id'] for conflict in cluster.get_active_conflicts()})
+    finally:
+        bus.close()
+
+
+def test_demo_network_is_the_same_in_every_process():
+    first, second = load_base_network(), load_base_network()
+    assert [(train['id'], train['position'], train['consist']) for train in first['trains']] == \
+        [(train['id'], train['position'], train['consist']) for train in second['trains']]
@@ -0,0 +1,280 @@
+"""
+RailOptiX Tick Profiler
+On-demand profiling of the real-time update loop and API endpoints
+"""
+
+import os
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import List, Dict, Any, Callable, Optional
+
+
+class _StackCollector:
+    """Deterministic profiler that records wall time per collapsed call stack"""
+
+    def __init__(self):
+        self.stack_times = {}
+        self._stack = []
+        self._last = 0.0
+
+    def run(self, root: str, func: Callable, *args, **kwargs):
+        """Run a callable with profiling enabled for the current thread"""
+        self._stack = [root]
+        self._last = time.perf_counter()
+        sys.setprofile(self._trace)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            sys.setprofile(None)
+            self._charge(time.perf_counter())
+            self._stack = []
+
+    def _charge(self, now: float):
+        """Attribute elapsed time to the stack that is currently on top"""
+        if self._stack:
+            key = ';'.join(self._stack)
+            self.stack_times[key] = self.stack_times.get(key, 0.0) + (now - self._last)
+        self._last = now
+
+    def _trace(self, frame, event, arg):
+        now = time.perf_counter()
+        self._charge(now)
+
+        if event == 'call':
+            code = frame.f_code
+            module = os.path.splitext(os.path.basename(code.co_filename))[0]
+            self._stack.append(f"{module}:{code.co_name}:{code.co_firstlineno}")
+        elif event == 'c_call':
+            module = getattr(arg, '__module__', None) or 'builtins'
+            self._stack.append(f"{module}:{getattr(arg, '__qualname__', repr(arg))}")
+        elif event in ('return', 'c_return', 'c_exception'):
+            # Never pop the root frame of the capture
+            if len(self._stack) > 1:
+                self._stack.pop()
+
+        self._last = time.perf_counter()
+
+
+class TickProfiler:
+    """Arms a profiler for the next N update ticks or N requests on an endpoint"""
+
+    def __init__(self, output_dir: str = 'profiles'):
+        self.output_dir = output_dir
+        self.hooks = {}
+        self.last_report = None
+        self._lock = threading.RLock()
+        self._capture = None
+        self._tick_thread = None
+
+    def register_hook(self, name: str, target: Any, method_name: str):
+        """Register a method that gets profiled while a tick capture is armed"""
+        self.hooks[name] = (target, method_name)
+
+    def bind_tick_thread(self):
+        """Mark the calling thread as the background update loop"""
+        self._tick_thread = threading.get_ident()
+
+    def is_armed(self) -> bool:
+        """Check whether a capture is currently in progress"""
+        return self._capture is not None
+
+    def arm(self, mode: str, count: int, app=None, path: str = None, method: str = 'GET') -> Dict:
+        """Arm the profiler for the next `count` ticks or requests"""
+        with self._lock:
+            if self._capture is not None:
+                return {'success': False, 'error': 'Profiler is already armed'}
+            if count < 1:
+                return {'success': False, 'error': 'Count must be at least 1'}
+            if mode == 'ticks' and not self.hooks:
+                return {'success': False, 'error': 'No update loop runs in this process to capture'}
+
+            capture = {
+                'id': str(uuid.uuid4()),
+                'mode': mode,
+                'target_count': count,
+                'completed': 0,
+                'stack_times': {},
+                'section_times': {},
+                'armed_at': datetime.now().isoformat(),
+                'installed': []
+            }
+
+            if mode == 'ticks':
+                for name, (target, method_name) in self.hooks.items():
+                    original = getattr(target, method_name)
+                    setattr(target, method_name, self._wrap_hook(name, original))
+                    capture['installed'].append(('hook', target, method_name))
+            elif mode == 'requests':
+                if app is None or not path:
+                    return {'success': False, 'error': 'Request captures need an endpoint path'}
+                try:
+                    endpoint, _ = app.url_map.bind('').match(path, method=method)
+                except Exception:
+                    return {'success': False, 'error': f'No route matches {method} {path}'}
+                original = app.view_functions[endpoint]
+                app.view_functions[endpoint] = self._wrap_view(endpoint, original)
+                capture['installed'].append(('view', app, endpoint, original))
+                capture['endpoint'] = endpoint
+            else:
+                return {'success': False, 'error': f'Unknown profiler mode: {mode}'}
+
+            self._capture = capture
+
+        return {'success': True, 'capture_id': capture['id'], 'mode': mode, 'count': count}
+
+    def disarm(self) -> Optional[Dict]:
+        """Stop the current capture early and build a report from what was collected"""
+        with self._lock:
+            if self._capture is None:
+                return None
+            return self._finish()
+
+    def tick_completed(self):
+        """Called by the update loop after each tick"""
+        capture = self._capture
+        if capture is None or capture['mode'] != 'ticks':
+            return
+        with self._lock:
+            if self._capture is not capture:
+                return
+            capture['completed'] += 1
+            if capture['completed'] >= capture['target_count']:
+                self._finish()
+
+    def get_status(self) -> Dict:
+        """Get the state of the current capture and the latest report"""
+        capture = self._capture
+        status = {'armed': capture is not None, 'last_report': None}
+        if capture is not None:
+            status.update({
+                'capture_id': capture['id'],
+                'mode': capture['mode'],
+                'completed': capture['completed'],
+                'target_count': capture['target_count']
+            })
+        if self.last_report:
+            status['last_report'] = {
+                key: self.last_report[key]
+                for key in ('capture_id', 'mode', 'completed', 'flamegraph_file', 'finished_at')
+            }
+        return status
+
+    def _wrap_hook(self, name: str, original: Callable) -> Callable:
+        def profiled(*args, **kwargs):
+            # Only the update loop is captured in tick mode; API threads pass through
+            if self._tick_thread is not None and threading.get_ident() != self._tick_thread:
+                return original(*args, **kwargs)
+            return self._run_profiled(f"tick;{name}", name, original, *args, **kwargs)
+        return profiled
+
+    def _wrap_view(self, endpoint: str, original: Callable) -> Callable:
+        def profiled(*args, **kwargs):
+            try:
+                return self._run_profiled(f"request;{endpoint}", endpoint, original, *args, **kwargs)
+            finally:
+                self._request_completed()
+        profiled.__name__ = original.__name__
+        return profiled
+
+    def _run_profiled(self, root: str, section: str, func: Callable, *args, **kwargs):
+        capture = self._capture
+        if capture is None:
+            return func(*args, **kwargs)
+        
+        # Each call gets its own collector so concurrent calls run unserialized;
+        # the lock is only taken to merge the results into the capture
+        collector = _StackCollector()
+        start = time.perf_counter()
+        try:
+            return collector.run(root, func, *args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                if self._capture is capture:
+                    stack_times = capture['stack_times']
+                    for stack, seconds in collector.stack_times.items():
+                        stack_times[stack] = stack_times.get(stack, 0.0) + seconds
+                    section_stats = capture['section_times'].setdefault(section, {'calls': 0, 'total_ms': 0.0})
+                    section_stats['calls'] += 1
+                    section_stats['total_ms'] += elapsed * 1000
+
+    def _request_completed(self):
+        with self._lock:
+            capture = self._capture
+            if capture is None or capture['mode'] != 'requests':
+                return
+            capture['completed'] += 1
+            if capture['completed'] >= capture['target_count']:
+                self._finish()
+
+    def _finish(self) -> Dict:
+        """Remove hooks, write the flamegraph file and store the report"""
+        capture = self._capture
+        self._capture = None
+
+        for installed in capture['installed']:
+            if installed[0] == 'hook':
+                _, target, method_name = installed
+                # Drop the instance override so the class method is used again
+                if method_name in vars(target):
+                    delattr(target, method_name)
+            else:
+                _, app, endpoint, original = installed
+                app.view_functions[endpoint] = original
+
+        stack_times = capture['stack_times']
+        os.makedirs(self.output_dir, exist_ok=True)
+        flamegraph_file = os.path.join(self.output_dir, f"profile_{capture['id']}.folded")
+        with open(flamegraph_file, 'w') as f:
+            for stack, seconds in sorted(stack_times.items()):
+                micros = int(round(seconds * 1_000_000))
+                if micros > 0:
+                    f.write(f"{stack} {micros}\n")
+
+        self.last_report = {
+            'capture_id': capture['id'],
+            'mode': capture['mode'],
+            'endpoint': capture.get('endpoint'),
+            'completed': capture['completed'],
+            'armed_at': capture['armed_at'],
+            'finished_at': datetime.now().isoformat(),
+            'flamegraph_file': os.path.abspath(flamegraph_file),
+            'sections': {
+                name: {
+                    'calls': stats['calls'],
+                    'total_ms': round(stats['total_ms'], 3),
+                    'avg_ms': round(stats['total_ms'] / stats['calls'], 3) if stats['calls'] else 0
+                }
+                for name, stats in capture['section_times'].items()
+            },
+            'top_functions': self._top_functions(stack_times)
+        }
+        return self.last_report
+
+    def _top_functions(self, stack_times: Dict[str, float], limit: int = 25) -> List[Dict]:
+        """Build the top-functions table with self and cumulative time"""
+        self_time = {}
+        total_time = {}
+
+        for stack, seconds in stack_times.items():
+            frames = stack.split(';')[2:]
+            if not frames:
+                continue
+            self_time[frames[-1]] = self_time.get(frames[-1], 0.0) + seconds
+            # Count each function once per stack so recursion is not double counted
+            for frame in set(frames):
+                total_time[frame] = total_time.get(frame, 0.0) + seconds
+
+        rows = [
+            {
+                'function': function,
+                'self_ms': round(self_time.get(function, 0.0) * 1000, 3),
+                'total_ms': round(total * 1000, 3)
+            }
+            for function, total in total_time.items()
+        ]
+        rows.sort(key=lambda row: (row['self_ms'], row['total_ms']), reverse=True)
+        return rows[:limit]
@@ -0,0 +1,502 @@
+"""
+RailOptiX Timetable Store
+Compiles networks and timetables into a memory-mappable binary file of fixed-width records
+
+    python timetable_store.py compile network.json -o network.rxn
+    python timetable_store.py compile csv_dir/ -o network.rxn
+    python timetable_store.py generate --scale national -o national.rxn
+    python timetable_store.py info network.rxn
+"""
+
+import argparse
+import csv
+import json
+import os
+import struct
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+
+MAGIC = b'RAILOPTX'
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+
+# Missing values in the fixed-width records
+NO_INDEX = -1
+NO_TIME = np.iinfo(np.int64).min
+EPOCH = datetime(1970, 1, 1)
+
+STATION_DTYPE = np.dtype([
+    ('id', '<i4'), ('name', '<i4'), ('lat', '<f8'), ('lng', '<f8'),
+    ('platforms', '<i2'), ('junction', '?')
+])
+SECTION_DTYPE = np.dtype([
+    ('id', '<i4'), ('from_station', '<i4'), ('to_station', '<i4'),
+    ('length_km', '<f4'), ('tracks', '<i1'), ('corridor', '<i4')
+])
+TRAIN_DTYPE = np.dtype([
+    ('id', '<i4'), ('name', '<i4'), ('type', '<i4'), ('priority', '<i4'),
+    ('from_station', '<i4'), ('to_station', '<i4'), ('current_station', '<i4'),
+    ('delay', '<i4'), ('speed', '<i2'), ('lat', '<f8'), ('lng', '<f8'),
+    ('scheduled_arrival', '<i8'), ('platform', '<i2'),
+    ('coaches', '<i2'), ('ac_coaches', '<i2'), ('sleeper_coaches', '<i2'),
+    ('wagons', '<i2'), ('weight', '<i4'), ('occupancy', '<i2'),
+    ('stops_start', '<i4'), ('stops_count', '<i2')
+])
+STOP_DTYPE = np.dtype([('station', '<i4'), ('arrival', '<i8'), ('departure', '<i8')])
+
+
+def _to_epochs(values: List[Optional[str]]) -> np.ndarray:
+    """ISO timestamps (wall clock, no zone) to epoch seconds; missing values become NO_TIME
+
+    Timestamps carrying a UTC offset are rejected: the store holds local
+    wall-clock times, so dropping the offset would silently shift them.
+    """
+    texts = []
+    for value in values:
+        if not value:
+            texts.append(None)
+            continue
+        text = value.isoformat() if isinstance(value, datetime) else str(value)
+        # Anything past the seconds is a fraction or an offset; only offsets are a problem
+        if len(text) > 19 and datetime.fromisoformat(text.replace('Z', '+00:00')).tzinfo is not None:
+            raise ValueError(f"Timestamp {text!r} has a UTC offset; timetables must use local wall-clock times")
+        texts.append(text[:19])
+    return np.array(texts, dtype='datetime64[s]').astype(np.int64)
+
+
+def _from_epoch(value) -> Optional[str]:
+    return None if value == NO_TIME else (EPOCH + timedelta(seconds=int(value))).isoformat()
+
+
+def _optional_int(value, default: int = NO_INDEX) -> int:
+    if value in (None, ''):
+        return default
+    return int(float(value))
+
+
+class _StringTable:
+    """Interns strings; records refer to them by index"""
+
+    def __init__(self):
+        self.index = {}
+        self.values = []
+
+    def add(self, value) -> int:
+        if value is None:
+            return NO_INDEX
+        value = str(value)
+        if value not in self.index:
+            self.index[value] = len(self.values)
+            self.values.append(value)
+        return self.index[value]
+
+    def arrays(self):
+        encoded = [value.encode('utf-8') for value in self.values]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(data) for data in encoded])
+        return offsets, np.frombuffer(b''.join(encoded), dtype=np.uint8)
+
+
+# --- reading sources ---------------------------------------------------------
+
+def read_source(path: str) -> Dict[str, Any]:
+    """Read a network from a JSON file (generator or DataManager format) or a CSV directory
+
+    A CSV directory holds stations.csv, sections.csv, trains.csv and
+    optionally stop_times.csv (train_id, sequence, station, arrival,
+    departure). Train routes are ';'-separated station ids.
+    """
+    if os.path.isdir(path):
+        return _read_csv_directory(path)
+    with open(path, encoding='utf-8') as handle:
+        network = json.load(handle)
+    return {
+        'stations': network.get('stations', []),
+        'sections': network.get('sections', []),
+        'trains': network.get('trains', []),
+        'timetable': network.get('timetable', {})
+    }
+
+
+def _read_csv(path: str) -> List[Dict[str, str]]:
+    if not os.path.exists(path):
+        return []
+    with open(path, newline='', encoding='utf-8') as handle:
+        return list(csv.DictReader(handle))
+
+
+def _read_csv_directory(path: str) -> Dict[str, Any]:
+    stations = [{
+        'id': row['id'],
+        'name': row.get('name') or row['id'],
+        'lat': float(row['lat']),
+        'lng': float(row['lng']),
+        'platforms': _optional_int(row.get('platforms'), 6),
+        'junction': str(row.get('junction', '')).lower() in ('1', 'true', 'yes')
+    } for row in _read_csv(os.path.join(path, 'stations.csv'))]
+
+    sections = [{
+        'id': row.get('id') or f"{row['from_station']}-{row['to_station']}",
+        'from_station': row['from_station'],
+        'to_station': row['to_station'],
+        'length_km': float(row.get('length_km') or 0),
+        'tracks': _optional_int(row.get('tracks'), 2),
+        'corridor': _optional_int(row.get('corridor'))
+    } for row in _read_csv(os.path.join(path, 'sections.csv'))]
+
+    trains = []
+    for row in _read_csv(os.path.join(path, 'trains.csv')):
+        consist = {key: int(row[key]) for key in ('coaches', 'ac_coaches', 'sleeper_coaches', 'wagons')
+                   if row.get(key)}
+        if row.get('weight'):
+            consist['weight'] = row['weight']
+        trains.append({
+            'id': row['id'],
+            'name': row.get('name') or row['id'],
+            'type': row.get('type') or 'Passenger',
+            'priority': row.get('priority') or 'medium',
+            'from_station': row['from_station'],
+            'to_station': row['to_station'],
+            'current_station': row.get('current_station') or row['from_station'],
+            'route': [stop for stop in (row.get('route') or '').split(';') if stop],
+            'delay': _optional_int(row.get('delay'), 0),
+            'speed': _optional_int(row.get('speed'), 60),
+            'scheduled_arrival': row.get('scheduled_arrival') or None,
+            'platform': _optional_int(row.get('platform'), None),
+            'consist': consist,
+            'occupancy': _optional_int(row.get('occupancy'), None)
+        })
+
+    timetable = {}
+    stop_rows = _read_csv(os.path.join(path, 'stop_times.csv'))
+    for row in sorted(stop_rows, key=lambda r: (r['train_id'], int(r.get('sequence') or 0))):
+        timetable.setdefault(row['train_id'], []).append(
+            [row['station'], row.get('arrival') or None, row.get('departure') or None])
+
+    return {'stations': stations, 'sections': sections, 'trains': trains, 'timetable': timetable}
+
+
+# --- compiling ---------------------------------------------------------------
+
+def compile_network(network: Dict[str, Any], output_path: str, source: str = None) -> Dict[str, Any]:
+    """Write a network as fixed-width NumPy record arrays plus a string table"""
+    strings = _StringTable()
+    enums = {'type': [], 'priority': []}
+
+    def enum_code(name: str, value) -> int:
+        if value is None:
+            return NO_INDEX
+        if value not in enums[name]:
+            enums[name].append(value)
+        return enums[name].index(value)
+
+    station_list = network['stations']
+    station_index = {station['id']: index for index, station in enumerate(station_list)}
+
+    stations = np.zeros(len(station_list), dtype=STATION_DTYPE)
+    for index, station in enumerate(station_list):
+        stations[index] = (strings.add(station['id']), strings.add(station.get('name', station['id'])),
+                           station['lat'], station['lng'], station.get('platforms') or 6,
+                           bool(station.get('junction')))
+
+    section_list = network.get('sections') or []
+    sections = np.zeros(len(section_list), dtype=SECTION_DTYPE)
+    for index, section in enumerate(section_list):
+        sections[index] = (strings.add(section['id']), station_index[section['from_station']],
+                           station_index[section['to_station']], section.get('length_km') or 0,
+                           section.get('tracks') or 1, _optional_int(section.get('corridor')))
+
+    train_list = network['trains']
+    timetable = network.get('timetable') or {}
+    trains = np.zeros(len(train_list), dtype=TRAIN_DTYPE)
+    stops, stop_times, arrivals = [], [], []
+    for index, train in enumerate(train_list):
+        consist = train.get('consist') or {}
+        position = train.get('position') or {}
+        current = station_list[station_index[train['current_station']]]
+
+        # Stop times come from the timetable, otherwise just the route without times
+        rows = timetable.get(train['id']) or [[station, None, None] for station in
+                                              (train.get('route') or [train['from_station'], train['to_station']])]
+        stops_start = len(stops)
+        for station, arrival, departure in rows:
+            stops.append(station_index[station])
+            stop_times.extend((arrival, departure))
+        arrivals.append(train.get('scheduled_arrival'))
+
+        trains[index] = (
+            strings.add(train['id']), strings.add(train.get('name', 'Train')),
+            enum_code('type', train.get('type')), enum_code('priority', train.get('priority')),
+            station_index.get(train.get('from_station'), NO_INDEX),
+            station_index.get(train.get('to_station'), NO_INDEX),
+            station_index.get(train.get('current_station'), NO_INDEX),
+            train.get('delay') or 0, train.get('speed') or 0,
+            position.get('lat', current['lat']), position.get('lng', current['lng']),
+            NO_TIME, _optional_int(train.get('platform')),
+            _optional_int(consist.get('coaches')), _optional_int(consist.get('ac_coaches')),
+            _optional_int(consist.get('sleeper_coaches')), _optional_int(consist.get('wagons')),
+            strings.add(consist.get('weight')), _optional_int(train.get('occupancy')),
+            stops_start, len(stops) - stops_start
+        )
+
+    trains['scheduled_arrival'] = _to_epochs(arrivals)
+    stop_array = np.zeros(len(stops), dtype=STOP_DTYPE)
+    stop_array['station'] = stops
+    stop_array['arrival'] = _to_epochs(stop_times[0::2])
+    stop_array['departure'] = _to_epochs(stop_times[1::2])
+
+    string_offsets, string_data = strings.arrays()
+    arrays = {
+        'stations': stations,
+        'sections': sections,
+        'trains': trains,
+        'stops': stop_array,
+        'string_offsets': string_offsets,
+        'string_data': string_data
+    }
+
+    header = {
+        'format_version': FORMAT_VERSION,
+        'compiled_at': datetime.now().isoformat(),
+        'source': source,
+        'enums': enums,
+        'has_routes': any(train.get('route') for train in train_list),
+        'arrays': {}
+    }
+    # Array offsets depend on the header length, so lay out with a generous header first
+    layout_offset = ALIGNMENT * (1 + (len(json.dumps(header)) + 256 * len(arrays) + 16) // ALIGNMENT)
+    offset = layout_offset
+    for name, array in arrays.items():
+        dtype = array.dtype.descr if array.dtype.names else array.dtype.str
+        header['arrays'][name] = {'dtype': dtype, 'shape': list(array.shape), 'offset': offset}
+        offset += -(-array.nbytes // ALIGNMENT) * ALIGNMENT
+
+    header_bytes = json.dumps(header).encode('utf-8')
+    if len(header_bytes) + 16 > layout_offset:
+        raise ValueError("Timetable header does not fit its reserved space")
+
+    with open(output_path, 'wb') as handle:
+        handle.write(MAGIC + struct.pack('<II', FORMAT_VERSION, len(header_bytes)) + header_bytes)
+        for name, array in arrays.items():
+            handle.seek(header['arrays'][name]['offset'])
+            handle.write(array.tobytes())
+        handle.truncate(offset)
+
+    return {
+        'path': output_path,
+        'bytes': offset,
+        'stations': len(stations),
+        'sections': len(sections),
+        'trains': len(trains),
+        'stops': len(stops),
+        'strings': len(strings.values)
+    }
+
+
+# --- reading compiled files --------------------------------------------------
+
+class CompiledNetwork:
+    """Read-only view of a compiled network file
+
+    Arrays are memory-mapped, so opening is near-instant and worker
+    processes opening the same file share its pages through the OS page
+    cache. Dicts in the DataManager format are only built on request.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as handle:
+            magic = handle.read(len(MAGIC))
+            if magic != MAGIC:
+                raise ValueError(f"{path} is not a compiled RailOptiX network")
+            version, header_length = struct.unpack('<II', handle.read(8))
+            if version != FORMAT_VERSION:
+                raise ValueError(f"Unsupported network format version {version}")
+            self.header = json.loads(handle.read(header_length).decode('utf-8'))
+
+        self.enums = self.header['enums']
+        self.opened_at = datetime.now().isoformat()
+        for name, spec in self.header['arrays'].items():
+            dtype = np.dtype([tuple(field) for field in spec['dtype']]) if isinstance(spec['dtype'], list) \
+                else np.dtype(spec['dtype'])
+            shape = tuple(spec['shape'])
+            if shape[0] == 0:
+                array = np.zeros(shape, dtype=dtype)
+            else:
+                array = np.memmap(path, mode='r', dtype=dtype, offset=spec['offset'], shape=shape)
+            setattr(self, name, array)
+        self._strings = None
+        # Plain ndarray views of the mapped records (no copies, and no memmap overhead per item)
+        self._train_records = self.trains.view(np.ndarray)
+        self._stop_stations = self.stops.view(np.ndarray)['station']
+        self._stations_by_index = None
+
+    def string(self, index: int) -> Optional[str]:
+        if index == NO_INDEX:
+            return None
+        if self._strings is not None:
+            return self._strings[index]
+        start, end = self.string_offsets[index], self.string_offsets[index + 1]
+        return bytes(self.string_data[start:end]).decode('utf-8')
+
+    def strings(self) -> List[str]:
+        """Decode the whole string table once (fast path for bulk conversion)"""
+        if self._strings is None:
+            blob = bytes(self.string_data)
+            offsets = self.string_offsets.tolist()
+            self._strings = [blob[start:end].decode('utf-8') for start, end in zip(offsets, offsets[1:])]
+        return self._strings
+
+    def station_dicts(self) -> List[Dict]:
+        strings = self.strings()
+        return [
+            {'id': strings[id_], 'name': strings[name], 'lat': lat, 'lng': lng,
+             'platforms': platforms, 'junction': junction}
+            for id_, name, lat, lng, platforms, junction in self.stations.tolist()
+        ]
+
+    def section_dicts(self) -> List[Dict]:
+        strings = self.strings()
+        station_ids = [strings[index] for index in self.stations['id'].tolist()]
+        return [
+            {'id': strings[id_], 'from_station': station_ids[a], 'to_station': station_ids[b],
+             'length_km': round(length, 2), 'tracks': tracks, 'corridor': None if corridor == NO_INDEX else corridor}
+            for id_, a, b, length, tracks, corridor in self.sections.tolist()
+        ]
+
+    def _station_lookup(self) -> List[Optional[str]]:
+        """Station ids by index, ending with None so NO_INDEX (-1) looks up as no station"""
+        if self._stations_by_index is None:
+            self._stations_by_index = [self.string(index) for index in self.stations['id'].tolist()] + [None]
+        return self._stations_by_index
+
+    def train_dicts(self, indexes: List[int] = None) -> List[Dict]:
+        """Trains in the DataManager format, fully decoded (all, or the records at `indexes`)
+
+        Only the selected records are read, so a worker decoding its own
+        trains leaves the rest in the shared page cache.
+        """
+        strings = self.strings()
+        station_ids = self._station_lookup()
+        stop_stations = self._stop_stations.tolist()
+        records = self._train_records if indexes is None else self._train_records[np.asarray(indexes, dtype=np.int64)]
+        return [self._decode_train(record, strings.__getitem__, station_ids, stop_stations)
+                for record in records.tolist()]
+
+    def current_stations(self) -> List[Optional[str]]:
+        """Current station of every train, in record order, without decoding the trains"""
+        station_ids = self._station_lookup()
+        return [station_ids[index] for index in self._train_records['current_station'].tolist()]
+
+    def train_record(self, index: int) -> Dict:
+        """One train in the DataManager format"""
+        return self._decode_train(self._train_records[index].item(), self.string, self._station_lookup(),
+                                  self._stop_stations)
+
+    def _decode_train(self, record: tuple, string, station_ids: List[str], stop_stations) -> Dict:
+        """A train record (as a tuple) in the DataManager format (`station_ids` from `_station_lookup`)"""
+        (id_, name, type_, priority, from_station, to_station, current_station, delay, speed,
+         lat, lng, scheduled_arrival, platform, coaches, ac_coaches, sleeper_coaches, wagons,
+         weight, occupancy, stops_start, stops_count) = record
+
+        if wagons != NO_INDEX:
+            consist = {'wagons': wagons}
+            if weight != NO_INDEX:
+                consist['weight'] = string(weight)
+        else:
+            consist = {key: value for key, value in
+                       (('coaches', coaches), ('ac_coaches', ac_coaches), ('sleeper_coaches', sleeper_coaches))
+                       if value != NO_INDEX}
+
+        train = {
+            'id': string(id_),
+            'name': string(name),
+            'type': None if type_ == NO_INDEX else self.enums['type'][type_],
+            'priority': None if priority == NO_INDEX else self.enums['priority'][priority],
+            'from_station': station_ids[from_station],
+            'to_station': station_ids[to_station],
+            'current_station': station_ids[current_station],
+            'delay': delay,
+            'speed': speed,
+            'position': {'lat': lat, 'lng': lng},
+            'status': 'on_time' if delay <= 0 else ('slight_delay' if delay <= 10 else 'delayed'),
+            'last_updated': self.opened_at,
+            'scheduled_arrival': _from_epoch(scheduled_arrival),
+            'platform': None if platform == NO_INDEX else platform,
+            'consist': consist,
+            'occupancy': None if occupancy == NO_INDEX else occupancy
+        }
+        if self.header.get('has_routes'):
+            stations = stop_stations[stops_start:stops_start + stops_count]
+            train['route'] = [station_ids[index] for index in
+                              (stations if isinstance(stations, list) else stations.tolist())]
+        return train
+
+    def stop_times(self, train_index: int) -> List[List]:
+        """[station_id, arrival, departure] rows of one train, read straight from the mapped file"""
+        record = self.trains[train_index]
+        start = int(record['stops_start'])
+        rows = self.stops[start:start + int(record['stops_count'])]
+        return [[self.string(int(self.stations[int(row['station'])]['id'])),
+                 _from_epoch(int(row['arrival'])), _from_epoch(int(row['departure']))] for row in rows]
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            'path': self.path,
+            'bytes': os.path.getsize(self.path),
+            'format_version': self.header['format_version'],
+            'compiled_at': self.header['compiled_at'],
+            'source': self.header.get('source'),
+            'stations': len(self.stations),
+            'sections': len(self.sections),
+            'trains': len(self.trains),
+            'stops': len(self.stops),
+            'strings': len(self.string_offsets) - 1
+        }
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description='RailOptiX timetable compiler')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    compile_parser = commands.add_parser('compile', help='Compile a JSON file or CSV directory')
+    compile_parser.add_argument('source')
+    compile_parser.add_argument('-o', '--output', required=True)
+
+    generate_parser = commands.add_parser('generate', help='Compile a synthetic network')
+    generate_parser.add_argument('--scale', default='division')
+    generate_parser.add_argument('--seed', type=int, default=42)
+    generate_parser.add_argument('-o', '--output', required=True)
+
+    info_parser = commands.add_parser('info', help='Describe a compiled file')
+    info_parser.add_argument('path')
+    args = parser.parse_args(argv)
+
+    if args.command == 'info':
+        start = time.perf_counter()
+        network = CompiledNetwork(args.path)
+        print(json.dumps({**network.info(), 'open_ms': round((time.perf_counter() - start) * 1000, 2)}, indent=2))
+        return 0
+
+    start = time.perf_counter()
+    if args.command == 'generate':
+        from network_generator import SyntheticNetworkGenerator
+
+        network = SyntheticNetworkGenerator(args.seed).generate(args.scale)
+        source = f"synthetic:{args.scale}:{args.seed}"
+    else:
+        network = read_source(args.source)
+        source = os.path.abspath(args.source)
+
+    summary = compile_network(network, args.output, source)
+    summary['compile_ms'] = round((time.perf_counter() - start) * 1000, 2)
+    print(json.dumps(summary, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
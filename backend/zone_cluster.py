@@ -0,0 +1,648 @@
+#!/usr/bin/env python3
+"""
+RailOptiX Zone Cluster
+Splits the network into zones, each owned by a worker with its own
+DataManager/ConflictDetector shard, coordinated through a message bus
+
+Usage (one worker process per zone, normally started by app.py):
+    python zone_cluster.py --zone 0 --zones 4 --message-queue redis://localhost:6379/0
+"""
+
+import argparse
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime
+from typing import List, Dict, Any, Optional
+
+from data_manager import DataManager
+from conflict_detector import ConflictDetector
+from delay_propagation import DelayPropagationModel
+from network_simulator import LookaheadSimulator
+from optimization_engine import TrainOptimizer
+from message_bus import MessageBus, create_message_bus
+
+SNAPSHOT_CHANNEL = 'railoptix:snapshots'
+COMMAND_CHANNEL = 'railoptix:commands'
+
+
+def zone_channel(zone_id: int) -> str:
+    return f"railoptix:zone:{zone_id}"
+
+
+def conflict_train_ids(conflict: Dict) -> List[str]:
+    return [train_id for train_id in (conflict.get(key, {}).get('id') for key in ('train1', 'train2')) if train_id]
+
+
+def assign_zones(stations: List[Dict], num_zones: int) -> Dict[str, int]:
+    """Split stations into contiguous west-to-east bands of equal size"""
+    ordered = sorted(stations, key=lambda s: (s['lng'], s['lat'], s['id']))
+    per_zone = max(1, -(-len(ordered) // max(1, num_zones)))
+    return {station['id']: min(index // per_zone, num_zones - 1) for index, station in enumerate(ordered)}
+
+
+def load_base_network(network_scale: str = None, seed: int = 42, network_file: str = None) -> Dict[str, Any]:
+    """Stations, trains and sections every worker shards from (the same seed in every process)
+
+    Only the raw records are loaded; each worker builds platform and block
+    state for its own zone. A compiled network comes without 'trains': the
+    shared mapped file ('compiled') is returned instead, so a worker only
+    decodes its own records.
+    """
+    if network_file:
+        from timetable_store import CompiledNetwork
+
+        compiled = CompiledNetwork(network_file)
+        return {'stations': compiled.station_dicts(), 'sections': compiled.section_dicts(), 'compiled': compiled}
+    if network_scale:
+        from network_generator import SyntheticNetworkGenerator
+
+        return SyntheticNetworkGenerator(seed).generate(network_scale)
+
+    # The demo data draws positions and consists from `random`; seed it so every
+    # process shards the same trains, without disturbing the caller's sequence
+    state = random.getstate()
+    random.seed(seed)
+    try:
+        demo = DataManager()
+    finally:
+        random.setstate(state)
+    return {'stations': list(demo.network_layout['stations'].values()), 'trains': demo.get_active_trains(),
+            'sections': demo.network_layout.get('sections')}
+
+
+class ZoneWorker:
+    """Owns the trains and conflicts of one zone and runs its update loop"""
+
+    # Boundary trains not refreshed for this many ticks are forgotten
+    INCOMING_TTL_TICKS = 3
+
+    def __init__(self, zone_id: int, num_zones: int, bus: MessageBus, emitter=None,
+                 network_scale: str = None, seed: int = 42, tick_interval: float = 5.0,
+                 network_file: str = None):
+        self.zone_id = zone_id
+        self.num_zones = num_zones
+        self.bus = bus
+        self.emitter = emitter
+        self.tick_interval = tick_interval
+        self.tick_count = 0
+        self.incoming_trains = {}
+        self._lock = threading.RLock()
+        self._stop = threading.Event()
+
+        network = load_base_network(network_scale, seed, network_file)
+        stations = network['stations']
+        self.station_zones = assign_zones(stations, num_zones)
+        self.station_names = {station['id']: station['name'] for station in stations}
+
+        # Platform and block state is built once, for this zone's trains only
+        compiled = network.get('compiled')
+        if compiled:
+            zone_trains = compiled.train_dicts([index for index, station in enumerate(compiled.current_stations())
+                                                if self.zone_of(station) == zone_id])
+        else:
+            zone_trains = [train for train in network['trains']
+                           if self.zone_of(train.get('current_station')) == zone_id]
+        self.data_manager = DataManager()
+        self.data_manager.load_network(stations, zone_trains, network.get('sections'))
+        del network
+
+        # Demo and random conflicts come from zone 0 only, as often as in single-process mode
+        delay_predictor = DelayPropagationModel(self.data_manager)
+        self.conflict_detector = ConflictDetector(platform_allocator=self.data_manager.platform_allocator,
+                                                  block_reservations=self.data_manager.block_reservations,
+                                                  delay_predictor=delay_predictor,
+                                                  simulated_conflicts=zone_id == 0)
+        self.optimizer = TrainOptimizer(block_reservations=self.data_manager.block_reservations,
+                                        simulator=LookaheadSimulator(self.data_manager),
+                                        delay_predictor=delay_predictor)
+
+        self.bus.subscribe(zone_channel(zone_id), self._handle_zone_message)
+        self.bus.subscribe(COMMAND_CHANNEL, self._handle_command)
+
+    def zone_of(self, station_id: Optional[str]) -> int:
+        return self.station_zones.get(station_id, 0)
+
+    def run(self):
+        """Update loop of this zone (the sharded equivalent of app.simulate_real_time_updates)"""
+        self.publish_snapshot()
+        while not self._stop.is_set():
+            try:
+                self.tick()
+            except Exception as e:
+                print(f"Error in zone {self.zone_id} updates: {e}")
+            self._stop.wait(self.tick_interval)
+
+    def stop(self):
+        self._stop.set()
+
+    def tick(self) -> List[Dict]:
+        """Advance the zone by one tick and return newly detected conflicts"""
+        with self._lock:
+            self.tick_count += 1
+            self.data_manager.update_train_positions()
+            self._publish_boundary_trains()
+
+            new_conflicts = self.conflict_detector.detect_conflicts()
+            cross_zone = self.conflict_detector.detect_cross_zone_conflicts(
+                self.data_manager.get_active_trains(),
+                [train for train, _ in self.incoming_trains.values()],
+                self.station_names
+            )
+            new_conflicts.extend(cross_zone)
+
+            # The zone hosting the entry station owns a cross-zone conflict;
+            # the neighbour only records it so both shards report it
+            for conflict in cross_zone:
+                foreign_train = self.incoming_trains.get(conflict['train2']['id'])
+                if foreign_train:
+                    self.bus.publish(zone_channel(foreign_train[0]['from_zone']), {
+                        'type': 'conflict',
+                        'conflict': conflict
+                    })
+
+            suggestions = self.optimizer.get_recommendations(new_conflicts) if new_conflicts else []
+
+        if new_conflicts and self.emitter is not None:
+            self.emitter.emit('conflict_detected', {
+                'conflicts': new_conflicts,
+                'suggestions': suggestions,
+                'zone': self.zone_id,
+                'timestamp': datetime.now().isoformat()
+            }, namespace='/')
+
+        self.publish_snapshot()
+        return new_conflicts
+
+    def publish_snapshot(self):
+        with self._lock:
+            snapshot = {
+                'zone': self.zone_id,
+                'tick': self.tick_count,
+                'trains': self.data_manager.get_active_trains(),
+                'conflicts': self.conflict_detector.get_active_conflicts(),
+                'suggestions': self._suggestion_summaries(),
+                'timestamp': datetime.now().isoformat()
+            }
+        self.bus.publish(SNAPSHOT_CHANNEL, snapshot)
+
+    def _suggestion_summaries(self) -> Dict[str, Dict]:
+        """What the web process needs to validate a batch: each open suggestion's conflict and actions"""
+        active = self.conflict_detector.active_conflicts
+        return {
+            suggestion_id: {
+                'conflict_id': suggestion.get('conflict_id'),
+                'recommended_option': {'actions': (suggestion.get('recommended_option') or {}).get('actions', [])}
+            }
+            for suggestion_id, suggestion in self.optimizer.active_suggestions.items()
+            if suggestion.get('conflict_id') in active
+        }
+
+    def _publish_boundary_trains(self):
+        """Tell neighbouring zones about trains heading into their territory"""
+        outgoing = {}
+        for train in self.data_manager.get_active_trains():
+            entry = self._next_foreign_station(train)
+            if entry:
+                station_id, target_zone = entry
+                outgoing.setdefault(target_zone, []).append({
+                    **train,
+                    'entry_station': station_id,
+                    'from_zone': self.zone_id
+                })
+
+        for target_zone, trains in outgoing.items():
+            self.bus.publish(zone_channel(target_zone), {'type': 'boundary', 'trains': trains})
+
+        # Expire boundary trains the neighbour stopped announcing
+        expired = [train_id for train_id, (_, seen) in self.incoming_trains.items()
+                   if self.tick_count - seen > self.INCOMING_TTL_TICKS]
+        for train_id in expired:
+            del self.incoming_trains[train_id]
+
+    def _next_foreign_station(self, train: Dict):
+        """Next stop of the train if it lies in another zone"""
+        route = train.get('route') or [train.get('current_station'), train.get('to_station')]
+        current = train.get('current_station')
+        next_index = route.index(current) + 1 if current in route else 0
+        if next_index >= len(route):
+            return None
+        target_zone = self.zone_of(route[next_index])
+        if target_zone == self.zone_id:
+            return None
+        return route[next_index], target_zone
+
+    def _handle_zone_message(self, message: Dict):
+        with self._lock:
+            if message.get('type') == 'boundary':
+                for train in message.get('trains', []):
+                    self.incoming_trains[train['id']] = (train, self.tick_count)
+            elif message.get('type') == 'conflict':
+                self.conflict_detector.register_conflict(message['conflict'])
+            elif message.get('type') == 'resolved':
+                for conflict_id in message.get('conflict_ids', []):
+                    self.conflict_detector.resolve_conflict(conflict_id, message.get('method', 'resolved_elsewhere'))
+        if message.get('type') == 'resolved':
+            self.publish_snapshot()
+
+    def _handle_command(self, message: Dict):
+        command = message.get('command')
+        if command == 'accept_suggestion':
+            result = None
+            if message.get('suggestion_id') in self.optimizer.active_suggestions:
+                # Same path as a batch of one, so the conflict is resolved in every zone tracking it
+                batch = self.accept_suggestions([{'suggestion_id': message['suggestion_id'],
+                                                  'conflict_id': message.get('conflict_id')}])
+                result = batch['implemented'][0] if batch['implemented'] else {
+                    'success': False, 'timestamp': datetime.now().isoformat(), **batch['rejected'][0]}
+            self.bus.reply(message, {'zone': self.zone_id, 'result': result})
+        elif command == 'accept_suggestions' and message.get('zone') == self.zone_id:
+            batch = self.accept_suggestions(message.get('suggestions', []))
+            self.bus.reply(message, {'zone': self.zone_id, 'batch': batch})
+        elif command == 'recommend' and message.get('zone') == self.zone_id:
+            with self._lock:
+                # Conflicts raised by another zone about this zone's trains are tracked here too
+                for conflict in message.get('conflicts', []):
+                    self.conflict_detector.register_conflict(conflict)
+                suggestions = self.optimizer.get_recommendations(message.get('conflicts', []))
+            self.bus.reply(message, {'zone': self.zone_id, 'suggestions': suggestions})
+        elif command == 'simulate':
+            with self._lock:
+                simulation = self.optimizer.run_simulation(message.get('scenario', {}))
+                trains = len(self.data_manager.trains)
+            self.bus.reply(message, {'zone': self.zone_id, 'simulation': simulation, 'trains': trains})
+
+    def accept_suggestions(self, requests: List[Dict]) -> Dict:
+        """Validate and apply this zone's share of a batch, then re-detect around the trains it touched"""
+        with self._lock:
+            active = {conflict['id']: conflict for conflict in self.conflict_detector.get_active_conflicts()}
+            batch = self.optimizer.implement_suggestions(requests, set(active))
+
+            affected_trains = set(batch['affected_trains'])
+            for result in batch['implemented']:
+                conflict = active.get(result['conflict_id'], {})
+                affected_trains.update(conflict_train_ids(conflict))
+                self.conflict_detector.resolve_conflict(result['conflict_id'], 'suggestion_implemented')
+
+            new_conflicts = self.conflict_detector.detect_conflicts(affected_trains) if batch['implemented'] else []
+            batch['affected_trains'] = sorted(affected_trains)
+            batch['conflicts'] = new_conflicts
+            batch['suggestions'] = self.optimizer.get_recommendations(new_conflicts) if new_conflicts else []
+
+        # Other zones may track the same conflicts (cross-zone, or raised there about this zone's trains)
+        resolved = [result['conflict_id'] for result in batch['implemented']]
+        if resolved:
+            for zone in range(self.num_zones):
+                if zone != self.zone_id:
+                    self.bus.publish(zone_channel(zone), {'type': 'resolved', 'conflict_ids': resolved,
+                                                          'method': 'suggestion_implemented'})
+        self.publish_snapshot()
+        return batch
+
+
+class ZoneCluster:
+    """Web-process side of multi-worker mode: starts zone workers and merges their state"""
+
+    def __init__(self, bus: MessageBus, num_zones: int, message_queue: str = None,
+                 tick_interval: float = 5.0, network_scale: str = None, seed: int = 42,
+                 network_file: str = None):
+        self.bus = bus
+        self.num_zones = num_zones
+        self.message_queue = message_queue
+        self.tick_interval = tick_interval
+        self.network_scale = network_scale
+        self.seed = seed
+        self.network_file = network_file
+        self.snapshots = {}
+        self.workers = []
+        self.processes = []
+        self._lock = threading.Lock()
+
+        self.bus.subscribe(SNAPSHOT_CHANNEL, self._handle_snapshot)
+
+    @property
+    def uses_processes(self) -> bool:
+        return bool(self.message_queue and self.message_queue.startswith(('redis://', 'rediss://')))
+
+    def start(self):
+        """Start one worker per zone: processes with Redis, threads with the in-process bus"""
+        for zone_id in range(self.num_zones):
+            if self.uses_processes:
+                command = [sys.executable, os.path.abspath(__file__),
+                           '--zone', str(zone_id), '--zones', str(self.num_zones),
+                           '--message-queue', self.message_queue,
+                           '--tick-interval', str(self.tick_interval), '--seed', str(self.seed)]
+                if self.network_scale:
+                    command += ['--scale', self.network_scale]
+                if self.network_file:
+                    command += ['--network-file', os.path.abspath(self.network_file)]
+                self.processes.append(subprocess.Popen(command, cwd=os.path.dirname(os.path.abspath(__file__))))
+            else:
+                worker = ZoneWorker(zone_id, self.num_zones, self.bus, self.bus.create_emitter(),
+                                    self.network_scale, self.seed, self.tick_interval, self.network_file)
+                threading.Thread(target=worker.run, daemon=True).start()
+                self.workers.append(worker)
+
+    def stop(self):
+        for worker in self.workers:
+            worker.stop()
+        for process in self.processes:
+            process.terminate()
+        for process in self.processes:
+            process.wait(timeout=10)
+
+    def _handle_snapshot(self, snapshot: Dict):
+        with self._lock:
+            previous = self.snapshots.get(snapshot['zone'])
+            if previous is None or snapshot['tick'] >= previous['tick']:
+                self.snapshots[snapshot['zone']] = snapshot
+
+    def get_active_trains(self) -> List[Dict]:
+        with self._lock:
+            snapshots = list(self.snapshots.values())
+        return [train for snapshot in snapshots for train in snapshot['trains']]
+
+    def get_train_by_id(self, train_id: str) -> Dict:
+        return next((train for train in self.get_active_trains() if train['id'] == train_id), {})
+
+    def get_active_conflicts(self) -> List[Dict]:
+        with self._lock:
+            snapshots = sorted(self.snapshots.values(), key=lambda s: s['zone'])
+        # Cross-zone conflicts appear in both neighbouring shards
+        merged = {}
+        for snapshot in snapshots:
+            for conflict in snapshot['conflicts']:
+                merged.setdefault(conflict['id'], conflict)
+
+        conflicts = list(merged.values())
+        priority_order = {'high': 3, 'medium': 2, 'low': 1}
+        conflicts.sort(key=lambda x: (
+            priority_order.get(x.get('priority', 'low'), 1),
+            x.get('estimated_time', '')
+        ), reverse=True)
+        return conflicts
+
+    def implement_remote_suggestion(self, suggestion_id: str, conflict_id: str) -> Optional[Dict]:
+        """Ask every zone to implement a suggestion it generated; the owner answers with the result"""
+        replies = self.bus.request(COMMAND_CHANNEL, {
+            'command': 'accept_suggestion',
+            'suggestion_id': suggestion_id,
+            'conflict_id': conflict_id
+        }, expected_replies=self.num_zones)
+        return next((reply['result'] for reply in replies if reply.get('result')), None)
+
+    def train_zones(self) -> Dict[str, int]:
+        with self._lock:
+            snapshots = list(self.snapshots.values())
+        return {train['id']: snapshot['zone'] for snapshot in snapshots for train in snapshot['trains']}
+
+    def conflict_zones(self) -> Dict[str, int]:
+        """Zone that answers for each active conflict (the lowest zone reporting it)"""
+        with self._lock:
+            snapshots = sorted(self.snapshots.values(), key=lambda s: s['zone'])
+        zones = {}
+        for snapshot in snapshots:
+            for conflict in snapshot['conflicts']:
+                zones.setdefault(conflict['id'], snapshot['zone'])
+        return zones
+
+    def recommend_remote(self, zone: int, conflicts: List[Dict]) -> Optional[List[Dict]]:
+        """Have a zone recommend (and keep) suggestions for its conflicts; None if it does not answer"""
+        replies = self.bus.request(COMMAND_CHANNEL, {
+            'command': 'recommend',
+            'zone': zone,
+            'conflicts': conflicts
+        })
+        return next((reply['suggestions'] for reply in replies if reply.get('zone') == zone), None)
+
+    def simulate_remote(self, scenario: Dict, timeout: float = 30.0) -> List[Dict]:
+        """Run a what-if scenario in every zone; one reply per zone that answered"""
+        return self.bus.request(COMMAND_CHANNEL, {
+            'command': 'simulate',
+            'scenario': scenario
+        }, expected_replies=self.num_zones, timeout=timeout)
+
+    def get_suggestions(self) -> Dict[str, Dict]:
+        """Open suggestions of every zone (suggestion_id -> summary with its 'zone'), from the snapshots"""
+        with self._lock:
+            snapshots = list(self.snapshots.values())
+        return {suggestion_id: {**summary, 'zone': snapshot['zone']}
+                for snapshot in snapshots for suggestion_id, summary in snapshot.get('suggestions', {}).items()}
+
+    def implement_remote_suggestions(self, zone: int, requests: List[Dict]) -> Optional[Dict]:
+        """Send one zone its share of a batch as a single command; None if it does not answer"""
+        replies = self.bus.request(COMMAND_CHANNEL, {
+            'command': 'accept_suggestions',
+            'zone': zone,
+            'suggestions': requests
+        })
+        return next((reply['batch'] for reply in replies if reply.get('zone') == zone), None)
+
+    def get_status(self) -> Dict[str, Any]:
+        with self._lock:
+            zones = {
+                zone: {'tick': snapshot['tick'], 'trains': len(snapshot['trains']),
+                       'conflicts': len(snapshot['conflicts']), 'timestamp': snapshot['timestamp']}
+                for zone, snapshot in self.snapshots.items()
+            }
+        return {
+            'zones': self.num_zones,
+            'mode': 'processes' if self.uses_processes else 'threads',
+            'zone_status': zones
+        }
+
+
+class ClusterDataView:
+    """Read-only DataManager facade over the merged zone snapshots"""
+
+    def __init__(self, cluster: ZoneCluster):
+        self.cluster = cluster
+
+    def get_active_trains(self) -> List[Dict]:
+        return self.cluster.get_active_trains()
+
+    def get_train_by_id(self, train_id: str) -> Dict:
+        return self.cluster.get_train_by_id(train_id)
+
+
+class ClusterConflictView:
+    """Read-only ConflictDetector facade over the merged zone snapshots"""
+
+    def __init__(self, cluster: ZoneCluster):
+        self.cluster = cluster
+
+    def get_active_conflicts(self) -> List[Dict]:
+        return self.cluster.get_active_conflicts()
+
+
+class ClusterOptimizer(TrainOptimizer):
+    """Optimizer for the web process: recommendations and simulations run in the zones owning the trains
+
+    Each zone's optimizer has its own look-ahead simulator and delay model,
+    so suggestions and what-if figures come from the same code path as in
+    single-process mode.
+    """
+
+    def __init__(self, cluster: ZoneCluster):
+        super().__init__()
+        self.cluster = cluster
+        # Summaries of suggestions zones made on request, until their snapshots list them
+        self.zone_suggestions = {}
+
+    def get_recommendations(self, conflicts: List[Dict]) -> List[Dict]:
+        """Recommend in the zone owning the conflict's trains (else the zone reporting it)"""
+        zones = self.cluster.conflict_zones()
+        train_zones = self.cluster.train_zones()
+        by_zone = {}
+        for conflict in conflicts:
+            owners = [train_zones[train_id] for train_id in conflict_train_ids(conflict) if train_id in train_zones]
+            zone = owners[0] if owners else zones.get(conflict.get('id'))
+            if zone is not None:
+                by_zone.setdefault(zone, []).append(conflict)
+
+        self.zone_suggestions = {suggestion_id: summary for suggestion_id, summary in self.zone_suggestions.items()
+                                 if summary['conflict_id'] in zones}
+        suggestions = []
+        for zone, zone_conflicts in sorted(by_zone.items()):
+            for suggestion in self.cluster.recommend_remote(zone, zone_conflicts) or []:
+                self.zone_suggestions[suggestion['id']] = {
+                    'conflict_id': suggestion.get('conflict_id'),
+                    'recommended_option': {'actions': (suggestion.get('recommended_option') or {}).get('actions', [])},
+                    'zone': zone
+                }
+                suggestions.append(suggestion)
+        return suggestions
+
+    def run_simulation(self, scenario: Dict) -> Dict:
+        """Run the scenario in every zone and combine the figures, weighting averages by zone train count"""
+        replies = sorted(self.cluster.simulate_remote(scenario), key=lambda reply: reply['zone'])
+        if not replies:
+            return super().run_simulation(scenario)
+
+        total_trains = sum(reply['trains'] for reply in replies) or 1
+        results = [(reply['simulation'], reply['trains']) for reply in replies]
+
+        def state(key: str) -> Dict:
+            states = [(simulation['results'][key], trains) for simulation, trains in results]
+            return {
+                'avg_delay': round(sum(s['avg_delay'] * trains for s, trains in states) / total_trains, 1),
+                'throughput': round(sum(s['throughput'] * trains for s, trains in states) / total_trains, 1),
+                'conflicts': sum(s['conflicts'] for s, _ in states),
+                'efficiency': round(sum(s['efficiency'] * trains for s, trains in states) / total_trains, 1)
+            }
+
+        before, after = state('before'), state('after')
+        simulation = {
+            **results[0][0],
+            'confidence': min(simulation['confidence'] for simulation, _ in results),
+            'execution_time': max((simulation['execution_time'] for simulation, _ in results),
+                                  key=lambda text: float(text.split()[0])),
+            'zones': len(results)
+        }
+        simulation['results'] = {'before': before, 'after': after, 'improvements': self._improvements(before, after)}
+        if all('propagation' in simulation['results'] for simulation, _ in results):
+            simulation['results']['propagation'] = self._merge_propagation(results, total_trains)
+        return simulation
+
+    def _merge_propagation(self, results: List[tuple], total_trains: int, top: int = 5) -> Dict:
+        def summary(key: str) -> Dict:
+            summaries = [(simulation['results']['propagation'][key], trains) for simulation, trains in results]
+            return {
+                'total_knock_on': round(sum(s['total_knock_on'] for s, _ in summaries), 1),
+                'affected_trains': sum(s['affected_trains'] for s, _ in summaries),
+                'max_knock_on': max(s['max_knock_on'] for s, _ in summaries),
+                'avg_arrival_delay': round(sum(s['avg_arrival_delay'] * trains for s, trains in summaries)
+                                           / total_trains, 1),
+                'dependencies': sum(s['dependencies'] for s, _ in summaries),
+                'most_affected': sorted((entry for s, _ in summaries for entry in s['most_affected']),
+                                        key=lambda entry: -entry['knock_on_delay'])[:top]
+            }
+
+        before, after = summary('before'), summary('after')
+        return {'before': before, 'after': after,
+                'knock_on_change': round(after['total_knock_on'] - before['total_knock_on'], 1)}
+
+    def implement_suggestion(self, suggestion_id: str, conflict_id: str) -> Dict:
+        # Suggestions live in the zone that made them, never in the web process
+        result = self.cluster.implement_remote_suggestion(suggestion_id, conflict_id)
+        if result is None:
+            return {
+                'success': False,
+                'error': 'Suggestion not found',
+                'timestamp': datetime.now().isoformat()
+            }
+        return result
+
+    def implement_suggestions(self, requests: List[Dict], active_conflict_ids: set = None) -> Dict:
+        """Validate the whole batch here, then send each zone its share as one command
+
+        Every suggestion is owned by the zone that made it (see
+        get_recommendations) and is known here from the zone snapshots, so
+        nothing is applied unless the batch as a whole checks out. Each zone
+        re-validates its share against its live state, applies it, resolves the
+        conflicts (in every zone tracking them) and re-detects around the trains
+        it touched.
+        """
+        owned = {**self.zone_suggestions, **self.cluster.get_suggestions()}
+        valid, rejected = self.validate_suggestions(requests, active_conflict_ids, owned)
+
+        implemented, affected_trains, conflicts, suggestions = [], set(), [], []
+        by_zone = {}
+        for suggestion_id, conflict_id, _ in valid:
+            by_zone.setdefault(owned[suggestion_id]['zone'], []).append(
+                {'suggestion_id': suggestion_id, 'conflict_id': conflict_id})
+
+        for zone, entries in sorted(by_zone.items()):
+            batch = self.cluster.implement_remote_suggestions(zone, entries)
+            if batch is None:
+                rejected.extend({**entry, 'error': f"Zone {zone} did not answer"} for entry in entries)
+                continue
+            implemented.extend(batch['implemented'])
+            rejected.extend(batch['rejected'])
+            affected_trains.update(batch['affected_trains'])
+            conflicts.extend(batch['conflicts'])
+            suggestions.extend(batch['suggestions'])
+            for result in batch['implemented']:
+                self.zone_suggestions.pop(result['suggestion_id'], None)
+
+        return {
+            'success': bool(implemented),
+            'implemented': implemented,
+            'rejected': rejected,
+            'affected_trains': sorted(affected_trains),
+            'conflicts': conflicts,
+            'suggestions': suggestions,
+            'timestamp': datetime.now().isoformat()
+        }
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description='RailOptiX zone worker')
+    parser.add_argument('--zone', type=int, required=True)
+    parser.add_argument('--zones', type=int, required=True)
+    parser.add_argument('--message-queue', required=True, help='redis://host:port/db')
+    parser.add_argument('--tick-interval', type=float, default=5.0)
+    parser.add_argument('--scale', help='Use a synthetic network instead of the demo data')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--network-file', help='Network compiled with timetable_store.py (memory-mapped)')
+    args = parser.parse_args(argv)
+
+    bus = create_message_bus(args.message_queue)
+    worker = ZoneWorker(args.zone, args.zones, bus, bus.create_emitter(),
+                        args.scale, args.seed, args.tick_interval, args.network_file)
+    print(f"🚆 Zone worker {args.zone}/{args.zones} owns {len(worker.data_manager.trains)} trains")
+
+    try:
+        worker.run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        bus.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
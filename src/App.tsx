@@ -72,6 +72,17 @@ function App() {
       setSuggestions(prev => prev.filter(s => s.id !== data.suggestion_id));
     });
 
+    newSocket.on('suggestions_implemented', (data) => {
+      console.log('✅ Suggestions implemented', data);
+      if (data.kpis) setKpis(data.kpis);
+      
+      // Drop every resolved conflict and accepted suggestion, then add any re-detected ones
+      const conflictIds = new Set(data.conflict_ids || []);
+      const suggestionIds = new Set(data.suggestion_ids || []);
+      setConflicts(prev => [...prev.filter(c => !conflictIds.has(c.id)), ...(data.conflicts || [])]);
+      setSuggestions(prev => [...prev.filter(s => !suggestionIds.has(s.id)), ...(data.suggestions || [])]);
+    });
+
     newSocket.on('kpi_update', (data) => {
       console.log('📈 KPI Update', data);
       if (data.kpis) setKpis(data.kpis);
@@ -30,7 +30,7 @@ export interface Train {
 
 export interface Conflict {
   id: string;
-  type: 'train_crossing' | 'platform_conflict' | 'signal_conflict' | 'track_maintenance';
+  type: 'train_crossing' | 'platform_conflict' | 'signal_conflict' | 'track_maintenance' | 'rake_link';
   priority: 'high' | 'medium' | 'low';
   location: string;
   estimated_time: Date | string;